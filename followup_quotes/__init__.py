@@ -1,9 +1,14 @@
 """Follow-up quote finder package."""
 
 __all__ = [
+    "aliases",
     "app",
     "config",
+    "engine_duckdb",
+    "history",
     "io_excel",
     "matching",
+    "preview",
     "ui",
+    "update",
 ]
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+"""Customer alias table.
+
+`customer_aliases.json` is a flat, user-editable JSON object mapping a customer name variant to
+the name it should be treated as, e.g. ``{"ACME IND": "ACME INDUSTRIES"}``. Both sides may be
+written as they appear in the exports; they are normalized with `normalize_customer` on load.
+Aliases confirmed by fuzzy matching are appended to the same file.
+
+Normalization is memoized per raw cell value and alias chains are resolved ahead of time, so a
+run costs two dict lookups per distinct customer name no matter how many rows or aliases there
+are. Learning an alias only touches the lookup entries it re-points.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+import json
+
+import numpy as np
+import pandas as pd
+
+from .config import FollowupError
+from .io_excel import normalize_customer
+
+DEFAULT_ALIAS_FILE = "customer_aliases.json"
+
+
+@dataclass
+class CustomerAliases:
+    path: Path | None = None
+    entries: dict[str, str] = field(default_factory=dict)
+    _direct: dict[str, str] = field(default_factory=dict, repr=False)
+    _lookup: dict[str, str] = field(default_factory=dict, repr=False)
+    _sources: dict[str, set[str]] = field(default_factory=dict, repr=False)  # canonical -> its variants
+    _memo: dict[object, str] = field(default_factory=dict, repr=False)  # raw value -> normalized key
+    _dirty: bool = field(default=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._rebuild()
+
+    @classmethod
+    def from_json(cls, path: str | Path | None) -> "CustomerAliases":
+        if not path or not Path(path).exists():
+            return cls(path=Path(path) if path else None)
+        raw = json.loads(Path(path).read_text(encoding="utf-8"))
+        if not isinstance(raw, dict) or not all(isinstance(k, str) and isinstance(v, str) for k, v in raw.items()):
+            raise FollowupError(f"{path} must be a JSON object of \"variant name\": \"canonical name\" pairs.")
+        return cls(path=Path(path), entries=raw)
+
+    def _rebuild(self) -> None:
+        direct = {normalize_customer(k): normalize_customer(v) for k, v in self.entries.items()}
+        lookup: dict[str, str] = {}
+        for variant in direct:
+            # Follow chains (A -> B -> C) once here so lookups stay a single dict hit.
+            seen = {variant}
+            target = direct[variant]
+            while target in direct and target not in seen:
+                seen.add(target)
+                target = direct[target]
+            if target != variant:
+                lookup[variant] = target
+        self._direct = direct
+        self._lookup = lookup
+        self._sources = {}
+        for variant, target in lookup.items():
+            self._sources.setdefault(target, set()).add(variant)
+
+    def __len__(self) -> int:
+        return len(self._lookup)
+
+    def resolved(self) -> dict[str, str]:
+        """Normalized variant key -> canonical key, with chains already followed."""
+        return dict(self._lookup)
+
+    def canonical(self, value: object) -> str:
+        try:
+            key = self._memo[value]
+        except KeyError:
+            key = self._memo[value] = normalize_customer(value)
+        except TypeError:  # unhashable cell
+            key = normalize_customer(value)
+        return self._lookup.get(key, key)
+
+    def canonicalize(self, values: pd.Series) -> pd.Series:
+        """Canonical customer key per cell, computed once per distinct value."""
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        keys = [self.canonical(u) for u in uniques]
+        keys.append(self.canonical(None))  # code -1 (missing) indexes the last slot
+        return pd.Series(np.array(keys, dtype=object)[codes], index=values.index, dtype=object)
+
+    def learn(self, variant_key: str, canonical_key: str) -> None:
+        if not variant_key or variant_key == canonical_key or self._lookup.get(variant_key) == canonical_key:
+            return
+        self.entries[variant_key] = canonical_key
+        self._dirty = True
+        variant, canonical = normalize_customer(variant_key), normalize_customer(canonical_key)
+        target = self._lookup.get(canonical, canonical)
+        if variant in self._direct or target == variant:
+            # Re-pointing an existing variant or closing a cycle changes other chains; rare enough
+            # to resolve the whole table again.
+            self._rebuild()
+            return
+        self._direct[variant] = canonical
+        # Names that resolved to the new variant now continue on to its target.
+        for source in self._sources.pop(variant, set()) | {variant}:
+            self._lookup[source] = target
+            self._sources.setdefault(target, set()).add(source)
+
+    def save(self) -> None:
+        if not self._dirty or self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.entries, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        self._dirty = False
@@ -1,12 +1,44 @@
 from __future__ import annotations
 
+from contextlib import ExitStack
+from dataclasses import dataclass, field, replace
+from datetime import date
 from pathlib import Path
+from typing import Iterator
 import re
 import sys
 
-from .config import ColumnMap, DEFAULT_ALLOWED_REPS, ORDER_SYNONYMS, QUOTE_SYNONYMS, RunConfig
-from .io_excel import detect_columns, read_excel, write_output
-from .matching import run_matching
+import pandas as pd
+
+from .aliases import DEFAULT_ALIAS_FILE, CustomerAliases
+from .cache import run_cache_for_cfg, run_cache_key
+from .config import ColumnMap, DEFAULT_ALLOWED_REPS, ENGINES, ORDER_SYNONYMS, QUOTE_SYNONYMS, FollowupError, RunConfig
+from .engine_duckdb import DuckDBInput, duckdb_inputs, run_matching_duckdb
+from .history import RunRecorder
+from .io_excel import (
+    DetectionResult,
+    HeaderSpec,
+    align_detection,
+    combine_parts,
+    detect_columns,
+    expand_input_paths,
+    iter_excel_chunks,
+    read_excel_parts,
+    read_output_sheet,
+    read_output_sheets,
+    write_output,
+)
+from .matching import (
+    WINDOW_COUNTS,
+    MatchResult,
+    OrderTotalsAccumulator,
+    order_accumulator_for_cfg,
+    run_matching,
+    run_matching_windows,
+    run_sweep,
+)
+from .spill import BucketSpill, check_spillable, match_spilled, plan_memory, spill_directory
+from .update import carry_rep_edits, fold_rep_ticks, merge_followups
 
 INVALID_SHEET_CHARS = re.compile(r"[:\\/?*\[\]]")
 DEFAULT_TEMPLATE_CANDIDATES = [
@@ -59,45 +91,382 @@ def resolve_template_path(explicit_template: Path | None) -> Path | None:
     return None
 
 
-def generate_followup_workbook(cfg: RunConfig) -> Path:
-    quotes_df = read_excel(cfg.quotes_path, cfg.sheet_quotes)
-    orders_df = read_excel(cfg.orders_path, cfg.sheet_orders)
+def resolve_alias_path(explicit_aliases: Path | None) -> Path | None:
+    if explicit_aliases:
+        return explicit_aliases
+
+    for root in _runtime_search_roots():
+        candidate = root / DEFAULT_ALIAS_FILE
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def default_alias_path() -> Path:
+    """Where a new alias file is created: `assets/customer_aliases.json` in the working folder."""
+    return _runtime_search_roots()[0] / DEFAULT_ALIAS_FILE
+
+
+def _with_aliases(cfg: RunConfig) -> RunConfig:
+    if cfg.aliases is not None:
+        return cfg
+    alias_path = resolve_alias_path(None)
+    if alias_path is None:
+        if not cfg.fuzzy:
+            return cfg
+        # --fuzzy learns aliases, so it needs a file to save them to even before one exists.
+        alias_path = default_alias_path()
+    return replace(cfg, aliases=CustomerAliases.from_json(alias_path))
+
+
+def _save_aliases(cfg: RunConfig) -> None:
+    if cfg.aliases is not None:
+        cfg.aliases.save()
+
+
+QUOTE_REQUIRED_FIELDS = {"quote_number", "customer", "quote_amount", "date_quoted", "entry_person_name"}
+ORDER_REQUIRED_FIELDS = {"customer", "net"}
+ORDER_CONTAINS_RULES = {"open": "open", "void": "void"}
+
+
+def _header_spec(synonyms: dict[str, list[str]], required: set[str], overrides: dict[str, str]) -> HeaderSpec:
+    """Header search terms, with --column-map names counting as synonyms of their field."""
+    merged = {f: ([overrides[f]] if f in overrides else []) + syns for f, syns in synonyms.items()}
+    return HeaderSpec(merged, frozenset(required))
+
+
+@dataclass
+class _InputChunks:
+    """Chunks of every file of one input, renamed to the first file's detected headers.
+
+    Iterating yields ``(part index, chunk)``, a part being one sheet of one file; `first` holds
+    the first part's label and detection once its first chunk has been read.
+    """
+
+    paths: list[Path]
+    sheet_name: str | None
+    synonyms: dict[str, list[str]]
+    required_fields: set[str]
+    overrides: dict[str, str]
+    contains_rules: dict[str, str] | None = None
+    chunk_bytes: int | None = None
+    parts: list[tuple[Path, str]] = field(default_factory=list)
+    first: tuple[str, DetectionResult] | None = None
+
+    def __iter__(self) -> Iterator[tuple[int, pd.DataFrame]]:
+        spec = _header_spec(self.synonyms, self.required_fields, self.overrides)
+        renames: dict[str, str] = {}
+        for path in self.paths:
+            for label, chunk in iter_excel_chunks(path, self.sheet_name, header=spec, chunk_bytes=self.chunk_bytes):
+                if not self.parts or self.parts[-1] != (path, label):
+                    self.parts.append((path, label))
+                    det = detect_columns(
+                        chunk,
+                        self.synonyms,
+                        required_fields=self.required_fields,
+                        overrides=self.overrides,
+                        contains_rules=self.contains_rules,
+                    )
+                    if self.first is None:
+                        self.first = (label, det)
+                    renames = align_detection(self.first[0], self.first[1], label, det)
+                yield len(self.parts) - 1, chunk.rename(columns=renames)
+
+    def detection(self, kind: str) -> DetectionResult:
+        if self.first is None:
+            raise FollowupError(f"No {kind} rows found in: " + ", ".join(str(p) for p in self.paths))
+        labels = [label for _, label in self.parts]
+        notes = self.first[1].notes
+        notes = notes + ([f"combined {len(labels)} inputs: " + ", ".join(labels)] if len(labels) > 1 else [])
+        return DetectionResult(mapping=self.first[1].mapping, notes=notes)
+
+
+def _quote_chunks(cfg: RunConfig, chunk_bytes: int | None = None) -> _InputChunks:
+    return _InputChunks(
+        cfg.quotes_paths,
+        cfg.sheet_quotes,
+        QUOTE_SYNONYMS,
+        QUOTE_REQUIRED_FIELDS,
+        cfg.column_map.quotes,
+        chunk_bytes=chunk_bytes,
+    )
+
+
+def _order_chunks(cfg: RunConfig, chunk_bytes: int | None = None) -> _InputChunks:
+    return _InputChunks(
+        cfg.orders_paths,
+        cfg.sheet_orders,
+        ORDER_SYNONYMS,
+        ORDER_REQUIRED_FIELDS,
+        cfg.column_map.orders,
+        contains_rules=ORDER_CONTAINS_RULES,
+        chunk_bytes=chunk_bytes,
+    )
+
+
+def _stream_orders(cfg: RunConfig) -> tuple[OrderTotalsAccumulator, DetectionResult]:
+    """Fold every Order Log file chunk by chunk into order totals, never holding all lines."""
+    chunks = _order_chunks(cfg)
+    acc: OrderTotalsAccumulator | None = None
+    for source, chunk in chunks:
+        if acc is None:
+            acc = order_accumulator_for_cfg(chunks.first[1].mapping, cfg)
+        acc.add(chunk, source=source)
+    return acc, chunks.detection("order")
+
+
+def _spill_input(chunks: _InputChunks, directory: Path, aliases: CustomerAliases) -> BucketSpill:
+    """Stream one input into customer buckets, keeping only its mapped columns."""
+    spill = BucketSpill(directory)
+    for source, chunk in chunks:
+        mapping = chunks.first[1].mapping
+        projected = chunk[list(dict.fromkeys(mapping.values()))]
+        spill.add(projected, aliases.canonicalize(projected[mapping["customer"]]), source)
+    return spill
+
 
-    qdetect = detect_columns(
-        quotes_df,
+def _spill_inputs(cfg: RunConfig, directory: Path):
+    """Bounded-memory counterpart of `_read_inputs`: both inputs end up bucketed on disk."""
+    check_spillable(cfg)
+    chunk_bytes = plan_memory(cfg.memory_budget_mb).chunk_bytes
+    aliases = cfg.aliases if cfg.aliases is not None else CustomerAliases()
+    quotes, orders = _quote_chunks(cfg, chunk_bytes), _order_chunks(cfg, chunk_bytes)
+    quote_spill = _spill_input(quotes, directory / "quotes", aliases)
+    qdetect = quotes.detection("quote")
+    order_spill = _spill_input(orders, directory / "orders", aliases)
+    return quote_spill, order_spill, qdetect, orders.detection("order")
+
+
+def _load_duckdb_inputs(cfg: RunConfig, quotes_in: DuckDBInput, orders_in: DuckDBInput):
+    """Stream both inputs into the DuckDB engine's database instead of loading them into pandas."""
+    quotes, orders = _quote_chunks(cfg), _order_chunks(cfg)
+    for source, chunk in quotes:
+        quotes_in.add(chunk, quotes.first[1].mapping, source)
+    qdetect = quotes.detection("quote")
+    for source, chunk in orders:
+        orders_in.add(chunk, orders.first[1].mapping, source)
+    return quotes_in, orders_in, qdetect, orders.detection("order")
+
+
+def _read_inputs(cfg: RunConfig):
+    if cfg.memory_budget_mb is not None:
+        raise FollowupError("--memory-budget-mb applies to single-workbook runs; drop it for --windows and --sweep.")
+    quote_spec = _header_spec(QUOTE_SYNONYMS, QUOTE_REQUIRED_FIELDS, cfg.column_map.quotes)
+    quote_parts = read_excel_parts(cfg.quotes_paths, cfg.sheet_quotes, cfg.reader, quote_spec)
+
+    quotes_df, qdetect = combine_parts(
+        quote_parts,
         QUOTE_SYNONYMS,
-        required_fields={"quote_number", "customer", "quote_amount", "date_quoted", "entry_person_name"},
+        required_fields=QUOTE_REQUIRED_FIELDS,
+        dedupe_fields=["quote_number", "rev"],
         overrides=cfg.column_map.quotes,
     )
-    odetect = detect_columns(
-        orders_df,
+    if cfg.stream_orders:
+        if cfg.engine != "pandas":
+            raise FollowupError("--stream-orders runs on the pandas engine only.")
+        orders, odetect = _stream_orders(cfg)
+        return quotes_df, orders, qdetect, odetect
+
+    orders_df, odetect = combine_parts(
+        read_excel_parts(
+            cfg.orders_paths,
+            cfg.sheet_orders,
+            cfg.reader,
+            _header_spec(ORDER_SYNONYMS, ORDER_REQUIRED_FIELDS, cfg.column_map.orders),
+        ),
         ORDER_SYNONYMS,
-        required_fields={"customer", "net"},
+        required_fields=ORDER_REQUIRED_FIELDS,
+        dedupe_fields=["order_id"],
         overrides=cfg.column_map.orders,
-        contains_rules={"open": "open", "void": "void"},
+        contains_rules=ORDER_CONTAINS_RULES,
     )
+    return quotes_df, orders_df, qdetect, odetect
+
+
+def _rep_sheet_name(rep: object) -> str:
+    rep_name = "Unassigned" if rep is None or pd.isna(rep) or str(rep).strip() == "" else str(rep)
+    return _sheet_name_for_rep(rep_name)
+
 
-    result = run_matching(quotes_df, orders_df, qdetect.mapping, odetect.mapping, cfg)
+@dataclass
+class _PreviousOutput:
+    """What `--update` reads back: the Follow-Up sheet and the rep tabs it was split into."""
+
+    followups: pd.DataFrame | None
+    rep_tabs: dict[str, pd.DataFrame | None] = field(default_factory=dict)
+
+
+def _read_previous(path: Path) -> _PreviousOutput:
+    if not path.exists():
+        raise FollowupError(f"Workbook to update not found: {path}")
+    followups = read_output_sheet(path, "Follow-Up", "Quote")
+    if followups is None or "Entry Person Name" not in followups.columns:
+        return _PreviousOutput(followups)
+    tabs = followups["Entry Person Name"].map(_rep_sheet_name)
+    rep_tabs = read_output_sheets(path, dict.fromkeys(tabs), "Quote")
+    readable = {tab: rows for tab, rows in rep_tabs.items() if rows is not None}
+    return _PreviousOutput(fold_rep_ticks(followups, readable, tabs), rep_tabs)
+
+
+def _write_result(
+    result: MatchResult,
+    out_path: Path,
+    cfg: RunConfig,
+    previous: _PreviousOutput | None = None,
+    recorder: RunRecorder | None = None,
+) -> Path:
     sheets = {
         "Follow-Up": result.followups,
         "_Meta": result.meta,
     }
 
-    for rep, rep_df in result.followups.groupby("Entry Person Name", dropna=False):
-        rep_name = "Unassigned" if rep is None or str(rep).strip() == "" else str(rep)
-        sheets[_sheet_name_for_rep(rep_name)] = rep_df.reset_index(drop=True)
+    rep_tabs = previous.rep_tabs if previous is not None else {}
+    rep_rows = result.followups if result.rep_followups is None else result.rep_followups
+    for rep, rep_df in rep_rows.groupby("Entry Person Name", dropna=False):
+        tab = _rep_sheet_name(rep)
+        sheets[tab] = carry_rep_edits(rep_tabs.get(tab), rep_df)
+
+    # Empty out rep tabs from the previous run whose follow-ups have all gone.
+    for tab, rows in rep_tabs.items():
+        sheets.setdefault(tab, carry_rep_edits(rows, result.followups.iloc[0:0]))
 
     if cfg.debug and result.debug is not None:
         sheets["_Debug"] = result.debug
 
-    template_path = resolve_template_path(cfg.template_path)
-    write_output(cfg.out_path, sheets, template_path)
+    template_path = cfg.update_path or resolve_template_path(cfg.template_path)
+    changed = write_output(out_path, sheets, template_path)
+    if recorder is not None:
+        # Rows whose cells differ from the template or previous workbook, across every sheet.
+        recorder.add_counts({"rows_changed": sum(changed.values())})
+    return out_path
+
+
+def _merge_previous(result: MatchResult, previous: _PreviousOutput) -> MatchResult:
+    merged, summary = merge_followups(previous.followups, result.followups)
+    update_meta = pd.DataFrame(
+        [("update_kept", summary.kept), ("update_added", summary.added), ("update_removed", summary.removed)],
+        columns=["Metric", "Value"],
+    )
+    return replace(result, followups=merged, meta=pd.concat([result.meta, update_meta], ignore_index=True))
+
+
+def window_output_path(out_path: Path, label: str) -> Path:
+    return out_path.with_name(f"{out_path.stem}_{label}{out_path.suffix}")
+
+
+def _run_engine(quotes_df: pd.DataFrame, orders_df: pd.DataFrame, qmap: dict[str, str], omap: dict[str, str], cfg: RunConfig) -> MatchResult:
+    if cfg.memory_budget_mb is not None:
+        return match_spilled(quotes_df, orders_df, qmap, omap, cfg)
+    if cfg.engine == "duckdb":
+        return run_matching_duckdb(quotes_df, orders_df, qmap, omap, cfg)
+    if cfg.engine != "pandas":
+        raise FollowupError(f"Unknown engine '{cfg.engine}'. Choose one of: {', '.join(ENGINES)}.")
+    return run_matching(quotes_df, orders_df, qmap, omap, cfg)
+
+
+def generate_followup_workbook(cfg: RunConfig) -> Path:
+    return generate_followup_result(cfg)[0]
+
+
+def generate_followup_result(cfg: RunConfig) -> tuple[Path, MatchResult]:
+    """Like `generate_followup_workbook`, but also returns the result that was written."""
+    recorder = RunRecorder(cfg)
+    cfg = _with_aliases(cfg)
+    cache = run_cache_for_cfg(cfg)
+    if cache is not None:
+        with recorder.stage("cache"):
+            key = run_cache_key(cfg, resolve_template_path(cfg.template_path))
+            cached = cache.get(key, cfg.out_path)
+        if cached is not None:
+            recorder.add_result(cached.followups, cached.counts)
+            recorder.finish()
+            return cfg.out_path, cached
+    previous = None
+    with ExitStack() as stack:
+        with recorder.stage("read"):
+            if cfg.memory_budget_mb is not None:
+                spill_dir = Path(stack.enter_context(spill_directory(cfg)))
+                quotes_df, orders_df, qdetect, odetect = _spill_inputs(cfg, spill_dir)
+            elif cfg.engine == "duckdb":
+                quotes_in, orders_in = stack.enter_context(duckdb_inputs(cfg))
+                quotes_df, orders_df, qdetect, odetect = _load_duckdb_inputs(cfg, quotes_in, orders_in)
+            else:
+                quotes_df, orders_df, qdetect, odetect = _read_inputs(cfg)
+            if cfg.update_path is not None:
+                previous = _read_previous(cfg.update_path)
+        with recorder.stage("match"):
+            result = _run_engine(quotes_df, orders_df, qdetect.mapping, odetect.mapping, cfg)
+            if cfg.update_path is not None:
+                result = _merge_previous(result, previous)
+    _save_aliases(cfg)
+    with recorder.stage("write"):
+        out = _write_result(result, cfg.out_path, cfg, previous, recorder)
+    if cache is not None:
+        cache.put(key, out, result)
+    recorder.add_result(result.followups, result.counts)
+    recorder.finish()
+    return out, result
+
+
+def generate_followup_workbooks(cfg: RunConfig) -> list[Path]:
+    """Generate one workbook, or one per date window when `cfg.window` is set.
+
+    Windowed runs read and prep both inputs once and write `<out stem>_<window start><suffix>`
+    next to `cfg.out_path` for every window that contains quotes.
+    """
+    if not cfg.window:
+        return [generate_followup_workbook(cfg)]
+
+    if cfg.engine != "pandas":
+        raise FollowupError("--windows runs on the pandas engine only.")
+    if cfg.update_path is not None:
+        raise FollowupError("--update refreshes a single workbook and cannot be combined with --windows.")
+    recorder = RunRecorder(cfg)
+    cfg = _with_aliases(cfg)
+    with recorder.stage("read"):
+        quotes_df, orders_df, qdetect, odetect = _read_inputs(cfg)
+    with recorder.stage("match"):
+        windows = run_matching_windows(quotes_df, orders_df, qdetect.mapping, odetect.mapping, cfg)
+    _save_aliases(cfg)
+    outputs = []
+    with recorder.stage("write"):
+        for label, result in windows:
+            outputs.append(_write_result(result, window_output_path(cfg.out_path, label), cfg, recorder=recorder))
+    for i, (_, result) in enumerate(windows):
+        # Shared input/filter counts repeat in every window; record them once.
+        counts = result.counts if i == 0 else {k: v for k, v in result.counts.items() if k in WINDOW_COUNTS}
+        recorder.add_result(result.followups, counts)
+    recorder.finish()
+    return outputs
+
+
+def generate_sweep_workbook(cfg: RunConfig) -> Path:
+    """Write a `Sweep` sheet of follow-up counts per rep for the configured tolerance/floor grid."""
+    recorder = RunRecorder(cfg)
+    cfg = _with_aliases(cfg)
+    with recorder.stage("read"):
+        quotes_df, orders_df, qdetect, odetect = _read_inputs(cfg)
+    counts: dict[str, int] = {}
+    with recorder.stage("match"):
+        sweep = run_sweep(quotes_df, orders_df, qdetect.mapping, odetect.mapping, cfg, counts)
+    meta = pd.DataFrame(
+        [
+            ("grid_points", len(sweep)),
+            ("quotes_mapping", str(qdetect.mapping)),
+            ("orders_mapping", str(odetect.mapping)),
+        ],
+        columns=["Metric", "Value"],
+    )
+    with recorder.stage("write"):
+        write_output(cfg.out_path, {"Sweep": sweep, "_Meta": meta})
+    recorder.add_counts({**counts, "grid_points": len(sweep)})
+    recorder.finish()
     return cfg.out_path
 
 
 def make_run_config(
-    quotes: str,
-    orders: str,
+    quotes: str | list[str],
+    orders: str | list[str],
     out: str,
     *,
     floor: float = 1500,
@@ -111,10 +480,29 @@ def make_run_config(
     fuzzy_threshold: int = 90,
     column_map: ColumnMap | None = None,
     template: str | None = None,
+    since: date | None = None,
+    until: date | None = None,
+    window: str | None = None,
+    order_window_days: int | None = None,
+    engine: str = "pandas",
+    workers: int = 1,
+    aliases: str | None = None,
+    update: str | None = None,
+    reader: str = "auto",
+    stream_orders: bool = False,
+    one_to_one: bool = False,
+    max_per_rep: int | None = None,
+    rank_by: str = "amount",
+    full_followup_sheet: bool = False,
+    latest_revision: str | None = None,
+    memory_budget_mb: int | None = None,
+    spill_dir: str | None = None,
 ) -> RunConfig:
+    quote_paths = expand_input_paths([quotes] if isinstance(quotes, str) else quotes)
+    order_paths = expand_input_paths([orders] if isinstance(orders, str) else orders)
     return RunConfig(
-        quotes_path=Path(quotes),
-        orders_path=Path(orders),
+        quotes_path=quote_paths[0],
+        orders_path=order_paths[0],
         out_path=Path(out),
         floor=floor,
         tolerance=tolerance,
@@ -127,4 +515,23 @@ def make_run_config(
         fuzzy_threshold=fuzzy_threshold,
         column_map=column_map or ColumnMap(),
         template_path=Path(template) if template else None,
+        since=since,
+        until=until,
+        window=window,
+        order_window_days=order_window_days,
+        engine=engine,
+        workers=workers,
+        aliases=CustomerAliases.from_json(aliases) if aliases else None,
+        update_path=Path(update) if update else None,
+        extra_quotes_paths=quote_paths[1:],
+        extra_orders_paths=order_paths[1:],
+        reader=reader,
+        stream_orders=stream_orders,
+        one_to_one=one_to_one,
+        max_per_rep=max_per_rep,
+        rank_by=rank_by,
+        full_followup_sheet=full_followup_sheet,
+        latest_revision=latest_revision,
+        memory_budget_mb=memory_budget_mb,
+        spill_dir=Path(spill_dir) if spill_dir else None,
     )
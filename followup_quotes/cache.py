@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+"""Run-level result cache.
+
+Regenerating a report from the same exports and settings returns the workbook produced the
+first time instead of reading, matching and saving again. Entries are keyed on the content of
+the input and template files, the settings that affect the output and the package build, and
+the least recently used ones are evicted once the cache outgrows its size budget.
+"""
+
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+import hashlib
+import json
+import os
+import pickle
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .config import RunConfig
+from .matching import MatchResult
+
+CACHE_ENV_VAR = "FOLLOWUP_QUOTES_CACHE"
+
+# Settings that never change the workbook (worker count and memory budget are output-identical by design).
+_UNKEYED_FIELDS = {
+    "quotes_path",
+    "orders_path",
+    "extra_quotes_paths",
+    "extra_orders_paths",
+    "template_path",
+    "out_path",
+    "update_path",
+    "aliases",
+    "workers",
+    "duckdb_memory_limit",
+    "record_history",
+    "history_path",
+    "prometheus_textfile",
+    "use_cache",
+    "cache_dir",
+    "cache_max_mb",
+    "memory_budget_mb",
+    "spill_dir",
+}
+
+
+def default_cache_dir() -> Path:
+    override = os.environ.get(CACHE_ENV_VAR)
+    if override:
+        return Path(override)
+    return Path.home() / ".followup_quotes" / "cache"
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _package_fingerprint() -> str:
+    """Installed version plus a digest of the package sources, so source checkouts invalidate too.
+
+    The pandas and numpy versions are part of it because cached results are pickled frames.
+    """
+    try:
+        version = metadata.version("followup-quotes")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    digest = hashlib.sha256()
+    for source in sorted(Path(__file__).parent.glob("*.py")):
+        digest.update(source.name.encode())
+        digest.update(source.read_bytes())
+    return f"{version}+{digest.hexdigest()[:16]}+pandas{pd.__version__}+numpy{np.__version__}"
+
+
+def _canonical(value: object) -> object:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "__dataclass_fields__"):
+        return {f.name: _canonical(getattr(value, f.name)) for f in fields(value)}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, Path):
+        return str(value)
+    return value
+
+
+def run_cache_key(cfg: RunConfig, template_path: Path | None) -> str:
+    """Content hash of everything that determines the workbook written for `cfg`.
+
+    Input files count by name and content (names appear in `_Meta`), not by location.
+    """
+    payload = {
+        "package": _package_fingerprint(),
+        "quotes": [(p.name, _file_digest(p)) for p in cfg.quotes_paths],
+        "orders": [(p.name, _file_digest(p)) for p in cfg.orders_paths],
+        "template": _file_digest(template_path) if template_path else None,
+        "aliases": sorted(cfg.aliases.entries.items()) if cfg.aliases is not None else [],
+        "config": {f.name: _canonical(getattr(cfg, f.name)) for f in fields(cfg) if f.name not in _UNKEYED_FIELDS},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+@dataclass
+class RunCache:
+    """Workbook + `MatchResult` per key in `directory`, LRU-evicted above `max_bytes`.
+
+    Cache problems (unreadable entries, full disks) never fail a run; they read as misses.
+    """
+
+    directory: Path
+    max_bytes: int
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.directory / f"{key}.xlsx", self.directory / f"{key}.pkl"
+
+    def get(self, key: str, out_path: Path) -> MatchResult | None:
+        """Copy the cached workbook for `key` to `out_path` and return its result, or None."""
+        workbook, result_path = self._paths(key)
+        try:
+            with result_path.open("rb") as fh:
+                result = pickle.load(fh)
+        except FileNotFoundError:
+            return None
+        except Exception:  # noqa: BLE001
+            # Truncated files, or entries pickled against another pandas or package layout.
+            self._discard(key)
+            return None
+        if not isinstance(result, MatchResult):
+            self._discard(key)
+            return None
+        try:
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(workbook, out_path)
+            os.utime(result_path)  # mark as recently used
+        except OSError:
+            return None
+        return result
+
+    def _discard(self, key: str) -> None:
+        for path in self._paths(key):
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def put(self, key: str, workbook_path: Path, result: MatchResult) -> None:
+        workbook, result_path = self._paths(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_workbook, tmp_result = workbook.with_suffix(".xlsx.tmp"), result_path.with_suffix(".pkl.tmp")
+            shutil.copyfile(workbook_path, tmp_workbook)
+            with tmp_result.open("wb") as fh:
+                pickle.dump(result, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            # The result file is the entry's marker, so it is published last.
+            os.replace(tmp_workbook, workbook)
+            os.replace(tmp_result, result_path)
+            self._evict()
+        except OSError:
+            return
+
+    def _evict(self) -> None:
+        entries = []
+        for result_path in self.directory.glob("*.pkl"):
+            workbook = result_path.with_suffix(".xlsx")
+            try:
+                size = result_path.stat().st_size + (workbook.stat().st_size if workbook.exists() else 0)
+                entries.append((result_path.stat().st_mtime, size, result_path, workbook))
+            except OSError:
+                continue
+        total = sum(size for _, size, _, _ in entries)
+        for _, size, result_path, workbook in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            result_path.unlink(missing_ok=True)
+            workbook.unlink(missing_ok=True)
+            total -= size
+
+
+def run_cache_for_cfg(cfg: RunConfig) -> RunCache | None:
+    """The cache to use for `cfg`, or None when disabled or for `--update` runs (they merge rep edits)."""
+    if not cfg.use_cache or cfg.update_path is not None:
+        return None
+    return RunCache(cfg.cache_dir or default_cache_dir(), cfg.cache_max_mb * 1024 * 1024)
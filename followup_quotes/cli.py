@@ -8,41 +8,155 @@ same behavior and we avoid duplicated import paths during merges.
 """
 
 import argparse
+from datetime import date
 from pathlib import Path
+import json
 import sys
 
-from .app import generate_followup_workbook
-from .config import ColumnMap, FollowupError, RunConfig, load_reps
+from .aliases import CustomerAliases
+from .app import generate_followup_workbooks, generate_sweep_workbook
+from .config import (
+    ENGINES,
+    RANK_BY,
+    READERS,
+    REVISION_ORDERS,
+    WINDOW_FREQUENCIES,
+    ColumnMap,
+    FollowupError,
+    RunConfig,
+    load_reps,
+)
+from .history import default_history_path, load_history, summarize_history
+from .io_excel import expand_input_paths
+
+
+def _non_negative_int(text: str) -> int:
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {value}")
+    return value
 
 
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="Generate follow-up quote workbook from Quote Summary and Order Log.")
-    p.add_argument("--quotes", required=True, help="Path to Quote Summary xlsx")
-    p.add_argument("--orders", required=True, help="Path to Order Log xlsx")
+    p.add_argument("--quotes", required=True, nargs="+", help="Quote Summary xlsx path(s) or globs")
+    p.add_argument("--orders", required=True, nargs="+", help="Order Log xlsx path(s) or globs, e.g. 'Order Log 2024-*.xlsx'")
     p.add_argument("--out", required=True, help="Path for output xlsx")
     p.add_argument("--floor", type=float, default=1500)
     p.add_argument("--tolerance", type=float, default=1)
     p.add_argument("--relative-tolerance", type=float, default=0.05)
-    p.add_argument("--sheet-quotes")
-    p.add_argument("--sheet-orders")
+    p.add_argument("--sheet-quotes", help="Quotes sheet name; '*' reads every sheet")
+    p.add_argument("--sheet-orders", help="Orders sheet name; '*' reads every sheet")
     p.add_argument("--reps", nargs="*")
     p.add_argument("--reps-config")
     p.add_argument("--debug", action="store_true")
     p.add_argument("--column-map")
     p.add_argument("--template", help="Optional output template workbook (.xlsx)")
-    p.add_argument("--fuzzy", action="store_true")
+    p.add_argument("--fuzzy", action="store_true", help="Confirm near-miss customer spellings by amount and learn them as aliases")
     p.add_argument("--fuzzy-threshold", type=int, default=90)
+    p.add_argument("--aliases", help="Customer alias JSON (default: auto-detected customer_aliases.json)")
+    p.add_argument("--since", type=date.fromisoformat, help="Only quotes dated on/after YYYY-MM-DD")
+    p.add_argument("--until", type=date.fromisoformat, help="Only quotes dated on/before YYYY-MM-DD")
+    p.add_argument(
+        "--order-window-days",
+        type=_non_negative_int,
+        help="Only match orders dated from the quote date through N days after it "
+        "(quotes without a date still match any of the customer's orders)",
+    )
+    p.add_argument("--windows", choices=sorted(WINDOW_FREQUENCIES), help="Write one workbook per date window")
+    p.add_argument("--workers", type=int, default=1, help="Processes for matching, sharded by customer")
+    p.add_argument("--reader", choices=READERS, default="auto", help="xlsx reader (auto: calamine when installed, else openpyxl)")
+    p.add_argument(
+        "--one-to-one",
+        action="store_true",
+        help="Let each order total convert at most one quote (closest pairs first)",
+    )
+    p.add_argument(
+        "--stream-orders",
+        action="store_true",
+        help="Fold the Order Log into order totals while reading it, for logs too large to load at once",
+    )
+    p.add_argument(
+        "--latest-revision",
+        choices=REVISION_ORDERS,
+        help="Keep only the latest revision of each quote number, by revision column or by quote date",
+    )
+    p.add_argument("--max-per-rep", type=int, help="Only the N most urgent follow-ups per rep (see --rank-by)")
+    p.add_argument(
+        "--rank-by",
+        choices=RANK_BY,
+        default="amount",
+        help="Urgency for --max-per-rep: largest quote, oldest quote, or customer with most open quote value",
+    )
+    p.add_argument(
+        "--full-followup-sheet",
+        action="store_true",
+        help="With --max-per-rep, keep every follow-up on the Follow-Up sheet; only rep tabs are limited",
+    )
+    p.add_argument(
+        "--memory-budget-mb",
+        type=int,
+        help="Keep the run under this much memory by matching customer partitions spilled to disk",
+    )
+    p.add_argument("--spill-dir", help="Directory for --memory-budget-mb partitions and the duckdb database (default: system temp)")
+    p.add_argument("--engine", choices=ENGINES, default="pandas", help="Matching engine (duckdb streams the exports into an on-disk database and matches in SQL)")
+    p.add_argument("--duckdb-memory-limit", help="DuckDB memory limit before spilling, e.g. 2GB")
+    p.add_argument("--sweep", action="store_true", help="Write follow-up counts per rep for a grid of settings instead")
+    p.add_argument("--sweep-floors", type=float, nargs="+", default=[])
+    p.add_argument("--sweep-tolerances", type=float, nargs="+", default=[])
+    p.add_argument("--sweep-relative-tolerances", type=float, nargs="+", default=[])
+    p.add_argument("--update", help="Refresh this existing output workbook, keeping rep edits (may equal --out)")
+    p.add_argument("--no-history", action="store_true", help="Do not append this run to the run history")
+    p.add_argument("--history", help="Run history JSONL path (default: ~/.followup_quotes/history.jsonl)")
+    p.add_argument("--prometheus-textfile", help="Also write run metrics to this Prometheus textfile (.prom)")
+    p.add_argument("--no-cache", action="store_true", help="Always rebuild the workbook instead of reusing a cached identical run")
+    p.add_argument("--cache-dir", help="Run cache directory (default: ~/.followup_quotes/cache)")
+    p.add_argument("--cache-max-mb", type=int, default=500, help="Run cache size before least recently used entries are evicted")
+    return p
+
+
+def build_stats_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="followup_quotes stats", description="Summarize recent runs from the run history.")
+    p.add_argument("--history", help="Run history JSONL path (default: ~/.followup_quotes/history.jsonl)")
+    p.add_argument("--last", type=_non_negative_int, default=10, help="Number of most recent runs to show")
+    p.add_argument("--json", action="store_true", help="Print the raw records as JSON lines")
     return p
 
 
+def stats_main(argv: list[str]) -> int:
+    args = build_stats_parser().parse_args(argv)
+    path = Path(args.history) if args.history else default_history_path()
+    records = load_history(path, args.last)
+    if not records:
+        print(f"No runs recorded in {path}")
+        return 0
+    if args.json:
+        for rec in records:
+            print(json.dumps(rec, sort_keys=True))
+        return 0
+
+    summary = summarize_history(records)
+    print(summary.to_string(index=False))
+    totals = summary["total_s"].dropna()
+    if len(totals) > 1:
+        print(f"\nTotal seconds: median {totals.median():.2f}, latest {totals.iloc[-1]:.2f} ({len(records)} runs from {path})")
+    return 0
+
+
 def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["stats"]:
+        return stats_main(argv[1:])
+
     parser = build_parser()
     args = parser.parse_args(argv)
 
     try:
+        quote_paths = expand_input_paths(args.quotes)
+        order_paths = expand_input_paths(args.orders)
         cfg = RunConfig(
-            quotes_path=Path(args.quotes),
-            orders_path=Path(args.orders),
+            quotes_path=quote_paths[0],
+            orders_path=order_paths[0],
             out_path=Path(args.out),
             floor=args.floor,
             tolerance=args.tolerance,
@@ -55,10 +169,47 @@ def main(argv: list[str] | None = None) -> int:
             fuzzy_threshold=args.fuzzy_threshold,
             column_map=ColumnMap.from_json(args.column_map),
             template_path=Path(args.template) if args.template else None,
+            since=args.since,
+            until=args.until,
+            window=args.windows,
+            order_window_days=args.order_window_days,
+            sweep_floors=args.sweep_floors,
+            sweep_tolerances=args.sweep_tolerances,
+            sweep_relative_tolerances=args.sweep_relative_tolerances,
+            engine=args.engine,
+            workers=args.workers,
+            aliases=CustomerAliases.from_json(args.aliases) if args.aliases else None,
+            update_path=Path(args.update) if args.update else None,
+            record_history=not args.no_history,
+            history_path=Path(args.history) if args.history else None,
+            prometheus_textfile=Path(args.prometheus_textfile) if args.prometheus_textfile else None,
+            duckdb_memory_limit=args.duckdb_memory_limit,
+            extra_quotes_paths=quote_paths[1:],
+            extra_orders_paths=order_paths[1:],
+            reader=args.reader,
+            stream_orders=args.stream_orders,
+            one_to_one=args.one_to_one,
+            max_per_rep=args.max_per_rep,
+            rank_by=args.rank_by,
+            full_followup_sheet=args.full_followup_sheet,
+            latest_revision=args.latest_revision,
+            memory_budget_mb=args.memory_budget_mb,
+            spill_dir=Path(args.spill_dir) if args.spill_dir else None,
+            use_cache=not args.no_cache,
+            cache_dir=Path(args.cache_dir) if args.cache_dir else None,
+            cache_max_mb=args.cache_max_mb,
         )
 
-        out = generate_followup_workbook(cfg)
-        print(f"Wrote output: {out}")
+        if args.sweep:
+            out = generate_sweep_workbook(cfg)
+            print(f"Wrote sweep: {out}")
+            return 0
+
+        outputs = generate_followup_workbooks(cfg)
+        if not outputs:
+            print("No quotes fell inside the requested date windows; nothing written.")
+        for out in outputs:
+            print(f"Wrote output: {out}")
         return 0
 
     except FollowupError as exc:
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from datetime import date
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 import json
 
+if TYPE_CHECKING:
+    from .aliases import CustomerAliases
+
 DEFAULT_ALLOWED_REPS = [
     "Reid Kincaid",
     "LuWanna Morris",
@@ -45,9 +49,30 @@ ORDER_SYNONYMS = {
         "Document Number",
         "Order No",
     ],
+    "order_date": ["Order Date", "Date Ordered", "Order Entry Date", "SO Date", "Entry Date"],
+}
+
+
+ENGINES = ("pandas", "duckdb")
+# xlsx readers: "auto" uses calamine when python-calamine is installed, else openpyxl.
+READERS = ("auto", "calamine", "openpyxl")
+
+# --rank-by orders for --max-per-rep: largest quote, oldest quote, or customer with the most open quote value.
+RANK_BY = ("amount", "age", "customer_total")
+# --latest-revision: order revisions of a quote number by the revision column or by quote date.
+REVISION_ORDERS = ("rev", "date")
+
+WINDOW_FREQUENCIES = {
+    "daily": "D",
+    "weekly": "W",
+    "monthly": "M",
+    "quarterly": "Q",
 }
 
 
+ALL_SHEETS = "*"
+
+
 class FollowupError(Exception):
     """Expected domain error to display cleanly in CLI."""
 
@@ -81,6 +106,43 @@ class RunConfig:
     fuzzy_threshold: int = 90
     column_map: ColumnMap = field(default_factory=ColumnMap)
     template_path: Path | None = None
+    since: date | None = None
+    until: date | None = None
+    window: str | None = None
+    order_window_days: int | None = None
+    sweep_floors: list[float] = field(default_factory=list)
+    sweep_tolerances: list[float] = field(default_factory=list)
+    sweep_relative_tolerances: list[float] = field(default_factory=list)
+    engine: str = "pandas"
+    workers: int = 1
+    aliases: CustomerAliases | None = None
+    record_history: bool = True
+    history_path: Path | None = None
+    prometheus_textfile: Path | None = None
+    update_path: Path | None = None
+    extra_quotes_paths: list[Path] = field(default_factory=list)
+    extra_orders_paths: list[Path] = field(default_factory=list)
+    duckdb_memory_limit: str | None = None
+    reader: str = "auto"
+    stream_orders: bool = False
+    one_to_one: bool = False
+    use_cache: bool = True
+    cache_dir: Path | None = None
+    cache_max_mb: int = 500
+    max_per_rep: int | None = None
+    rank_by: str = "amount"
+    full_followup_sheet: bool = False
+    latest_revision: str | None = None
+    memory_budget_mb: int | None = None
+    spill_dir: Path | None = None
+
+    @property
+    def quotes_paths(self) -> list[Path]:
+        return [self.quotes_path, *self.extra_quotes_paths]
+
+    @property
+    def orders_paths(self) -> list[Path]:
+        return [self.orders_path, *self.extra_orders_paths]
 
 
 def load_reps(reps: list[str] | None, reps_config: str | None) -> list[str]:
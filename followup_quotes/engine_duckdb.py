@@ -0,0 +1,420 @@
+from __future__ import annotations
+
+"""DuckDB matching engine.
+
+Same semantics, output frames and counts as `followup_quotes.matching.run_matching`, for exports
+too large to hold in memory. Both exports are streamed chunk by chunk into a temporary
+file-backed DuckDB database (`duckdb_inputs`), keeping only their mapped columns. Cross-file
+dedupe, latest revisions, money parsing, customer keys, order grouping and the nearest-total
+join then run in SQL, where DuckDB spills to its temp directory beyond its memory limit; only
+the follow-ups (every quote with `--debug`) come back into pandas.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from .config import FollowupError, RunConfig
+from .io_excel import cents_to_amount
+from .matching import (
+    MatchResult,
+    _aliases_for,
+    _build_result,
+    _run_meta,
+    _score_quotes,
+    _tolerance_cents,
+    check_revision_order,
+    parse_dates,
+    to_cents,
+)
+from .spill import spill_directory
+
+# Quote fields whose original cells are kept, pickled per chunk, for the output rows.
+_CELL_FIELDS = ("quote_number", "customer", "date_quoted", "entry_person_name")
+# 2048-row vectors per batch of scored quotes fetched back into pandas.
+_FETCH_VECTORS = 64
+
+_SCHEMA = """
+CREATE TABLE quotes_raw (
+    rid BIGINT, chunk INTEGER, source INTEGER, quote_number VARCHAR, rev VARCHAR,
+    customer VARCHAR, amount VARCHAR, allowed BOOLEAN, quote_date TIMESTAMP
+);
+CREATE TABLE quote_cells (chunk INTEGER, cells BLOB);
+CREATE TABLE orders_raw (source INTEGER, customer VARCHAR, net VARCHAR, order_id VARCHAR);
+"""
+
+
+def _re2_chars(chars: Iterator[str]) -> str:
+    return "".join(f"\\x{{{ord(c):x}}}" for c in chars)
+
+
+# Python's str.strip() and str.upper() are Unicode-aware where SQL's are not: trim() only strips
+# spaces, and upper() maps one character to one ("ß" -> "ẞ" where Python gives "SS").
+_WHITESPACE = _re2_chars(c for c in map(chr, range(0x3001)) if c.isspace())
+
+
+def _upper_sql(expr: str) -> str:
+    """SQL for Python's `expr.upper()`: characters whose capital is several letters go first."""
+    for c in map(chr, range(0xFB18)):
+        upper = c.upper()
+        if len(upper) > 1:
+            expr = f"replace({expr}, '{c}', '{upper}')"
+    return f"upper({expr})"
+
+
+def _macros() -> list[str]:
+    return [
+        f"CREATE MACRO py_strip(s) AS regexp_replace(s, '^[{_WHITESPACE}]+|[{_WHITESPACE}]+$', '', 'g')",
+        f"CREATE MACRO py_upper(s) AS {_upper_sql('s')}",
+        # io_excel.normalize_customer: upper-case, then drop everything but letters and digits.
+        "CREATE MACRO customer_text_key(s) AS regexp_replace(py_upper(coalesce(s, '')), '[^\\p{L}\\p{N}]+', '', 'g')",
+        # io_excel.parse_money_cents: `(x)` -> -x, strip `,`/`$`, round half-even to whole cents;
+        # unparseable, non-finite or out-of-range amounts are NULL.
+        "CREATE MACRO money_dollars(s) AS CASE WHEN NOT contains(s, '_') THEN TRY_CAST("
+        "regexp_replace(regexp_replace(py_strip(s), '^\\((.*)\\)$', '-\\1'), '[$,]', '', 'g') AS DOUBLE) END",
+        "CREATE MACRO money_cents(s) AS CASE WHEN abs(round_even(money_dollars(s) * 100, 0)) < 4611686018427387904 "
+        "THEN CAST(round_even(money_dollars(s) * 100, 0) AS BIGINT) END",
+    ]
+
+
+def _check_supported(cfg: RunConfig) -> None:
+    if cfg.window or cfg.order_window_days is not None or cfg.fuzzy or cfg.one_to_one:
+        raise FollowupError(
+            "The duckdb engine does not support --windows, --order-window-days, --fuzzy or --one-to-one; "
+            "use --engine pandas."
+        )
+
+
+def _connect(workdir: Path, cfg: RunConfig):
+    try:
+        import duckdb
+    except ImportError as exc:
+        raise FollowupError("The duckdb engine needs the 'duckdb' package. Install it with: pip install duckdb") from exc
+
+    con = duckdb.connect(str(workdir / "matching.duckdb"))
+    con.execute(f"SET temp_directory = '{(workdir / 'spill').as_posix()}'")
+    if cfg.duckdb_memory_limit:
+        con.execute("SET memory_limit = ?", [cfg.duckdb_memory_limit])
+    return con
+
+
+def _text(values: pd.Series) -> pd.Series:
+    """Cells as ``str(value)``, missing kept missing: the text the pandas helpers parse."""
+    return values.astype("string")
+
+
+@dataclass
+class DuckDBInput:
+    """One export appended chunk by chunk to its table in a run's DuckDB database.
+
+    Mapped columns are stored as text; the quote date and the rep filter are evaluated per
+    chunk with the pandas engine's own helpers. Quote chunks also keep their original output
+    cells, pickled, so follow-ups carry the values read from the export. Rows are numbered in
+    input order (`rows`).
+    """
+
+    con: object
+    kind: str  # "quotes" or "orders"
+    cfg: RunConfig
+    rows: int = 0
+    chunks: int = 0
+
+    def add(self, frame: pd.DataFrame, mapping: dict[str, str], source: int) -> None:
+        if frame.empty:  # a header-only export adds nothing
+            return
+        if self.kind == "quotes":
+            staged = pd.DataFrame(
+                {
+                    "rid": np.arange(self.rows, self.rows + len(frame)),
+                    "chunk": self.chunks,
+                    "source": source,
+                    "quote_number": _text(frame[mapping["quote_number"]]),
+                    "customer": _text(frame[mapping["customer"]]),
+                    "amount": _text(frame[mapping["quote_amount"]]),
+                    "allowed": frame[mapping["entry_person_name"]].isin(self.cfg.reps),
+                    "quote_date": parse_dates(frame[mapping["date_quoted"]]),
+                    **({"rev": _text(frame[mapping["rev"]])} if "rev" in mapping else {}),
+                }
+            )
+            cells = frame[list(dict.fromkeys(mapping[f] for f in _CELL_FIELDS))]
+            cells = cells.set_axis(pd.RangeIndex(self.rows, self.rows + len(frame)))
+            self.con.execute(
+                "INSERT INTO quote_cells VALUES (?, ?)", [self.chunks, pickle.dumps(cells, pickle.HIGHEST_PROTOCOL)]
+            )
+        else:
+            staged = pd.DataFrame(
+                {
+                    "source": source,
+                    "customer": _text(frame[mapping["customer"]]),
+                    "net": _text(frame[mapping["net"]]),
+                    **({"order_id": _text(frame[mapping["order_id"]])} if "order_id" in mapping else {}),
+                }
+            )
+        self.con.register("staged", staged)
+        try:
+            self.con.execute(f"INSERT INTO {self.kind}_raw BY NAME SELECT * FROM staged")
+        finally:
+            self.con.unregister("staged")
+        self.rows += len(frame)
+        self.chunks += 1
+
+
+@contextmanager
+def duckdb_inputs(cfg: RunConfig) -> Iterator[tuple[DuckDBInput, DuckDBInput]]:
+    """Empty quote and order inputs of a temporary DuckDB database, removed on exit.
+
+    The database lives under `cfg.spill_dir` (default: system temp) and is capped by
+    `cfg.duckdb_memory_limit`.
+    """
+    _check_supported(cfg)
+    with spill_directory(cfg) as tmp:
+        con = _connect(Path(tmp), cfg)
+        try:
+            con.execute(_SCHEMA)
+            for macro in _macros():
+                con.execute(macro)
+            yield DuckDBInput(con, "quotes", cfg), DuckDBInput(con, "orders", cfg)
+        finally:
+            con.close()
+
+
+def _load_customer_keys(con, cfg: RunConfig) -> None:
+    """Canonical key per distinct customer cell of both inputs (missing customers included)."""
+    resolved = _aliases_for(cfg).resolved()
+    con.register(
+        "alias_rows",
+        pd.DataFrame({"variant": list(resolved), "canonical": list(resolved.values())}, dtype=object),
+    )
+    con.execute(
+        """
+        CREATE TABLE customer_keys AS
+        SELECT c.customer, coalesce(a.canonical, c.text_key) AS cust_key
+        FROM (
+            SELECT customer, customer_text_key(customer) AS text_key
+            FROM (SELECT customer FROM quotes_raw UNION SELECT customer FROM orders_raw)
+        ) c
+        LEFT JOIN (SELECT CAST(variant AS VARCHAR) AS variant, CAST(canonical AS VARCHAR) AS canonical FROM alias_rows) a
+            ON a.variant = c.text_key
+        """
+    )
+    con.unregister("alias_rows")
+
+
+# Raw customer cell -> canonical key.
+_CUST_KEY_JOIN = "JOIN customer_keys k ON k.customer IS NOT DISTINCT FROM {table}.customer"
+
+# io_excel.latest_copies: a quote number (+ revision) or order id also exported by a later file
+# keeps only that file's rows; rows without an id are always kept.
+_LATEST_COPY = (
+    "{id} IS NULL OR py_strip({id}) = '' OR source = max(source) OVER (PARTITION BY py_strip({id}){extra})"
+)
+
+# matching._revision_rank: numeric revisions by value, the others by length, then text.
+_REV_KEYS = (
+    "coalesce(CASE WHEN NOT isnan(TRY_CAST(rev AS DOUBLE)) THEN TRY_CAST(rev AS DOUBLE) END, '-inf'::DOUBLE) DESC, "
+    "length(py_upper(py_strip(coalesce(rev, '')))) DESC, py_upper(py_strip(coalesce(rev, ''))) DESC"
+)
+_DATE_KEY = "quote_date DESC NULLS LAST"
+
+
+def _load_quotes(con, cfg: RunConfig) -> dict[str, int]:
+    """Create `quotes` from the rows passing every filter; returns the pandas engine's filter counts.
+
+    `pos` is a quote's row in the deduplicated export (the pandas engine's index) and `ord` the
+    order the pandas engine reports quotes in.
+    """
+    counts: dict[str, int] = {}
+    con.execute(
+        f"""
+        CREATE TABLE quotes_kept AS
+        SELECT *, row_number() OVER (ORDER BY rid) - 1 AS pos
+        FROM (
+            SELECT * FROM quotes_raw
+            QUALIFY {_LATEST_COPY.format(id="quote_number", extra=", coalesce(py_strip(rev), 'nan')")}
+        )
+        """
+    )
+    (counts["quotes_read"],) = con.execute("SELECT count(*) FROM quotes_kept").fetchone()
+    source = "quotes_kept"
+    if cfg.latest_revision:
+        # matching.latest_revision_positions: the last row of each quote number by the ordering keys.
+        keys = f"{_REV_KEYS}, {_DATE_KEY}" if cfg.latest_revision == "rev" else f"{_DATE_KEY}, {_REV_KEYS}"
+        con.execute(
+            f"""
+            CREATE TABLE quotes_latest AS
+            SELECT * FROM quotes_kept
+            QUALIFY quote_number IS NULL OR py_strip(quote_number) = ''
+                OR row_number() OVER (PARTITION BY py_strip(quote_number) ORDER BY {keys}, rid DESC) = 1
+            """
+        )
+        (counts["quotes_latest_revision"],) = con.execute("SELECT count(*) FROM quotes_latest").fetchone()
+        source = "quotes_latest"
+
+    params: dict[str, object] = {"floor": to_cents(cfg.floor)}
+    in_range = "TRUE"
+    if cfg.since or cfg.until:
+        # matching._apply_date_range: undated quotes fall out; the rest are reported by date.
+        in_range = "quote_date IS NOT NULL"
+        if cfg.since:
+            in_range += " AND quote_date >= $since"
+            params["since"] = pd.Timestamp(cfg.since).to_pydatetime()
+        if cfg.until:
+            in_range += " AND quote_date < $end"
+            params["end"] = (pd.Timestamp(cfg.until) + pd.Timedelta(days=1)).to_pydatetime()
+    con.execute(
+        f"""
+        CREATE TABLE quote_rows AS
+        SELECT r.rid, r.pos, r.chunk, r.quote_date, k.cust_key, money_cents(r.amount) AS amount, r.allowed,
+               {in_range} AS in_range
+        FROM {source} r {_CUST_KEY_JOIN.format(table="r")}
+        """,
+        {key: value for key, value in params.items() if key != "floor"},
+    )
+    # Same order as matching._prep_quotes followed by the date range.
+    with_amount, over_floor, allowed_reps, in_date_range = con.execute(
+        """
+        SELECT count(amount),
+               count(*) FILTER (WHERE amount > $floor),
+               count(*) FILTER (WHERE amount > $floor AND allowed),
+               count(*) FILTER (WHERE amount > $floor AND allowed AND in_range)
+        FROM quote_rows
+        """,
+        {"floor": params["floor"]},
+    ).fetchone()
+    order = "quote_date, rid" if cfg.since or cfg.until else "rid"
+    con.execute(
+        f"""
+        CREATE TABLE quotes AS
+        SELECT rid, pos, chunk, cust_key, amount, row_number() OVER (ORDER BY {order}) AS ord
+        FROM quote_rows
+        WHERE amount > $floor AND allowed AND in_range
+        """,
+        {"floor": params["floor"]},
+    )
+    counts.update(
+        {
+            "quotes_with_amount": with_amount,
+            "quotes_over_floor": over_floor,
+            "quotes_allowed_reps": allowed_reps,
+            "quotes_in_date_range": in_date_range,
+        }
+    )
+    return counts
+
+
+def _load_order_totals(con) -> dict[str, int]:
+    """Create `order_totals`; returns the counts `OrderTotalsAccumulator` reports."""
+    con.execute(
+        f"""
+        CREATE TABLE order_lines AS
+        SELECT k.cust_key, NULLIF(py_strip(o.order_id), '') AS order_id, money_cents(o.net) AS net
+        FROM orders_raw o {_CUST_KEY_JOIN.format(table="o")}
+        QUALIFY {_LATEST_COPY.format(id="o.order_id", extra="")}
+        """
+    )
+    con.execute(
+        """
+        CREATE TABLE order_totals AS
+        SELECT cust_key, CAST(sum(net) AS BIGINT) AS total
+        FROM order_lines
+        WHERE net IS NOT NULL
+        GROUP BY cust_key, order_id
+        """
+    )
+    orders_read, orders_with_net = con.execute("SELECT count(*), count(net) FROM order_lines").fetchone()
+    (order_totals,) = con.execute("SELECT count(*) FROM order_totals").fetchone()
+    return {"orders_read": orders_read, "orders_with_net": orders_with_net, "order_totals": order_totals}
+
+
+# Closest order total (cents) per quote: one as-of join from below and one from above, ties go to the
+# lower total exactly like pandas.merge_asof(direction="nearest").
+_NEAREST_SQL = """
+SELECT q.rid, q.pos, q.chunk, q.cust_key, q.amount, closest IS NOT NULL AS found, coalesce(closest, 0) AS closest
+FROM (
+    SELECT q.*,
+           CASE
+               WHEN lo.total IS NULL THEN hi.total
+               WHEN hi.total IS NULL THEN lo.total
+               WHEN q.amount - lo.total <= hi.total - q.amount THEN lo.total
+               ELSE hi.total
+           END AS closest
+    FROM quotes q
+    ASOF LEFT JOIN order_totals lo ON q.cust_key = lo.cust_key AND q.amount >= lo.total
+    ASOF LEFT JOIN order_totals hi ON q.cust_key = hi.cust_key AND q.amount <= hi.total
+) q
+ORDER BY q.ord
+"""
+
+
+def _fetch_scored(con, cfg: RunConfig) -> tuple[pd.DataFrame, int]:
+    """Scored quotes in report order, a batch at a time, keeping only the unmatched ones (all with
+    `cfg.debug`); also returns the number matched."""
+    con.execute(_NEAREST_SQL)
+    kept: list[pd.DataFrame] = []
+    matched = 0
+    while True:
+        batch = con.fetch_df_chunk(_FETCH_VECTORS)
+        amounts = batch["amount"].to_numpy(dtype=np.int64)
+        diff = np.abs(batch["closest"].to_numpy(dtype=np.int64) - amounts)
+        hit = batch["found"].to_numpy(dtype=bool) & (diff <= _tolerance_cents(amounts, cfg.tolerance, cfg.relative_tolerance))
+        matched += int(hit.sum())
+        kept.append(batch if cfg.debug else batch[~hit])
+        if batch.empty:
+            break
+    return pd.concat(kept, ignore_index=True), matched
+
+
+def _output_cells(con, rows: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    """Original quote cells of `rows` (by `rid`), read back one stored chunk at a time."""
+    parts = []
+    for chunk, rids in rows.groupby("chunk", sort=True)["rid"]:
+        (blob,) = con.execute("SELECT cells FROM quote_cells WHERE chunk = ?", [int(chunk)]).fetchone()
+        parts.append(pickle.loads(blob).loc[rids.to_numpy()])
+    if not parts:
+        return pd.DataFrame({c: pd.Series(dtype=object) for c in columns})
+    return pd.concat(parts).loc[rows["rid"].to_numpy()]
+
+
+def run_matching_duckdb(
+    quotes: DuckDBInput,
+    orders: DuckDBInput,
+    qmap: dict[str, str],
+    omap: dict[str, str],
+    cfg: RunConfig,
+) -> MatchResult:
+    """Match inputs streamed into `duckdb_inputs`, like `matching.run_matching` on the whole exports."""
+    _check_supported(cfg)
+    if cfg.latest_revision:
+        check_revision_order(qmap, cfg.latest_revision)
+    con = quotes.con
+    _load_customer_keys(con, cfg)
+    counts = _load_quotes(con, cfg)
+    counts.update(_load_order_totals(con))
+    rows, counts["quotes_matched"] = _fetch_scored(con, cfg)
+
+    index = pd.Index(rows["pos"].to_numpy(dtype=np.int64))
+    src = _output_cells(con, rows, list(dict.fromkeys(qmap[f] for f in _CELL_FIELDS))).set_axis(index)
+    amount_cents = pd.Series(rows["amount"].to_numpy(dtype=np.int64), index=index)
+    q = pd.DataFrame(
+        {
+            "Quote": src[qmap["quote_number"]],
+            "Customer": src[qmap["customer"]],
+            "Quote Amount": cents_to_amount(amount_cents),
+            "Date Quoted": src[qmap["date_quoted"]],
+            "Entry Person Name": src[qmap["entry_person_name"]],
+            "CustKey": pd.Series(rows["cust_key"].to_numpy(dtype=object), index=index, dtype=object),
+            "AmountCents": amount_cents,
+            "Won by Follow Up?": False,
+        },
+        index=index,
+    )
+    closest = pd.Series(
+        pd.arrays.IntegerArray(rows["closest"].to_numpy(dtype=np.int64), ~rows["found"].to_numpy(dtype=bool)),
+        index=index,
+    )
+    return _build_result(_score_quotes(q, closest, cfg), qmap, omap, cfg, _run_meta(cfg), counts)
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+"""Run history for trend monitoring.
+
+Every workbook run appends one JSON line (input sizes, row counts after each filter, stage
+durations, peak RSS, follow-ups per rep and the run config) to a local history file, and can
+also refresh a Prometheus node_exporter textfile. `followup_quotes stats` summarizes it.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+import json
+import os
+import sys
+import time
+from typing import Iterator
+
+import pandas as pd
+
+from .config import RunConfig
+
+HISTORY_ENV_VAR = "FOLLOWUP_QUOTES_HISTORY"
+
+
+def default_history_path() -> Path:
+    override = os.environ.get(HISTORY_ENV_VAR)
+    if override:
+        return Path(override)
+    return Path.home() / ".followup_quotes" / "history.jsonl"
+
+
+def _windows_rss_bytes(counter: str) -> int | None:
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    handle = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+        return None
+    return int(getattr(counters, counter))
+
+
+def _proc_status_bytes(key: str) -> int | None:
+    """A ``kB`` line of Linux's /proc/self/status (VmHWM, VmRSS), or None elsewhere."""
+    try:
+        with open("/proc/self/status", encoding="utf-8", errors="replace") as fh:
+            for line in fh:
+                if line.startswith(key + ":"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def peak_rss_bytes() -> int | None:
+    """Peak resident set size of this process so far, or None when the platform can't say."""
+    # Unlike ru_maxrss, VmHWM does not carry over the parent's memory from before exec.
+    peak = _proc_status_bytes("VmHWM")
+    if peak is not None:
+        return peak
+    try:
+        import resource
+    except ImportError:
+        try:
+            return _windows_rss_bytes("PeakWorkingSetSize")
+        except Exception:  # noqa: BLE001
+            return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+def current_rss_bytes() -> int | None:
+    """Resident set size of this process now; the peak where the platform only reports that."""
+    if sys.platform == "win32":
+        try:
+            return _windows_rss_bytes("WorkingSetSize")
+        except Exception:  # noqa: BLE001
+            return None
+    current = _proc_status_bytes("VmRSS")
+    return current if current is not None else peak_rss_bytes()
+
+
+def _file_size(paths: list[Path]) -> int | None:
+    try:
+        return sum(path.stat().st_size for path in paths)
+    except OSError:
+        return None
+
+
+def config_snapshot(cfg: RunConfig) -> dict[str, object]:
+    """JSON-safe view of the settings that affect a run's output."""
+    return {
+        "quotes_path": str(cfg.quotes_path),
+        "orders_path": str(cfg.orders_path),
+        "quotes_paths": [str(p) for p in cfg.quotes_paths],
+        "orders_paths": [str(p) for p in cfg.orders_paths],
+        "out_path": str(cfg.out_path),
+        "template_path": str(cfg.template_path) if cfg.template_path else None,
+        "floor": cfg.floor,
+        "tolerance": cfg.tolerance,
+        "relative_tolerance": cfg.relative_tolerance,
+        "sheet_quotes": cfg.sheet_quotes,
+        "sheet_orders": cfg.sheet_orders,
+        "reps": list(cfg.reps),
+        "debug": cfg.debug,
+        "fuzzy": cfg.fuzzy,
+        "fuzzy_threshold": cfg.fuzzy_threshold,
+        "column_map": {"quotes": cfg.column_map.quotes, "orders": cfg.column_map.orders},
+        "since": cfg.since.isoformat() if cfg.since else None,
+        "until": cfg.until.isoformat() if cfg.until else None,
+        "window": cfg.window,
+        "order_window_days": cfg.order_window_days,
+        "engine": cfg.engine,
+        "reader": cfg.reader,
+        "stream_orders": cfg.stream_orders,
+        "one_to_one": cfg.one_to_one,
+        "max_per_rep": cfg.max_per_rep,
+        "rank_by": cfg.rank_by,
+        "full_followup_sheet": cfg.full_followup_sheet,
+        "latest_revision": cfg.latest_revision,
+        "memory_budget_mb": cfg.memory_budget_mb,
+        "workers": cfg.workers,
+        "aliases": len(cfg.aliases) if cfg.aliases is not None else 0,
+    }
+
+
+@dataclass
+class RunRecorder:
+    """Collects stage timings and counts for one run and appends them to the history."""
+
+    cfg: RunConfig
+    started: float = field(default_factory=time.perf_counter)
+    stages: dict[str, float] = field(default_factory=dict)
+    counts: dict[str, int] = field(default_factory=dict)
+    followups_per_rep: dict[str, int] = field(default_factory=dict)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + round(time.perf_counter() - t0, 4)
+
+    def add_counts(self, counts: dict[str, int]) -> None:
+        for key, value in counts.items():
+            self.counts[key] = self.counts.get(key, 0) + int(value)
+
+    def add_result(self, followups: pd.DataFrame, counts: dict[str, int]) -> None:
+        self.add_counts(counts)
+        per_rep = followups["Entry Person Name"].fillna("Unassigned").astype(str).value_counts()
+        for rep, n in per_rep.items():
+            self.followups_per_rep[rep] = self.followups_per_rep.get(rep, 0) + int(n)
+
+    def record(self) -> dict[str, object]:
+        self.stages["total"] = round(time.perf_counter() - self.started, 4)
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "input_bytes": {"quotes": _file_size(self.cfg.quotes_paths), "orders": _file_size(self.cfg.orders_paths)},
+            "counts": self.counts,
+            "stage_seconds": self.stages,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "followups_per_rep": dict(sorted(self.followups_per_rep.items())),
+            "config": config_snapshot(self.cfg),
+        }
+
+    def finish(self) -> dict[str, object] | None:
+        """Append the record to the history (and Prometheus textfile). Never fails the run."""
+        if not self.cfg.record_history:
+            return None
+        record = self.record()
+        try:
+            append_history(record, self.cfg.history_path or default_history_path())
+            if self.cfg.prometheus_textfile:
+                write_prometheus_textfile(record, self.cfg.prometheus_textfile)
+        except OSError:
+            return None
+        return record
+
+
+def append_history(record: dict[str, object], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps(record, sort_keys=True, default=str) + "\n")
+
+
+def _prom_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def write_prometheus_textfile(record: dict[str, object], path: Path) -> None:
+    """Write the latest run as gauges; replaced atomically so the exporter never reads half a file."""
+    lines = [
+        "# HELP followup_quotes_last_run_timestamp_seconds Unix time of the last run.",
+        "# TYPE followup_quotes_last_run_timestamp_seconds gauge",
+        f"followup_quotes_last_run_timestamp_seconds {datetime.fromisoformat(str(record['timestamp'])).timestamp():.0f}",
+        "# HELP followup_quotes_stage_seconds Duration of each pipeline stage in the last run.",
+        "# TYPE followup_quotes_stage_seconds gauge",
+    ]
+    lines += [f'followup_quotes_stage_seconds{{stage="{_prom_label(k)}"}} {v}' for k, v in record["stage_seconds"].items()]
+    lines += [
+        "# HELP followup_quotes_rows Row counts after each stage of the last run.",
+        "# TYPE followup_quotes_rows gauge",
+    ]
+    lines += [f'followup_quotes_rows{{stage="{_prom_label(k)}"}} {v}' for k, v in record["counts"].items()]
+    lines += [
+        "# HELP followup_quotes_followups Follow-ups per rep in the last run.",
+        "# TYPE followup_quotes_followups gauge",
+    ]
+    lines += [f'followup_quotes_followups{{rep="{_prom_label(k)}"}} {v}' for k, v in record["followups_per_rep"].items()]
+    if record.get("peak_rss_bytes") is not None:
+        lines += [
+            "# HELP followup_quotes_peak_rss_bytes Peak resident memory of the last run.",
+            "# TYPE followup_quotes_peak_rss_bytes gauge",
+            f"followup_quotes_peak_rss_bytes {record['peak_rss_bytes']}",
+        ]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def load_history(path: Path, last: int | None = None) -> list[dict[str, object]]:
+    if not path.exists():
+        return []
+    records = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    if last is not None:
+        records = records[max(len(records) - last, 0):]  # records[-0:] would be every record
+    return records
+
+
+def summarize_history(records: list[dict[str, object]]) -> pd.DataFrame:
+    """One row per run with the headline numbers used to spot trends."""
+    rows = []
+    for rec in records:
+        stages = rec.get("stage_seconds", {})
+        counts = rec.get("counts", {})
+        rss = rec.get("peak_rss_bytes")
+        rows.append(
+            {
+                "timestamp": rec.get("timestamp"),
+                "quotes_read": counts.get("quotes_read"),
+                "orders_read": counts.get("orders_read"),
+                "followups": counts.get("followups"),
+                "read_s": stages.get("read"),
+                "match_s": stages.get("match"),
+                "write_s": stages.get("write"),
+                "total_s": stages.get("total"),
+                "peak_rss_mb": round(rss / 2**20, 1) if rss else None,
+                "engine": rec.get("config", {}).get("engine"),
+            }
+        )
+    return pd.DataFrame(rows)
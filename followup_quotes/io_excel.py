@@ -1,15 +1,22 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from numbers import Number
 from pathlib import Path
+import glob
+import importlib.util
+import os
 import re
-from typing import Iterable
+from typing import Iterable, Iterator
 
+import numpy as np
 from openpyxl import Workbook, load_workbook
 from openpyxl.utils import get_column_letter, range_boundaries
 import pandas as pd
+from pandas.io.parsers import TextParser
 
-from .config import FollowupError
+from .config import ALL_SHEETS, READERS, FollowupError
 
 
 PUNCT_RE = re.compile(r"[\W_]+", flags=re.UNICODE)
@@ -42,18 +49,395 @@ def parse_truthy(value: object) -> bool:
     return token in {"TRUE", "1", "YES", "Y", "T"}
 
 
+_PAREN_NEGATIVE = re.compile(r"^\((.*)\)$")
+# Cents beyond this cannot be held in int64 (and float64 stops being exact long before).
+_MAX_CENTS = 2.0**62
+
+
 def parse_money(value: object) -> float | None:
     if pd.isna(value):
         return None
-    s = str(value).strip().replace(",", "").replace("$", "")
+    s = _PAREN_NEGATIVE.sub(r"-\1", str(value).strip()).replace(",", "").replace("$", "")
     try:
         return float(s)
     except ValueError:
         return None
 
 
-def read_excel(path: Path, sheet_name: str | None = None) -> pd.DataFrame:
-    return pd.read_excel(path, sheet_name=sheet_name or 0, dtype=object)
+def _parse_amount_text(values: pd.Series) -> np.ndarray:
+    text = values.astype("string").str.strip()
+    negative = text.str.startswith("(").fillna(False).to_numpy(dtype=bool)
+    if negative.any():
+        text[negative] = text[negative].str.replace(_PAREN_NEGATIVE, r"-\1", regex=True)
+    text = text.str.replace("$", "", regex=False).str.replace(",", "", regex=False)
+    return pd.to_numeric(text, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def parse_money_cents(values: pd.Series) -> pd.Series:
+    """Parse a money column into nullable ``Int64`` cents in one vectorized pass.
+
+    Accepts numbers and text such as ``$1,234.50`` or ``(75.00)`` (negative); anything else,
+    including non-finite values, becomes ``<NA>``. Amounts are rounded to the nearest cent.
+    Text columns are parsed once per distinct value.
+    """
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        amounts = values.to_numpy(dtype=float, na_value=np.nan)
+    else:
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        parsed = np.append(_parse_amount_text(pd.Series(uniques, dtype=object)), np.nan)
+        amounts = parsed[codes]  # code -1 (missing) indexes the trailing NaN
+    cents = np.rint(amounts * 100)
+    valid = np.isfinite(cents) & (np.abs(cents) < _MAX_CENTS)
+    data = np.where(valid, cents, 0).astype(np.int64)
+    return pd.Series(pd.arrays.IntegerArray(data, ~valid), index=values.index)
+
+
+def cents_to_amount(cents: pd.Series) -> pd.Series:
+    """Int64 cents back to float dollars for output; ``<NA>`` becomes NaN."""
+    return pd.Series(cents.to_numpy(dtype=float, na_value=np.nan) / 100, index=cents.index)
+
+
+def resolve_reader(reader: str = "auto") -> str:
+    """pandas engine name for `reader`; "auto" picks calamine when python-calamine is importable."""
+    if reader not in READERS:
+        raise FollowupError(f"Unknown reader '{reader}'. Choose one of: {', '.join(READERS)}.")
+    has_calamine = importlib.util.find_spec("python_calamine") is not None
+    if reader == "calamine" and not has_calamine:
+        raise FollowupError("The calamine reader needs the 'python-calamine' package. Install it with: pip install python-calamine")
+    if reader == "auto":
+        return "calamine" if has_calamine else "openpyxl"
+    return reader
+
+
+def _read_workbook(path: Path, sheet_name: str | int | None, reader: str, header: int = 0):
+    engine = resolve_reader(reader)
+    try:
+        return pd.read_excel(path, sheet_name=sheet_name, header=header, dtype=object, engine=engine)
+    except OSError:
+        raise
+    except Exception:
+        # calamine rejects a few workbooks openpyxl tolerates (e.g. odd styles); only retry when
+        # the engine was picked automatically.
+        if reader != "auto" or engine == "openpyxl":
+            raise
+        return pd.read_excel(path, sheet_name=sheet_name, header=header, dtype=object, engine="openpyxl")
+
+
+def read_excel(path: Path, sheet_name: str | None = None, reader: str = "auto", header: int = 0) -> pd.DataFrame:
+    return _read_workbook(path, sheet_name or 0, reader, header)
+
+
+HEADER_PEEK_ROWS = 40
+
+
+@dataclass(frozen=True)
+class HeaderSpec:
+    """Fields a header row should contain; used to find the sheet and row holding the data."""
+
+    synonyms: dict[str, list[str]]
+    required_fields: frozenset[str]
+
+
+@dataclass
+class SheetLayout:
+    sheet_name: str
+    header_row: int  # 0-based, as pandas' ``header=``
+    required_matched: int
+    fields_matched: int
+
+
+def _score_header_row(cells: Iterable[object], spec: HeaderSpec) -> tuple[int, int]:
+    headers = [str(v).strip() for v in cells if v is not None and str(v).strip()]
+    if not headers:
+        return 0, 0
+    found = {f for f, syns in spec.synonyms.items() if _find_header(headers, syns)}
+    return len(found & spec.required_fields), len(found)
+
+
+def _best_header_row(ws, spec: HeaderSpec, peek_rows: int) -> SheetLayout:
+    best = SheetLayout(ws.title, 0, 0, 0)
+    for idx, row in enumerate(ws.iter_rows(max_row=peek_rows, values_only=True)):
+        required, fields = _score_header_row(row, spec)
+        if (required, fields) > (best.required_matched, best.fields_matched):
+            best = SheetLayout(ws.title, idx, required, fields)
+    return best
+
+
+def _locate_in_workbook(wb, sheet_name: str | None, spec: HeaderSpec, peek_rows: int) -> list[SheetLayout]:
+    if sheet_name not in (None, ALL_SHEETS):
+        if sheet_name not in wb.sheetnames:
+            raise FollowupError(f"Worksheet named '{sheet_name}' not found")
+        return [_best_header_row(wb[sheet_name], spec, peek_rows)]
+
+    layouts = [_best_header_row(ws, spec, peek_rows) for ws in wb.worksheets]
+    complete = [layout for layout in layouts if layout.required_matched == len(spec.required_fields)]
+    if sheet_name == ALL_SHEETS:
+        return complete or layouts[:1]
+    if complete:
+        return complete[:1]
+    # Nothing has every required column: keep the closest candidate so detect_columns can say what is missing.
+    return [max(layouts, key=lambda layout: (layout.required_matched, layout.fields_matched))]
+
+
+def locate_header(
+    path: Path, spec: HeaderSpec, sheet_name: str | None = None, peek_rows: int = HEADER_PEEK_ROWS
+) -> list[SheetLayout]:
+    """Find the sheet(s) and header row by streaming only the first `peek_rows` rows of each sheet.
+
+    Each row is scored by how many required (then optional) fields its cells name. Without
+    `sheet_name` the first sheet with every required field wins; with a name only that sheet's
+    header row is searched; "*" keeps every sheet that has all required fields. Ties go to the
+    earlier sheet and row, so a plain export still reads from row 1 of its first sheet.
+    """
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        return _locate_in_workbook(wb, sheet_name, spec, peek_rows)
+    finally:
+        wb.close()
+
+
+def expand_input_paths(patterns: Iterable[str]) -> list[Path]:
+    """Expand paths and globs (`exports/Order Log*.xlsx`) in order, each glob sorted by name."""
+    paths: list[Path] = []
+    for pattern in patterns:
+        if any(ch in pattern for ch in "*?["):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise FollowupError(f"No files match {pattern}")
+            paths.extend(Path(m) for m in matches)
+        else:
+            paths.append(Path(pattern))
+    seen: set[Path] = set()
+    return [p for p in paths if not (p in seen or seen.add(p))]
+
+
+def _layout_label(path: Path, layout: SheetLayout, sheet_name: str | None) -> str:
+    label = path.name if sheet_name != ALL_SHEETS else f"{path.name}[{layout.sheet_name}]"
+    if sheet_name is None and layout.header_row == 0:
+        return label
+    return f"{label} ({layout.sheet_name}, header row {layout.header_row + 1})"
+
+
+def _read_part(
+    path: Path, sheet_name: str | None, reader: str = "auto", header: HeaderSpec | None = None
+) -> list[tuple[str, pd.DataFrame]]:
+    if header is not None:
+        parts = []
+        for layout in locate_header(path, header, sheet_name):
+            df = _read_workbook(path, layout.sheet_name, reader, layout.header_row)
+            if sheet_name != ALL_SHEETS or not df.empty:
+                parts.append((_layout_label(path, layout, sheet_name), df))
+        return parts
+    if sheet_name == ALL_SHEETS:
+        frames = _read_workbook(path, None, reader)
+        return [(f"{path.name}[{name}]", df) for name, df in frames.items() if not df.empty]
+    return [(path.name, read_excel(path, sheet_name, reader))]
+
+
+def read_excel_parts(
+    paths: list[Path], sheet_name: str | None = None, reader: str = "auto", header: HeaderSpec | None = None
+) -> list[tuple[str, pd.DataFrame]]:
+    """Read every file (every sheet when `sheet_name` is "*"), in parallel processes when several.
+
+    With `header`, each file's sheet and header row are located first (see `locate_header`).
+    Returns ``(label, frame)`` pairs in input order.
+    """
+    if len(paths) == 1:
+        return _read_part(paths[0], sheet_name, reader, header)
+    workers = min(len(paths), os.cpu_count() or 1)
+    n = len(paths)
+    if workers == 1:
+        results = [_read_part(p, sheet_name, reader, header) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_read_part, paths, [sheet_name] * n, [reader] * n, [header] * n))
+    return [part for parts in results for part in parts]
+
+
+DEFAULT_CHUNK_ROWS = 50_000
+
+
+def _excel_cell(value: object) -> object:
+    # Same cell conversion pandas' openpyxl reader applies before parsing.
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+# Approximate memory of one parsed cell besides its text (object header plus list slot).
+_CELL_BYTES = 64
+
+
+def _row_bytes(cells: list[object]) -> int:
+    return _CELL_BYTES * len(cells) + sum(len(v) for v in cells if isinstance(v, str))
+
+
+def iter_excel_chunks(
+    path: Path,
+    sheet_name: str | None = None,
+    chunk_rows: int | None = None,
+    header: HeaderSpec | None = None,
+    chunk_bytes: int | None = None,
+) -> Iterator[tuple[str, pd.DataFrame]]:
+    """Yield ``(label, frame)`` chunks of at most `chunk_rows` rows without loading whole sheets.
+
+    Uses openpyxl's read-only streaming mode; every chunk carries the sheet's header and is
+    parsed exactly like `read_excel` (``dtype=object``, default NA strings, duplicate headers
+    renamed), so chunks can be concatenated to the same frame. `sheet_name` "*" streams every
+    sheet in order. With `header`, sheets and header rows are located like `read_excel_parts`.
+    With `chunk_bytes`, a chunk also ends once its cells take roughly that much memory. A sheet
+    with a header but no data rows yields one empty chunk, so its columns can still be detected.
+    """
+    chunk_rows = chunk_rows or DEFAULT_CHUNK_ROWS
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if header is not None:
+            sheets = [
+                (_layout_label(path, layout, sheet_name), wb[layout.sheet_name], layout.header_row)
+                for layout in _locate_in_workbook(wb, sheet_name, header, HEADER_PEEK_ROWS)
+            ]
+        elif sheet_name == ALL_SHEETS:
+            sheets = [(f"{path.name}[{ws.title}]", ws, 0) for ws in wb.worksheets]
+        elif sheet_name:
+            if sheet_name not in wb.sheetnames:
+                raise FollowupError(f"Worksheet named '{sheet_name}' not found in {path.name}")
+            sheets = [(path.name, wb[sheet_name], 0)]
+        else:
+            sheets = [(path.name, wb.worksheets[0], 0)]
+
+        for label, ws, header_row in sheets:
+            rows = ws.iter_rows(min_row=header_row + 1, values_only=True)
+            columns = next(rows, None)
+            if columns is None:
+                continue
+            columns = [_excel_cell(v) for v in columns]
+            width = len(columns)
+            batch: list[list[object]] = []
+            size = 0
+            chunks = 0
+            for row in rows:
+                cells = [_excel_cell(v) for v in row[:width]]
+                batch.append(cells + [""] * (width - len(cells)))
+                if chunk_bytes is not None:
+                    size += _row_bytes(cells)
+                if len(batch) >= chunk_rows or (chunk_bytes is not None and size >= chunk_bytes):
+                    yield label, TextParser([columns, *batch], header=0, dtype=object).read()
+                    batch, size = [], 0
+                    chunks += 1
+            if batch or not chunks:
+                yield label, TextParser([columns, *batch], header=0, dtype=object).read()
+    finally:
+        wb.close()
+
+
+def align_detection(first_label: str, first: DetectionResult, label: str, det: DetectionResult) -> dict[str, str]:
+    """Column renames that put `det`'s headers under `first`'s names; both must map the same fields."""
+    if set(det.mapping) != set(first.mapping):
+        raise FollowupError(
+            f"Inconsistent columns across input files: {first_label} maps {sorted(first.mapping)} "
+            f"but {label} maps {sorted(det.mapping)}. Use --column-map to align them."
+        )
+    return {det.mapping[f]: first.mapping[f] for f in det.mapping if det.mapping[f] != first.mapping[f]}
+
+
+def _dedupe_key(df: pd.DataFrame, columns: list[str]) -> pd.Series:
+    keys = df[columns].astype(str).apply(lambda col: col.str.strip())
+    return keys.agg("\x1f".join, axis=1) if len(columns) > 1 else keys.iloc[:, 0]
+
+
+def latest_copies(df: pd.DataFrame, sources: pd.Series, key_columns: list[str]) -> pd.Series:
+    """Rows to keep when a record whose `key_columns` also appear in a later source is dropped.
+
+    `sources` numbers the input file of every row. Rows without a quote number / order id (the
+    first key column) are never treated as duplicates.
+    """
+    ids = df[key_columns[0]]
+    blank = ids.isna() | ids.astype(str).str.strip().eq("")
+    keys = _dedupe_key(df, key_columns).where(~blank)
+    latest = sources.groupby(keys).transform("max")
+    return blank | (sources == latest)
+
+
+def combine_parts(
+    parts: list[tuple[str, pd.DataFrame]],
+    synonyms: dict[str, list[str]],
+    required_fields: set[str],
+    dedupe_fields: list[str],
+    overrides: dict[str, str] | None = None,
+    contains_rules: dict[str, str] | None = None,
+) -> tuple[pd.DataFrame, DetectionResult]:
+    """Detect columns per part, align them to the first part's headers and concatenate.
+
+    Every part must map the same set of fields. Records whose `dedupe_fields` key also appears in
+    a later part are dropped, so overlapping exports keep the newest file's copy; rows within a
+    single part are never deduplicated (an order spans several lines).
+    """
+    detections = [
+        detect_columns(df, synonyms, required_fields, overrides=overrides, contains_rules=contains_rules)
+        for _, df in parts
+    ]
+    first = detections[0]
+    if len(parts) == 1:
+        return parts[0][1], first
+
+    aligned = [
+        df.rename(columns=align_detection(parts[0][0], first, label, det)) for (label, df), det in zip(parts, detections)
+    ]
+
+    combined = pd.concat(aligned, ignore_index=True)
+    key_columns = [first.mapping[f] for f in dedupe_fields if f in first.mapping]
+    if key_columns:
+        sources = pd.Series(np.repeat(np.arange(len(aligned)), [len(df) for df in aligned]), index=combined.index)
+        combined = combined[latest_copies(combined, sources, key_columns)].reset_index(drop=True)
+    notes = first.notes + [f"combined {len(parts)} inputs: " + ", ".join(label for label, _ in parts)]
+    return combined, DetectionResult(mapping=first.mapping, notes=notes)
+
+
+def _read_output_rows(ws, key_column: str, scan_rows: int) -> pd.DataFrame | None:
+    rows = ws.iter_rows(values_only=True)
+    key = normalize_header(key_column)
+    header: list[object] | None = None
+    for _, row in zip(range(scan_rows), rows):
+        if any(normalize_header(v) == key for v in row):
+            header = list(row)
+            break
+    if header is None:
+        return None
+
+    positions = [(i, str(h)) for i, h in enumerate(header) if h is not None and str(h).strip()]
+    key_pos = next(i for i, h in positions if normalize_header(h) == key)
+    records = []
+    for row in rows:
+        if key_pos >= len(row) or row[key_pos] is None:
+            if not any(v is not None for v in row):
+                break
+            continue
+        records.append([row[i] if i < len(row) else None for i, _ in positions])
+    return pd.DataFrame(records, columns=[h for _, h in positions], dtype=object)
+
+
+def read_output_sheets(
+    path: Path, sheet_names: Iterable[str], key_column: str, scan_rows: int = 80
+) -> dict[str, pd.DataFrame | None]:
+    """Read previously written output sheets (header may sit below template rows).
+
+    A sheet maps to None when the workbook has no such sheet or no `key_column` header.
+    """
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        return {
+            name: _read_output_rows(wb[name], key_column, scan_rows) if name in wb.sheetnames else None
+            for name in sheet_names
+        }
+    finally:
+        wb.close()
+
+
+def read_output_sheet(path: Path, sheet_name: str, key_column: str, scan_rows: int = 80) -> pd.DataFrame | None:
+    """Like `read_output_sheets` for a single sheet."""
+    return read_output_sheets(path, [sheet_name], key_column, scan_rows)[sheet_name]
 
 
 def _find_header(headers: list[str], synonyms: Iterable[str], contains: str | None = None) -> str | None:
@@ -115,6 +499,8 @@ def detect_columns(
 
 
 def safe_excel_value(value: object) -> object:
+    if value is pd.NaT or (isinstance(value, float) and value != value):
+        return None
     if isinstance(value, str) and value[:1] in {"=", "+", "-", "@"}:
         return "'" + value
     return value
@@ -159,73 +545,136 @@ def _find_matching_table(sheet, cols: list[str]):
     return None
 
 
-def _write_to_existing_table(sheet, df: pd.DataFrame, table, header_row: int, positions: dict[str, int]) -> None:
-    min_col, _, max_col, max_row = range_boundaries(table.ref)
-    data_start = header_row + 1
+def same_cell_value(stored: object, value: object) -> bool:
+    """Whether writing `value` over `stored` would leave the cell as it is.
+
+    Numbers compare by value (Excel reads a whole-number amount back as int), booleans and
+    everything else by value and type.
+    """
+    numbers = [isinstance(v, Number) and not isinstance(v, bool) for v in (stored, value)]
+    if all(numbers):
+        return stored == value
+    return stored == value and type(stored) is type(value)
+
+
+def _set_cell_value(sheet, row: int, column: int, value: object) -> bool:
+    """Assign only when the stored value differs, so unchanged rows are left untouched."""
+    cell = sheet.cell(row=row, column=column)
+    if same_cell_value(cell.value, value):
+        return False
+    cell.value = value
+    return True
 
-    for r in range(data_start, max_row + 1):
-        for c in range(min_col, max_col + 1):
-            sheet.cell(row=r, column=c).value = None
 
+def _sync_rows(sheet, df: pd.DataFrame, data_start: int, positions: dict[str, int], old_last_row: int) -> int:
+    """Write `df` below the header and blank any leftover old rows; returns rows that changed."""
+    changed = 0
+    cols = [str(c) for c in df.columns]
     for ridx, row in enumerate(df.itertuples(index=False, name=None), start=data_start):
-        for col, value in zip(df.columns, row):
-            sheet.cell(row=ridx, column=positions[str(col)]).value = safe_excel_value(value)
+        row_changed = False
+        for col, value in zip(cols, row):
+            row_changed |= _set_cell_value(sheet, ridx, positions[col], safe_excel_value(value))
+        changed += row_changed
 
-    new_last_row = data_start + max(len(df), 1) - 1
-    if len(df) == 0:
-        for c in range(min_col, max_col + 1):
-            sheet.cell(row=data_start, column=c).value = None
+    for r in range(data_start + len(df), old_last_row + 1):
+        row_changed = False
+        for cidx in positions.values():
+            row_changed |= _set_cell_value(sheet, r, cidx, None)
+        changed += row_changed
+    return changed
 
+
+def _write_to_existing_table(sheet, df: pd.DataFrame, table, header_row: int, positions: dict[str, int]) -> int:
+    min_col, _, max_col, max_row = range_boundaries(table.ref)
+    data_start = header_row + 1
+
+    # Table columns that are not part of `df` are blanked, as before.
+    used = set(positions.values())
+    table_positions = {str(c): positions[str(c)] for c in df.columns}
+    table_positions.update({f"__blank_{c}": c for c in range(min_col, max_col + 1) if c not in used})
+    padded = df.set_axis([str(c) for c in df.columns], axis=1).reindex(columns=list(table_positions))
+    changed = _sync_rows(sheet, padded, data_start, table_positions, max_row)
+
+    new_last_row = data_start + max(len(df), 1) - 1
     table.ref = f"{get_column_letter(min_col)}{header_row}:{get_column_letter(max_col)}{new_last_row}"
+    return changed
 
 
-def _write_dataframe_to_sheet(sheet, df: pd.DataFrame) -> None:
+def _write_dataframe_to_sheet(sheet, df: pd.DataFrame) -> int:
     cols = [str(c) for c in df.columns]
     table_match = _find_matching_table(sheet, cols)
     if table_match is not None:
         table, header_row, positions = table_match
-        _write_to_existing_table(sheet, df, table, header_row, positions)
-        return
+        return _write_to_existing_table(sheet, df, table, header_row, positions)
 
     header_row, existing_positions = _find_header_row_and_columns(sheet, cols)
 
     positions = existing_positions.copy()
-    next_col = (max(existing_positions.values()) + 1) if existing_positions else 1
+    # New columns go after the header row's last label so template-only columns keep theirs.
+    labelled = (
+        [c for c in range(1, sheet.max_column + 1) if sheet.cell(row=header_row, column=c).value is not None]
+        if existing_positions
+        else []
+    )
+    next_col = max([*existing_positions.values(), *labelled], default=0) + 1
     for col in cols:
         if col not in positions:
             positions[col] = next_col
             next_col += 1
 
-    data_start = header_row + 1
-
+    old_last_row = sheet.max_row
     for col in cols:
-        cidx = positions[col]
-        sheet.cell(row=header_row, column=cidx).value = col
-        for r in range(data_start, sheet.max_row + 1):
-            sheet.cell(row=r, column=cidx).value = None
+        _set_cell_value(sheet, header_row, positions[col], col)
+    return _sync_rows(sheet, df.set_axis(cols, axis=1), header_row + 1, positions, old_last_row)
 
-    for row_offset, row in enumerate(df.itertuples(index=False, name=None), start=0):
-        ridx = data_start + row_offset
-        for col, value in zip(cols, row):
-            cidx = positions[col]
-            sheet.cell(row=ridx, column=cidx).value = safe_excel_value(value)
 
+def _write_new_workbook(path: Path, sheets: dict[str, pd.DataFrame]) -> dict[str, int]:
+    """Stream `sheets` row by row into a write-only workbook instead of building every cell."""
+    wb = Workbook(write_only=True)
+    changed: dict[str, int] = {}
+    for sheet_name, df in sheets.items():
+        ws = wb.create_sheet(title=sheet_name)
+        ws.append([str(c) for c in df.columns])
+        rows = 0
+        for row in df.itertuples(index=False, name=None):
+            values = [safe_excel_value(v) for v in row]
+            ws.append(values)
+            rows += any(v is not None for v in values)
+        changed[sheet_name] = rows
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(path)
+    return changed
 
-def write_output(path: Path, sheets: dict[str, pd.DataFrame], template_path: Path | None = None) -> None:
-    if template_path:
-        wb = load_workbook(template_path, keep_links=False)
-        wb._external_links = []
-    else:
-        wb = Workbook()
-        default = wb.active
-        wb.remove(default)
 
+def write_output(path: Path, sheets: dict[str, pd.DataFrame], template_path: Path | None = None) -> dict[str, int]:
+    """Write `sheets` into a copy of `template_path` (or a new workbook) at `path`.
+
+    Returns the number of data rows that actually changed per sheet. Cells whose value is
+    already correct keep their existing cell, but every output sheet is still serialized.
+    Templates are patched at the zip level (see `xlsx_patch`), so their other sheets, charts and
+    styles are copied as-is; templates that writer cannot handle are loaded with openpyxl.
+    Without a template rows are streamed into a write-only workbook.
+    """
+    if not template_path:
+        return _write_new_workbook(path, sheets)
+
+    from .xlsx_patch import TemplateNotPatchable, patch_template
+
+    try:
+        return patch_template(path, sheets, template_path)
+    except TemplateNotPatchable:
+        pass
+    wb = load_workbook(template_path, keep_links=False)
+    wb._external_links = []
+
+    changed: dict[str, int] = {}
     for sheet_name, df in sheets.items():
         if sheet_name in wb.sheetnames:
             ws = wb[sheet_name]
         else:
             ws = wb.create_sheet(title=sheet_name)
-        _write_dataframe_to_sheet(ws, df)
+        changed[sheet_name] = _write_dataframe_to_sheet(ws, df)
 
     path.parent.mkdir(parents=True, exist_ok=True)
     wb.save(path)
+    return changed
@@ -1,13 +1,22 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import timedelta
+import heapq
+import itertools
 
+import numpy as np
 import pandas as pd
 
-from .config import RunConfig
-from .io_excel import normalize_customer, parse_money
+from .config import RANK_BY, REVISION_ORDERS, WINDOW_FREQUENCIES, FollowupError, RunConfig
+from .aliases import CustomerAliases
+from .io_excel import cents_to_amount, parse_money_cents
 
 OUTPUT_COLUMNS = ["Quote", "Customer", "Quote Amount", "Date Quoted", "Entry Person Name", "Won by Follow Up?"]
+# Counts that describe one window of a `--windows` run; every other count describes the
+# shared prep and is repeated in each window's result.
+WINDOW_COUNTS = ("quotes_in_date_range", "quotes_matched", "followups", "followups_selected")
 
 
 @dataclass
@@ -15,6 +24,9 @@ class MatchResult:
     followups: pd.DataFrame
     meta: pd.DataFrame
     debug: pd.DataFrame | None
+    counts: dict[str, int] = field(default_factory=dict)
+    # Rows for the per-rep tabs when they differ from `followups` (--max-per-rep with the full list kept).
+    rep_followups: pd.DataFrame | None = None
 
 
 def _normalize_order_id(value: object) -> str | None:
@@ -24,98 +36,834 @@ def _normalize_order_id(value: object) -> str | None:
     return token or None
 
 
-def _money_match(order_total: float, quote_amount: float, cfg: RunConfig) -> bool:
-    diff = abs(order_total - quote_amount)
-    if diff <= 0.005:
-        return True
-    relative_limit = abs(quote_amount) * cfg.relative_tolerance
-    effective_tolerance = max(cfg.tolerance, relative_limit)
-    return diff <= effective_tolerance
+DEBUG_COLUMNS = [
+    "Quote",
+    "Customer",
+    "Quote Amount",
+    "Date Quoted",
+    "Entry Person Name",
+    "Closest Order Total",
+    "Abs Difference",
+    "Rel Difference",
+    "Effective Tolerance",
+    "Matched",
+]
 
 
-def _prep_quotes(quotes: pd.DataFrame, qmap: dict[str, str], cfg: RunConfig) -> pd.DataFrame:
-    q = quotes.copy()
+def to_cents(amount: float) -> int:
+    """A configured dollar amount (floor, tolerance) as whole cents."""
+    return int(round(amount * 100))
+
+
+def _tolerance_cents(amount_cents: np.ndarray, tolerance: float, relative_tolerance: float) -> np.ndarray:
+    """Largest allowed |order total - quote| in cents per quote: max(absolute, relative).
+
+    Differences are whole cents, so the relative limit is floored (after rounding away float
+    noise such as 0.29 * 100 = 28.999...) and an exact match is simply a difference of 0.
+    """
+    relative = np.floor(np.round(np.abs(amount_cents) * relative_tolerance, 6)).astype(np.int64)
+    return np.maximum(relative, max(to_cents(tolerance), 0))
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Parse a raw date column into datetime64 once; unparseable cells become NaT."""
+    return pd.to_datetime(values, errors="coerce", format="mixed")
+
+
+def _revision_rank(rev: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Sort keys for revision labels: numeric revisions by value, others (A, B, ..., AA) by length then text."""
+    number = pd.to_numeric(rev, errors="coerce").to_numpy(dtype=float)
+    text = rev.where(rev.notna(), "").astype(str).str.strip().str.upper()
+    padded = text.str.rjust(int(text.str.len().max()) if len(text) else 0)
+    text_rank = pd.factorize(padded, sort=True)[0]
+    return np.nan_to_num(number, nan=-np.inf), np.where(text.eq("").to_numpy(), -1, text_rank)
+
+
+def check_revision_order(qmap: dict[str, str], by: str) -> None:
+    if by not in REVISION_ORDERS:
+        raise FollowupError(f"Unknown revision order {by!r}; choose one of: {', '.join(REVISION_ORDERS)}")
+    if by == "rev" and "rev" not in qmap:
+        raise FollowupError("--latest-revision rev needs a revision column (e.g. 'Rev') in the Quote Summary.")
+
+
+def latest_revision_positions(quotes: pd.DataFrame, qmap: dict[str, str], by: str) -> np.ndarray:
+    """Row positions of the latest revision of each quote number, in input order.
+
+    `by` is "rev" (revision column, then quote date) or "date" (quote date, then revision);
+    remaining ties keep the last row. Rows without a quote number are all kept.
+    """
+    check_revision_order(qmap, by)
+    if quotes.empty:
+        return np.empty(0, dtype=np.int64)
+    ids = quotes[qmap["quote_number"]]
+    text = ids.astype(str).str.strip()
+    blank = (ids.isna() | text.eq("")).to_numpy()
+    codes = pd.factorize(text)[0]
+    dates = parse_dates(quotes[qmap["date_quoted"]]).to_numpy(dtype="datetime64[ns]").view(np.int64)
+    rev_keys = list(_revision_rank(quotes[qmap["rev"]])) if "rev" in qmap else []
+    ordering = [*rev_keys, dates] if by == "rev" else [dates, *rev_keys]
+    # np.lexsort sorts by the last key first: quote number, then the ordering keys, then position.
+    order = np.lexsort([np.arange(len(quotes)), *reversed(ordering), codes])
+    sorted_codes = codes[order]
+    last = order[np.append(sorted_codes[1:] != sorted_codes[:-1], True)]
+    return np.sort(np.concatenate([last[~blank[last]], np.flatnonzero(blank)]))
+
+
+def _aliases_for(cfg: RunConfig) -> CustomerAliases:
+    return cfg.aliases if cfg.aliases is not None else CustomerAliases()
+
+
+def _prep_quotes(
+    quotes: pd.DataFrame, qmap: dict[str, str], cfg: RunConfig, counts: dict[str, int] | None = None
+) -> pd.DataFrame:
+    counts = counts if counts is not None else {}
+    counts["quotes_read"] = len(quotes)
+    if cfg.latest_revision:
+        # Superseded revisions are dropped from the raw rows, before any column is normalized.
+        q = quotes.iloc[latest_revision_positions(quotes, qmap, cfg.latest_revision)].copy()
+        counts["quotes_latest_revision"] = len(q)
+    else:
+        q = quotes.copy()
     q["Quote"] = q[qmap["quote_number"]]
     q["Customer"] = q[qmap["customer"]]
-    q["Quote Amount"] = q[qmap["quote_amount"]].map(parse_money)
+    q["AmountCents"] = parse_money_cents(q[qmap["quote_amount"]])
     q["Date Quoted"] = q[qmap["date_quoted"]]
+    q["QuoteDate"] = parse_dates(q["Date Quoted"])
     q["Entry Person Name"] = q[qmap["entry_person_name"]]
-    q["CustKey"] = q["Customer"].map(normalize_customer)
+    q["CustKey"] = _aliases_for(cfg).canonicalize(q["Customer"])
     q["Won by Follow Up?"] = False
 
-    q = q[q["Quote Amount"].notna()]
-    q = q[q["Quote Amount"] > cfg.floor]
+    q = q[q["AmountCents"].notna()]
+    counts["quotes_with_amount"] = len(q)
+    q = q[q["AmountCents"] > to_cents(cfg.floor)]
+    q["AmountCents"] = q["AmountCents"].astype(np.int64)
+    q["Quote Amount"] = cents_to_amount(q["AmountCents"])
+    counts["quotes_over_floor"] = len(q)
     q = q[q["Entry Person Name"].isin(cfg.reps)]
+    counts["quotes_allowed_reps"] = len(q)
     return q
 
 
-def _prep_order_totals(orders: pd.DataFrame, omap: dict[str, str]) -> pd.DataFrame:
-    o = orders.copy()
-    o["Customer"] = o[omap["customer"]]
-    o["CustKey"] = o["Customer"].map(normalize_customer)
-    o["Net"] = o[omap["net"]].map(parse_money)
-    o = o[o["Net"].notna()]
+# Partial totals are re-folded once they outgrow the last compacted size (and this floor), so
+# the accumulator stays proportional to the number of distinct orders.
+_COMPACT_MIN_ROWS = 100_000
+
+
+@dataclass
+class OrderTotalsAccumulator:
+    """Folds Order Log line chunks into per-(customer, order) totals without keeping the lines.
+
+    `add` accepts any number of chunks (e.g. from `io_excel.iter_excel_chunks`); memory is
+    bounded by one chunk plus the distinct orders seen so far. With an order id column, an id
+    that appears in several `source`s (input files) keeps only the latest source's lines, like
+    `io_excel.combine_parts`. `totals()` has `CustKey`, `OrderTotalCents` (and `OrderDate`,
+    `OrderId` when used).
+    """
+
+    omap: dict[str, str]
+    by_date: bool = False
+    aliases: CustomerAliases | None = None
+    counts: dict[str, int] = field(default_factory=dict)
+    _partials: list[pd.DataFrame] = field(default_factory=list, repr=False)
+    _pending_rows: int = field(default=0, repr=False)
+    _compacted_rows: int = field(default=0, repr=False)
+
+    def _count(self, key: str, n: int) -> None:
+        self.counts[key] = self.counts.get(key, 0) + n
 
-    if "order_id" not in omap:
-        totals = o.groupby(["CustKey"], dropna=False).agg(OrderTotal=("Net", "sum")).reset_index()
+    def _keys(self) -> list[str]:
+        if "order_id" in self.omap:
+            return ["CustKey", "OrderId", "Source"]
+        return ["CustKey", "OrderDate"] if self.by_date else ["CustKey"]
+
+    def _fold(self, frame: pd.DataFrame, sort: bool) -> pd.DataFrame:
+        aggs = {"OrderTotalCents": ("OrderTotalCents", "sum")}
+        if self.by_date and "order_id" in self.omap:
+            aggs["OrderDate"] = ("OrderDate", "min")
+        return frame.groupby(self._keys(), dropna=False, sort=sort).agg(**aggs).reset_index()
+
+    def add(self, orders: pd.DataFrame, source: int = 0) -> None:
+        omap = self.omap
+        o = pd.DataFrame(
+            {
+                "CustKey": (self.aliases or CustomerAliases()).canonicalize(orders[omap["customer"]]),
+                "OrderTotalCents": parse_money_cents(orders[omap["net"]]),
+            }
+        )
+        self._count("orders_read", len(o))
+        o = o[o["OrderTotalCents"].notna()]
+        o["OrderTotalCents"] = o["OrderTotalCents"].astype(np.int64)
+        self._count("orders_with_net", len(o))
+
+        if self.by_date:
+            o["OrderDate"] = parse_dates(orders.loc[o.index, omap["order_date"]])
+            o = o[o["OrderDate"].notna()]
+            self._count("orders_dated", len(o))
+        if "order_id" in omap:
+            o["OrderId"] = orders.loc[o.index, omap["order_id"]].map(_normalize_order_id)
+            o["Source"] = source
+
+        partial = self._fold(o, sort=False)
+        self._partials.append(partial)
+        self._pending_rows += len(partial)
+        if self._pending_rows > max(self._compacted_rows, _COMPACT_MIN_ROWS):
+            self._compact()
+
+    def _compact(self) -> None:
+        folded = self._fold(pd.concat(self._partials, ignore_index=True), sort=False)
+        self._partials = [folded]
+        self._compacted_rows = self._pending_rows = len(folded)
+
+    def totals(self) -> pd.DataFrame:
+        columns = ["CustKey", "OrderTotalCents"] + (["OrderDate"] if self.by_date else [])
+        columns += ["OrderId"] if "order_id" in self.omap else []
+        if not self._partials:
+            self.counts["order_totals"] = 0
+            dtypes = {"CustKey": object, "OrderTotalCents": np.int64, "OrderDate": "datetime64[ns]", "OrderId": object}
+            return pd.DataFrame({c: pd.Series(dtype=dtypes[c]) for c in columns})
+        totals = self._fold(pd.concat(self._partials, ignore_index=True), sort=True)
+        if "order_id" in self.omap and totals["Source"].nunique() > 1:
+            has_id = totals["OrderId"].notna()
+            latest = totals.loc[has_id].groupby("OrderId")["Source"].transform("max")
+            totals = totals[~has_id | (totals["Source"] == latest.reindex(totals.index))]
+        totals = totals[columns].reset_index(drop=True)
+        self.counts["order_totals"] = len(totals)
         return totals
 
-    o["OrderId"] = o[omap["order_id"]].map(_normalize_order_id)
-    totals = o.groupby(["CustKey", "OrderId"], dropna=False).agg(OrderTotal=("Net", "sum")).reset_index()
-    return totals[["CustKey", "OrderTotal"]]
+
+@dataclass
+class _Shard:
+    """Compact per-shard arrays handed to worker processes instead of pickled DataFrames.
+
+    Amounts and order totals are int64 cents.
+    """
+
+    quote_pos: np.ndarray
+    quote_codes: np.ndarray
+    quote_amounts: np.ndarray
+    quote_dates: np.ndarray | None
+    order_codes: np.ndarray
+    order_totals: np.ndarray
+    order_dates: np.ndarray | None
+    window_days: int | None
+    order_rows: np.ndarray | None = None  # row in the full order totals, for one-to-one assignment
+    quote_limits: np.ndarray | None = None  # per-quote tolerance in cents; set for one-to-one mode
+
+
+def _nearest_kernel(shard: _Shard) -> tuple[np.ndarray, np.ndarray]:
+    """Closest same-customer order total (cents) for every quote in the shard, and whether one exists.
+
+    Both sides are sorted by amount once and joined with a per-customer nearest as-of merge,
+    so the cost is O((n + m) log(n + m)) instead of comparing every quote with every order.
+    """
+    left = pd.DataFrame(
+        {"Code": shard.quote_codes, "Amount": shard.quote_amounts, "Pos": np.arange(len(shard.quote_codes))}
+    ).sort_values("Amount", kind="stable")
+    right = pd.DataFrame(
+        {"Code": shard.order_codes, "Amount": shard.order_totals, "Row": np.arange(len(shard.order_totals))}
+    ).sort_values("Amount", kind="stable")
+    joined = pd.merge_asof(left, right, on="Amount", by="Code", direction="nearest")
+
+    rows = joined["Row"].to_numpy(dtype=float)
+    found = np.zeros(len(shard.quote_codes), dtype=bool)
+    nearest = np.zeros(len(shard.quote_codes), dtype=np.int64)
+    hit = ~np.isnan(rows)
+    positions = joined["Pos"].to_numpy()
+    found[positions[hit]] = True
+    nearest[positions[hit]] = shard.order_totals[rows[hit].astype(np.int64)]
+    return nearest, found
+
+
+# Order-window candidates (quote, order pairs) scanned per vectorized batch, to bound memory.
+_WINDOW_BATCH_PAIRS = 1 << 22
+
+
+def _orders_before(
+    codes: np.ndarray, dates: np.ndarray, probe_codes: np.ndarray, probe_dates: np.ndarray, inclusive: bool
+) -> np.ndarray:
+    """Per probe, the number of (customer, date)-sorted orders ahead of it (or also equal, if inclusive).
+
+    One merged lexsort for all probes: a probe sorts before orders with the same key, or after
+    them when `inclusive`, and counts the orders ahead of it.
+    """
+    m = len(codes)
+    is_order = np.concatenate([np.ones(m, dtype=bool), np.zeros(len(probe_codes), dtype=bool)])
+    merged = np.lexsort(
+        (
+            ~is_order if inclusive else is_order,
+            np.concatenate([dates, probe_dates]),
+            np.concatenate([codes, probe_codes]),
+        )
+    )
+    ahead = np.cumsum(is_order[merged]) - is_order[merged]
+    probes = ~is_order[merged]
+    out = np.empty(len(probe_codes), dtype=np.int64)
+    out[merged[probes] - m] = ahead[probes]
+    return out
+
+
+def _nearest_windowed_kernel(shard: _Shard) -> tuple[np.ndarray, np.ndarray]:
+    """Closest order total placed within ``[quote date, quote date + N days]`` per quote.
+
+    Orders are sorted by (customer, date) once and every quote's window is located by
+    `_orders_before` for all quotes at once. The windows' candidate orders are then scanned as
+    flat arrays (ties go to the earlier order), in batches of `_WINDOW_BATCH_PAIRS` pairs.
+    Undated quotes consider every order of their customer.
+    """
+    order = np.lexsort((shard.order_dates, shard.order_codes))
+    codes = shard.order_codes[order]
+    dates = shard.order_dates[order]
+    totals = shard.order_totals[order]
+    span = np.timedelta64(int(shard.window_days or 0), "D")
+
+    lo = codes.searchsorted(shard.quote_codes, side="left").astype(np.int64)
+    hi = codes.searchsorted(shard.quote_codes, side="right").astype(np.int64)
+    dated = ~np.isnat(shard.quote_dates)
+    qcodes, qdates = shard.quote_codes[dated], shard.quote_dates[dated]
+    lo[dated] = _orders_before(codes, dates, qcodes, qdates, inclusive=False)
+    hi[dated] = _orders_before(codes, dates, qcodes, qdates + span, inclusive=True)
+
+    found = hi > lo
+    nearest = np.zeros(len(shard.quote_codes), dtype=np.int64)
+    hits = np.flatnonzero(found)
+    sizes = (hi - lo)[hits]
+    ends = np.cumsum(sizes)
+    start = 0
+    while start < len(hits):
+        stop = max(start + 1, int(ends.searchsorted(ends[start] - sizes[start] + _WINDOW_BATCH_PAIRS, side="right")))
+        batch, batch_sizes = hits[start:stop], sizes[start:stop]
+        seg_starts = np.cumsum(batch_sizes) - batch_sizes
+        flat = np.repeat(lo[batch] - seg_starts, batch_sizes) + np.arange(int(batch_sizes.sum()))
+        diff = np.abs(totals[flat] - np.repeat(shard.quote_amounts[batch], batch_sizes))
+        best = np.minimum.reduceat(diff, seg_starts)
+        at_best = np.flatnonzero(diff == np.repeat(best, batch_sizes))
+        window_of = np.repeat(np.arange(len(batch)), batch_sizes)[at_best]
+        first = at_best[np.r_[True, window_of[1:] != window_of[:-1]]]
+        nearest[batch] = totals[flat[first]]
+        start = stop
+    return nearest, found
+
+
+def _find(parent: list[int], i: int) -> int:
+    """Union-find root with path halving; roots are the still-available order slots."""
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _assignment_kernel(shard: _Shard) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Assign each order total to at most one quote of its customer, closest pairs first.
+
+    Orders are sorted by (customer, total) once. Every quote proposes its nearest still-free
+    order within its tolerance (ties go to the lower total, then the earlier order row) into a
+    min-heap keyed by (distance, quote, order). Popping a pair whose order was already taken
+    just re-proposes that quote's next-nearest free order; taken slots are skipped with two
+    union-find arrays, so each proposal is a near-constant lookup and the sweep stays
+    O((n + m) log(n + m)) in practice.
+    Returns the assigned total, whether the quote got one, and the assigned order's row.
+    """
+    n = len(shard.quote_codes)
+    order = np.lexsort((shard.order_totals, shard.order_codes))
+    codes = shard.order_codes[order]
+    totals = shard.order_totals[order]
+    m = len(totals)
+    # right[i]: first free slot >= i (m = none); left[i + 1]: last free slot <= i, shifted (0 = none).
+    right = list(range(m + 1))
+    left = list(range(m + 1))
+    # First slot of each run of equal (customer, total), so equal totals are taken in row order.
+    new_run = np.ones(m, dtype=bool)
+    new_run[1:] = (codes[1:] != codes[:-1]) | (totals[1:] != totals[:-1])
+    run_start = np.maximum.accumulate(np.where(new_run, np.arange(m), 0)) if m else new_run
+
+    block_lo = codes.searchsorted(shard.quote_codes, side="left").tolist()
+    block_hi = codes.searchsorted(shard.quote_codes, side="right").tolist()
+    # Insertion slot of every quote in the (customer, total) order: one merged lexsort where a
+    # quote sorts before orders of equal total, then count the orders ahead of it.
+    is_order = np.concatenate([np.ones(m, dtype=bool), np.zeros(n, dtype=bool)])
+    merged = np.lexsort(
+        (is_order, np.concatenate([totals, shard.quote_amounts]), np.concatenate([codes, shard.quote_codes]))
+    )
+    orders_before = np.cumsum(is_order[merged]) - is_order[merged]
+    insert_at = np.empty(n, dtype=np.int64)
+    insert_at[merged[~is_order[merged]] - m] = orders_before[~is_order[merged]]
+    insert_at = insert_at.tolist()
+    amounts = shard.quote_amounts.tolist()
+    limits = shard.quote_limits.tolist()
+    totals_list = totals.tolist()
+    run_start_list = run_start.tolist()
+
+    def propose(qi: int) -> tuple[int, int, int] | None:
+        lo, hi, amount = block_lo[qi], block_hi[qi], amounts[qi]
+        r = _find(right, insert_at[qi])
+        l = _find(left, insert_at[qi]) - 1
+        best = None
+        if l >= lo:
+            l = _find(right, run_start_list[l])
+            best = (amount - totals_list[l], qi, l)
+        if r < hi and (best is None or totals_list[r] - amount < best[0]):
+            best = (totals_list[r] - amount, qi, r)
+        if best is None or best[0] > limits[qi]:
+            return None
+        return best
+
+    heap = [pair for pair in map(propose, range(n)) if pair is not None]
+    heapq.heapify(heap)
+    taken = [False] * m
+    slots = [-1] * n
+    while heap:
+        _, qi, slot = heapq.heappop(heap)
+        if taken[slot]:
+            pair = propose(qi)
+            if pair is not None:
+                heapq.heappush(heap, pair)
+            continue
+        taken[slot] = True
+        slots[qi] = slot
+        right[slot] = slot + 1
+        left[slot + 1] = slot
+
+    assigned_slot = np.array(slots, dtype=np.int64)
+    found = assigned_slot >= 0
+    nearest = np.where(found, totals[np.maximum(assigned_slot, 0)] if m else 0, 0).astype(np.int64)
+    rows = np.where(found, shard.order_rows[order[np.maximum(assigned_slot, 0)]] if m else -1, -1)
+    return nearest, found, rows
+
+
+def _run_shard(shard: _Shard) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    if shard.quote_limits is not None:
+        return (shard.quote_pos, *_assignment_kernel(shard))
+    kernel = _nearest_kernel if shard.window_days is None else _nearest_windowed_kernel
+    nearest, found = kernel(shard)
+    return shard.quote_pos, nearest, found, np.full(len(nearest), -1, dtype=np.int64)
 
 
-def _build_customer_index(order_totals: pd.DataFrame) -> dict[str, list[float]]:
-    idx: dict[str, list[float]] = {}
-    for _, row in order_totals.iterrows():
-        idx.setdefault(str(row["CustKey"]), []).append(float(row["OrderTotal"]))
-    return idx
+def _build_shards(
+    q: pd.DataFrame, order_totals: pd.DataFrame, cfg: RunConfig, n_shards: int, limits: np.ndarray | None = None
+) -> list[_Shard]:
+    """Hash-partition quotes and order totals by `CustKey` into `n_shards` compact shards.
 
+    Customer keys are factorized over both sides so shards carry int codes, and the shard of a
+    key is a stable content hash, so results never depend on worker count or hash seeding.
+    """
+    quote_keys = q["CustKey"].astype(str).to_numpy(dtype=object)
+    order_keys = order_totals["CustKey"].astype(str).to_numpy(dtype=object)
+    codes, uniques = pd.factorize(np.concatenate([quote_keys, order_keys]))
+    quote_codes, order_codes = codes[: len(quote_keys)], codes[len(quote_keys):]
+    shard_of_code = (pd.util.hash_array(np.asarray(uniques, dtype=object)) % np.uint64(n_shards)).astype(np.int64)
+    quote_shard = shard_of_code[quote_codes] if len(quote_codes) else np.empty(0, dtype=np.int64)
+    order_shard = shard_of_code[order_codes] if len(order_codes) else np.empty(0, dtype=np.int64)
 
-def _quote_is_matched(quote_row: pd.Series, index: dict[str, list[float]], cfg: RunConfig) -> bool:
-    amounts = index.get(str(quote_row["CustKey"]), [])
-    qamt = float(quote_row["Quote Amount"])
-    return any(_money_match(oa, qamt, cfg) for oa in amounts)
+    dated = cfg.order_window_days is not None
+    quote_amounts = q["AmountCents"].to_numpy(dtype=np.int64)
+    quote_dates = q["QuoteDate"].to_numpy(dtype="datetime64[ns]") if dated else None
+    totals = order_totals["OrderTotalCents"].to_numpy(dtype=np.int64)
+    order_dates = order_totals["OrderDate"].to_numpy(dtype="datetime64[ns]") if dated else None
 
+    shards = []
+    for shard_id in range(n_shards):
+        qsel = np.flatnonzero(quote_shard == shard_id)
+        osel = np.flatnonzero(order_shard == shard_id)
+        shards.append(
+            _Shard(
+                quote_pos=qsel,
+                quote_codes=quote_codes[qsel],
+                quote_amounts=quote_amounts[qsel],
+                quote_dates=quote_dates[qsel] if dated else None,
+                order_codes=order_codes[osel],
+                order_totals=totals[osel],
+                order_dates=order_dates[osel] if dated else None,
+                window_days=cfg.order_window_days,
+                order_rows=osel,
+                quote_limits=limits[qsel] if limits is not None else None,
+            )
+        )
+    return shards
 
-def _dedupe_sort(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.drop_duplicates(subset=OUTPUT_COLUMNS, keep="first")
-    return out.sort_values(by=["Entry Person Name", "Customer", "Quote Amount"], ascending=[True, True, False])
 
+def _run_shards(
+    q: pd.DataFrame, order_totals: pd.DataFrame, cfg: RunConfig, limits: np.ndarray | None = None
+) -> tuple[pd.Series, np.ndarray]:
+    workers = max(1, int(cfg.workers))
+    shards = _build_shards(q, order_totals, cfg, workers, limits)
+    if workers == 1:
+        parts = [_run_shard(shards[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_shard, shards))
 
-def run_matching(quotes: pd.DataFrame, orders: pd.DataFrame, qmap: dict[str, str], omap: dict[str, str], cfg: RunConfig) -> MatchResult:
-    q = _prep_quotes(quotes, qmap, cfg)
-    order_totals = _prep_order_totals(orders, omap)
+    nearest = np.zeros(len(q), dtype=np.int64)
+    found = np.zeros(len(q), dtype=bool)
+    rows = np.full(len(q), -1, dtype=np.int64)
+    for positions, values, hits, order_rows in parts:
+        nearest[positions] = values
+        found[positions] = hits
+        rows[positions] = order_rows
+    return pd.Series(pd.arrays.IntegerArray(nearest, ~found), index=q.index), rows
 
-    cust_index = _build_customer_index(order_totals)
-    q["Matched"] = q.apply(lambda r: _quote_is_matched(r, cust_index, cfg), axis=1)
 
-    followups = _dedupe_sort(q[~q["Matched"]].copy())[OUTPUT_COLUMNS]
+def _nearest_for_cfg(q: pd.DataFrame, order_totals: pd.DataFrame, cfg: RunConfig) -> pd.Series:
+    """Closest order total per quote as nullable Int64 cents (``<NA>`` when the customer has none)."""
+    return _run_shards(q, order_totals, cfg)[0]
+
+
+def _assign_for_cfg(q: pd.DataFrame, order_totals: pd.DataFrame, cfg: RunConfig) -> tuple[pd.Series, np.ndarray]:
+    """One-to-one assignment: Int64 cents of each quote's assigned order total and its order row (-1)."""
+    limits = _tolerance_cents(q["AmountCents"].to_numpy(dtype=np.int64), cfg.tolerance, cfg.relative_tolerance)
+    return _run_shards(q, order_totals, cfg, limits)
+
+
+def order_accumulator_for_cfg(omap: dict[str, str], cfg: RunConfig) -> OrderTotalsAccumulator:
+    """Empty accumulator that folds orders the way `cfg` needs them (dated for order windows)."""
+    if cfg.order_window_days is not None and cfg.order_window_days < 0:
+        raise FollowupError("--order-window-days must be 0 or more.")
+    if cfg.order_window_days is not None and "order_date" not in omap:
+        raise FollowupError(
+            "Order date window matching needs an order date column. "
+            "Map 'order_date' in --column-map or drop --order-window-days."
+        )
+    return OrderTotalsAccumulator(omap, by_date=cfg.order_window_days is not None, aliases=_aliases_for(cfg))
+
+
+def _prep_orders_for_cfg(
+    orders: pd.DataFrame | OrderTotalsAccumulator,
+    omap: dict[str, str],
+    cfg: RunConfig,
+    counts: dict[str, int] | None = None,
+) -> pd.DataFrame:
+    """Order totals for matching, from an Order Log frame or an already-fed accumulator."""
+    if isinstance(orders, OrderTotalsAccumulator):
+        acc = orders
+    else:
+        acc = order_accumulator_for_cfg(omap, cfg)
+        acc.add(orders)
+    totals = acc.totals()
+    if counts is not None:
+        counts.update(acc.counts)
+    return totals
+
+
+def _sort_followups(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(by=["Entry Person Name", "Customer", "Quote Amount"], ascending=[True, True, False])
+
+
+def _rank_keys(df: pd.DataFrame, rank_by: str) -> list[tuple[int, int]]:
+    """Per-row ``(primary, quote cents)`` keys, larger is more urgent."""
+    cents = df["AmountCents"].to_numpy(dtype=np.int64)
+    if rank_by == "amount":
+        primary = cents
+    elif rank_by == "age":
+        dates = parse_dates(df["Date Quoted"]).to_numpy(dtype="datetime64[ns]").view(np.int64)
+        # Oldest first; undated quotes (NaT is the smallest int64) go last.
+        primary = np.where(dates == np.iinfo(np.int64).min, np.iinfo(np.int64).min, -dates)
+    elif rank_by == "customer_total":
+        primary = df.groupby("CustKey", sort=False)["AmountCents"].transform("sum").to_numpy(dtype=np.int64)
+    else:
+        raise FollowupError(f"Unknown rank {rank_by!r}; choose one of: {', '.join(RANK_BY)}")
+    return list(zip(primary.tolist(), cents.tolist()))
+
+
+def _top_per_rep(followups: pd.DataFrame, n: int, rank_by: str) -> pd.DataFrame:
+    """The `n` most urgent follow-ups of each rep, best first, reps in name order.
+
+    Selection keeps a heap of `n` rows per rep instead of sorting every follow-up; ties keep
+    the incoming order.
+    """
+    if n < 1:
+        raise FollowupError("--max-per-rep must be at least 1.")
+    keys = _rank_keys(followups, rank_by)
+    groups = followups.groupby("Entry Person Name", dropna=False, sort=True).indices
+    picked: list[int] = []
+    for positions in groups.values():
+        picked.extend(heapq.nlargest(n, positions.tolist(), key=keys.__getitem__))
+    return followups.iloc[picked]
+
+
+def _sort_by_quote_date(q: pd.DataFrame) -> pd.DataFrame:
+    dated = q[q["QuoteDate"].notna()]
+    return dated.sort_values("QuoteDate", kind="stable")
+
+
+def _date_slice(q: pd.DataFrame, start: pd.Timestamp | None, end: pd.Timestamp | None) -> pd.DataFrame:
+    """Slice quotes sorted by `QuoteDate` to ``start <= date < end`` with binary search."""
+    dates = q["QuoteDate"].array
+    lo = 0 if start is None else int(dates.searchsorted(start, side="left"))
+    hi = len(q) if end is None else int(dates.searchsorted(end, side="left"))
+    return q.iloc[lo:hi]
+
+
+def _apply_date_range(q: pd.DataFrame, cfg: RunConfig) -> pd.DataFrame:
+    if cfg.since is None and cfg.until is None and not cfg.window:
+        return q
+    q = _sort_by_quote_date(q)
+    start = pd.Timestamp(cfg.since) if cfg.since else None
+    end = pd.Timestamp(cfg.until + timedelta(days=1)) if cfg.until else None
+    return _date_slice(q, start, end)
+
+
+def _score_quotes(q: pd.DataFrame, closest: pd.Series, cfg: RunConfig) -> pd.DataFrame:
+    """Add closest order total, differences, effective tolerance and `Matched` to prepped quotes.
+
+    `closest` is Int64 cents; matching is decided in integer cents and the debug columns are
+    reported in dollars.
+    """
+    q = q.copy()
+    amounts = q["AmountCents"].to_numpy(dtype=np.int64)
+    found = closest.notna().to_numpy()
+    diff = np.abs(closest.to_numpy(dtype=np.int64, na_value=0) - amounts)
+    limit = _tolerance_cents(amounts, cfg.tolerance, cfg.relative_tolerance)
+    q["Closest Order Total"] = cents_to_amount(closest)
+    q["Abs Difference"] = np.where(found, diff / 100, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q["Rel Difference"] = np.where(found, diff / np.abs(amounts), np.nan)
+    q["Effective Tolerance"] = limit / 100
+    q["Matched"] = found & (diff <= limit)
+    return q
+
+
+def _build_result(
+    q: pd.DataFrame,
+    qmap: dict[str, str],
+    omap: dict[str, str],
+    cfg: RunConfig,
+    extra_meta: list[tuple[str, object]] | None = None,
+    counts: dict[str, int] | None = None,
+) -> MatchResult:
+    unmatched = q[~q["Matched"]].drop_duplicates(subset=OUTPUT_COLUMNS, keep="first")
+    counts = dict(counts or {})
+    # Partitioned runs (see `spill`) pass only the rows they kept, with these totals already counted.
+    counts.setdefault("quotes_matched", int(q["Matched"].sum()))
+    counts["followups"] = len(unmatched)
+    followups = rep_followups = None
+    if cfg.max_per_rep is not None:
+        # Only the selected rows are ordered; the full list is sorted just when it is written too.
+        rep_followups = _top_per_rep(unmatched, cfg.max_per_rep, cfg.rank_by)[OUTPUT_COLUMNS]
+        counts["followups_selected"] = len(rep_followups)
+        if not cfg.full_followup_sheet:
+            followups, rep_followups = rep_followups, None
+    if followups is None:
+        followups = _sort_followups(unmatched)[OUTPUT_COLUMNS]
 
     meta_rows = [
-        ("quotes_total_filtered", len(q)),
-        ("followups", len(followups)),
+        ("quotes_total_filtered", counts.get("quotes_in_date_range", len(q))),
+        ("followups", counts["followups"]),
         ("floor", cfg.floor),
         ("tolerance", cfg.tolerance),
         ("relative_tolerance", cfg.relative_tolerance),
         ("reps_count", len(cfg.reps)),
         ("quotes_mapping", str(qmap)),
         ("orders_mapping", str(omap)),
-        ("notes", "Only Option B logic is used (customer + grouped order totals + tolerance)."),
     ]
+    if cfg.max_per_rep is not None:
+        meta_rows += [
+            ("max_per_rep", cfg.max_per_rep),
+            ("rank_by", cfg.rank_by),
+            ("followups_selected", counts["followups_selected"]),
+        ]
+    meta_rows.append(("notes", "Only Option B logic is used (customer + grouped order totals + tolerance)."))
+    meta_rows.extend(extra_meta or [])
     meta = pd.DataFrame(meta_rows, columns=["Metric", "Value"])
 
     debug = None
     if cfg.debug:
-        debug = q[
-            [
-                "Quote",
-                "Customer",
-                "Quote Amount",
-                "Date Quoted",
-                "Entry Person Name",
-                "Matched",
-            ]
-        ].copy()
-
-    return MatchResult(followups=followups, meta=meta, debug=debug)
+        debug = q[DEBUG_COLUMNS + (["Assigned Order"] if cfg.one_to_one else [])].copy()
+
+    return MatchResult(followups=followups, meta=meta, debug=debug, counts=counts, rep_followups=rep_followups)
+
+
+def _confirm_fuzzy_customers(q: pd.DataFrame, order_totals: pd.DataFrame, cfg: RunConfig) -> tuple[pd.DataFrame, int]:
+    """Retry unmatched quotes whose customer has no orders under the closest-spelled order customer.
+
+    A retry that then passes the money tolerance is a confirmed match: the quote is marked matched
+    and the customer spelling is learned into `cfg.aliases` so later runs match it exactly.
+    Returns the updated quotes and the number of aliases learned.
+    """
+    try:
+        from rapidfuzz import fuzz, process
+    except ImportError as exc:
+        raise FollowupError("--fuzzy needs the 'rapidfuzz' package. Install it with: pip install rapidfuzz") from exc
+
+    order_keys = pd.unique(order_totals["CustKey"].astype(str))
+    pending = q[~q["Matched"] & ~q["CustKey"].isin(set(order_keys)) & (q["CustKey"] != "")]
+    remap: dict[str, str] = {}
+    for key in pd.unique(pending["CustKey"]):
+        best = process.extractOne(key, order_keys, scorer=fuzz.ratio, score_cutoff=cfg.fuzzy_threshold)
+        if best is not None:
+            remap[key] = best[0]
+    if not remap:
+        return q, 0
+
+    retry = pending[pending["CustKey"].isin(remap)].copy()
+    retry["CustKey"] = retry["CustKey"].map(remap)
+    rescored = _score_quotes(retry, _nearest_for_cfg(retry, order_totals, cfg), cfg)
+    confirmed = rescored[rescored["Matched"]]
+
+    q = q.copy()
+    q.loc[confirmed.index, DEBUG_COLUMNS] = confirmed[DEBUG_COLUMNS]
+    learned = {variant: remap[variant] for variant in pd.unique(pending.loc[confirmed.index, "CustKey"])}
+    if cfg.aliases is not None:
+        for variant, canonical in learned.items():
+            cfg.aliases.learn(variant, canonical)
+    return q, len(learned)
+
+
+def _score_one_to_one(q: pd.DataFrame, order_totals: pd.DataFrame, cfg: RunConfig) -> pd.DataFrame:
+    """Score quotes against their assigned order, or their closest order when none was left.
+
+    `Matched` means an order total was assigned to the quote; `Assigned Order` names it (order id
+    when the Order Log has one).
+    """
+    assigned, rows = _assign_for_cfg(q, order_totals, cfg)
+    if cfg.debug:
+        assigned = assigned.where(assigned.notna(), _nearest_for_cfg(q, order_totals, cfg))
+    scored = _score_quotes(q, assigned, cfg)
+    has_order = rows >= 0
+    scored["Matched"] = has_order
+    if "OrderId" in order_totals:
+        labels = order_totals["OrderId"].to_numpy(dtype=object)
+    else:
+        labels = np.array([f"{key} #{i + 1}" for i, key in enumerate(order_totals["CustKey"])], dtype=object)
+    picked = np.full(len(rows), None, dtype=object)
+    picked[has_order] = labels[rows[has_order]]
+    scored["Assigned Order"] = picked
+    return scored
+
+
+def _score_for_cfg(q: pd.DataFrame, order_totals: pd.DataFrame, cfg: RunConfig) -> pd.DataFrame:
+    """Exact-customer scoring of prepped quotes: one-to-one assignment or closest order total."""
+    if cfg.one_to_one:
+        if cfg.order_window_days is not None or cfg.fuzzy:
+            raise FollowupError("--one-to-one cannot be combined with --order-window-days or --fuzzy.")
+        return _score_one_to_one(q, order_totals, cfg)
+    return _score_quotes(q, _nearest_for_cfg(q, order_totals, cfg), cfg)
+
+
+def _match_prepped(
+    q: pd.DataFrame,
+    order_totals: pd.DataFrame,
+    qmap: dict[str, str],
+    omap: dict[str, str],
+    cfg: RunConfig,
+    extra_meta: list[tuple[str, object]] | None = None,
+    counts: dict[str, int] | None = None,
+) -> MatchResult:
+    extra_meta = list(extra_meta or [])
+    scored = _score_for_cfg(q, order_totals, cfg)
+    if cfg.fuzzy:
+        scored, learned = _confirm_fuzzy_customers(scored, order_totals, cfg)
+        extra_meta.append(("fuzzy_aliases_learned", learned))
+    return _build_result(scored, qmap, omap, cfg, extra_meta, counts)
+
+
+def _run_meta(cfg: RunConfig) -> list[tuple[str, object]]:
+    rows: list[tuple[str, object]] = [("engine", cfg.engine)]
+    if cfg.one_to_one:
+        rows.append(("one_to_one", True))
+    if cfg.order_window_days is not None:
+        rows.append(("order_window_days", cfg.order_window_days))
+    if cfg.since:
+        rows.append(("since", cfg.since.isoformat()))
+    if cfg.until:
+        rows.append(("until", cfg.until.isoformat()))
+    return rows
+
+
+def run_matching(
+    quotes: pd.DataFrame,
+    orders: pd.DataFrame | OrderTotalsAccumulator,
+    qmap: dict[str, str],
+    omap: dict[str, str],
+    cfg: RunConfig,
+) -> MatchResult:
+    counts: dict[str, int] = {}
+    q = _apply_date_range(_prep_quotes(quotes, qmap, cfg, counts), cfg)
+    counts["quotes_in_date_range"] = len(q)
+    order_totals = _prep_orders_for_cfg(orders, omap, cfg, counts)
+    return _match_prepped(q, order_totals, qmap, omap, cfg, _run_meta(cfg), counts)
+
+
+def run_matching_windows(
+    quotes: pd.DataFrame,
+    orders: pd.DataFrame | OrderTotalsAccumulator,
+    qmap: dict[str, str],
+    omap: dict[str, str],
+    cfg: RunConfig,
+) -> list[tuple[str, MatchResult]]:
+    """Match each `cfg.window` period separately from one prep of both inputs.
+
+    Quotes are sorted by parsed date once; each window is then a binary-search slice.
+    Windows without any quotes are skipped. Returns ``(label, result)`` pairs in date order.
+    Each result carries the shared input/filter counts plus its own `WINDOW_COUNTS`.
+    """
+    freq = WINDOW_FREQUENCIES.get(cfg.window or "")
+    if freq is None:
+        raise FollowupError(f"Unknown window '{cfg.window}'. Choose one of: {', '.join(WINDOW_FREQUENCIES)}.")
+
+    counts: dict[str, int] = {}
+    q = _apply_date_range(_prep_quotes(quotes, qmap, cfg, counts), cfg)
+    order_totals = _prep_orders_for_cfg(orders, omap, cfg, counts)
+    if q.empty:
+        return []
+
+    dates = q["QuoteDate"]
+    periods = pd.period_range(dates.iloc[0], dates.iloc[-1], freq=freq)
+    results: list[tuple[str, MatchResult]] = []
+    for period in periods:
+        start = period.start_time
+        end = (period + 1).start_time
+        window_q = _date_slice(q, start, end)
+        if window_q.empty:
+            continue
+        label = start.strftime("%Y-%m-%d")
+        extra = _run_meta(cfg) + [
+            ("window", cfg.window),
+            ("window_start", label),
+            ("window_end", (end - pd.Timedelta(days=1)).strftime("%Y-%m-%d")),
+        ]
+        window_counts = {**counts, "quotes_in_date_range": len(window_q)}
+        results.append((label, _match_prepped(window_q, order_totals, qmap, omap, cfg, extra, window_counts)))
+    return results
+
+
+def run_sweep(
+    quotes: pd.DataFrame,
+    orders: pd.DataFrame | OrderTotalsAccumulator,
+    qmap: dict[str, str],
+    omap: dict[str, str],
+    cfg: RunConfig,
+    counts: dict[str, int] | None = None,
+) -> pd.DataFrame:
+    """Follow-up counts per rep for every floor/tolerance/relative tolerance combination.
+
+    Inputs are prepped once at the lowest floor and each quote's distance to its closest
+    order total is computed once; every grid point is then just a vectorized threshold.
+    Grid axes default to the single value already on `cfg`. Input and filter counts (at
+    the lowest floor) are written into `counts` when given.
+    """
+    if cfg.one_to_one:
+        raise FollowupError("--sweep does not support --one-to-one; assignments change with every tolerance.")
+    floors = sorted(set(cfg.sweep_floors or [cfg.floor]))
+    tolerances = sorted(set(cfg.sweep_tolerances or [cfg.tolerance]))
+    relative_tolerances = sorted(set(cfg.sweep_relative_tolerances or [cfg.relative_tolerance]))
+
+    counts = counts if counts is not None else {}
+    q = _apply_date_range(_prep_quotes(quotes, qmap, replace(cfg, floor=floors[0]), counts), cfg)
+    counts["quotes_in_date_range"] = len(q)
+    q = q.drop_duplicates(subset=OUTPUT_COLUMNS, keep="first")
+    order_totals = _prep_orders_for_cfg(orders, omap, cfg, counts)
+
+    amounts = q["AmountCents"].to_numpy(dtype=np.int64)
+    closest = _nearest_for_cfg(q, order_totals, cfg)
+    found = closest.notna().to_numpy()
+    diff = np.abs(closest.to_numpy(dtype=np.int64, na_value=0) - amounts)
+    rep_codes, rep_names = pd.factorize(q["Entry Person Name"].astype(str), sort=True)
+
+    rows = []
+    for floor, tol, rel in itertools.product(floors, tolerances, relative_tolerances):
+        limit = _tolerance_cents(amounts, tol, rel)
+        open_quotes = (amounts > to_cents(floor)) & ~(found & (diff <= limit))
+        per_rep = np.bincount(rep_codes[open_quotes], minlength=len(rep_names))
+        rows.append([floor, tol, rel, int(open_quotes.sum()), *per_rep.tolist()])
+
+    columns = ["Floor", "Tolerance", "Relative Tolerance", "Followups", *[str(r) for r in rep_names]]
+    return pd.DataFrame(rows, columns=columns)
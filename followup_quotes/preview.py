@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+"""Row model behind the desktop UI's results preview.
+
+The preview never copies or stringifies the whole follow-up frame: filtering and sorting only
+reorder an index array, and rows are formatted a page at a time as the user scrolls.
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+ALL_REPS = "All reps"
+PAGE_ROWS = 200
+
+
+def _display(value: object) -> str:
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+@dataclass
+class PreviewModel:
+    frame: pd.DataFrame
+    rep_column: str = "Entry Person Name"
+    rep: str = ALL_REPS
+    sort_column: str | None = None
+    descending: bool = False
+    _order: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.frame = self.frame.reset_index(drop=True)
+        self._refresh()
+
+    @property
+    def columns(self) -> list[str]:
+        return [str(c) for c in self.frame.columns]
+
+    def reps(self) -> list[str]:
+        names = self.frame[self.rep_column].fillna("Unassigned").astype(str).unique()
+        return [ALL_REPS, *sorted(names)]
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def set_rep(self, rep: str) -> None:
+        self.rep = rep
+        self._refresh()
+
+    def sort_by(self, column: str) -> None:
+        """Sort by `column`; sorting by the same column again flips the direction."""
+        self.descending = not self.descending if column == self.sort_column else False
+        self.sort_column = column
+        self._refresh()
+
+    def _refresh(self) -> None:
+        order = np.arange(len(self.frame))
+        if self.sort_column is not None:
+            values = self.frame[self.sort_column]
+            try:
+                ordered = values.sort_values(ascending=not self.descending, na_position="last", kind="stable")
+            except TypeError:  # mixed cell types, e.g. dates stored as text and as dates
+                ordered = values.map(_display).where(values.notna()).sort_values(
+                    ascending=not self.descending, na_position="last", kind="stable"
+                )
+            order = ordered.index.to_numpy()  # missing values last in either direction
+        if self.rep != ALL_REPS:
+            reps = self.frame[self.rep_column].fillna("Unassigned").astype(str).to_numpy()
+            order = order[reps[order] == self.rep]
+        self._order = order
+
+    def rows(self, start: int, count: int = PAGE_ROWS) -> list[tuple[str, ...]]:
+        """Display strings for rows ``start`` up to ``start + count`` of the filtered, sorted view."""
+        page = self.frame.iloc[self._order[start:start + count]]
+        return [tuple(_display(v) for v in row) for row in page.itertuples(index=False, name=None)]
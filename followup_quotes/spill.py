@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+"""Bounded-memory matching for exports too large to load at once.
+
+Both inputs are streamed chunk by chunk into on-disk buckets keyed by a stable hash of
+`CustKey`, so every customer's quotes and orders land in the same bucket. Buckets are then
+matched a batch at a time with the regular prep and scoring code, keeping only the rows the
+workbook needs, so peak memory follows `RunConfig.memory_budget_mb` instead of export size.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .config import FollowupError, RunConfig
+from .history import current_rss_bytes
+from .io_excel import latest_copies
+from .matching import (
+    DEBUG_COLUMNS,
+    OUTPUT_COLUMNS,
+    MatchResult,
+    _apply_date_range,
+    _build_result,
+    _prep_orders_for_cfg,
+    _prep_quotes,
+    _run_meta,
+    _score_for_cfg,
+    _sort_by_quote_date,
+    order_accumulator_for_cfg,
+)
+
+SPILL_BUCKETS = 64
+# A read chunk is parsed into a frame, projected and pickled while its raw rows are still alive.
+_CHUNK_COPIES = 8
+# Prepping and scoring a batch holds a few working copies of its rows.
+_WORKING_COPIES = 4
+_MIN_FREE_BYTES = 16 * 2**20
+
+
+@dataclass(frozen=True)
+class MemoryPlan:
+    """Raw cell bytes per read chunk and in-memory bytes of spilled rows per match batch."""
+
+    chunk_bytes: int
+    batch_bytes: int
+
+
+def plan_memory(budget_mb: int) -> MemoryPlan:
+    """Split what `budget_mb` leaves above this process's current memory between reading and matching.
+
+    The budget covers the whole process, interpreter and libraries included.
+    """
+    free = max(budget_mb * 2**20 - (current_rss_bytes() or 0), _MIN_FREE_BYTES)
+    return MemoryPlan(chunk_bytes=free // _CHUNK_COPIES, batch_bytes=free // 2 // _WORKING_COPIES)
+
+
+def check_spillable(cfg: RunConfig) -> None:
+    """Reject settings a partitioned run cannot honour, before any input is read."""
+    if cfg.engine != "pandas":
+        raise FollowupError("--memory-budget-mb runs on the pandas engine; DuckDB uses --duckdb-memory-limit.")
+    if cfg.fuzzy:
+        raise FollowupError("--fuzzy compares customers across the whole Order Log; drop --memory-budget-mb to use it.")
+
+
+def spill_directory(cfg: RunConfig) -> tempfile.TemporaryDirectory:
+    """Temporary directory for a run's buckets or DuckDB database, under `cfg.spill_dir` when set; removed on exit."""
+    if cfg.spill_dir is not None:
+        cfg.spill_dir.mkdir(parents=True, exist_ok=True)
+    return tempfile.TemporaryDirectory(prefix="followup_quotes_spill_", dir=cfg.spill_dir)
+
+
+def bucket_of(keys: pd.Series, n_buckets: int) -> np.ndarray:
+    """Bucket per customer key; a content hash, so it never depends on hash seeding."""
+    hashes = pd.util.hash_array(keys.astype(str).to_numpy(dtype=object))
+    return (hashes % np.uint64(n_buckets)).astype(np.int64)
+
+
+@dataclass
+class BucketSpill:
+    """Rows of one input appended to `n_buckets` pickle files in `directory`.
+
+    Every chunk is stored per bucket with the index of the input file it came from, and rows
+    are numbered in input order so a bucket reads back in that order. `sizes` holds the
+    in-memory size of each bucket's rows.
+    """
+
+    directory: Path
+    n_buckets: int = SPILL_BUCKETS
+    rows: int = 0
+    sizes: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sizes = np.zeros(self.n_buckets, dtype=np.int64)
+
+    def _path(self, bucket: int) -> Path:
+        return self.directory / f"{bucket:04d}.pkl"
+
+    def add(self, frame: pd.DataFrame, keys: pd.Series, source: int) -> None:
+        if frame.empty:  # a header-only export leaves every bucket empty
+            return
+        frame = frame.set_axis(pd.RangeIndex(self.rows, self.rows + len(frame)))
+        self.rows += len(frame)
+        for bucket, positions in frame.groupby(bucket_of(keys, self.n_buckets), sort=False).indices.items():
+            part = frame.iloc[positions]
+            self.sizes[bucket] += int(part.memory_usage(deep=True).sum())
+            with self._path(bucket).open("ab") as fh:
+                pickle.dump((source, part), fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def load(self, bucket: int) -> Iterator[tuple[int, pd.DataFrame]]:
+        path = self._path(bucket)
+        if not path.exists():
+            return
+        with path.open("rb") as fh:
+            while True:
+                try:
+                    yield pickle.load(fh)
+                except EOFError:
+                    return
+
+
+def _batches(sizes: np.ndarray, limit: int) -> list[list[int]]:
+    """Consecutive buckets grouped while their rows fit in `limit` bytes (at least one each)."""
+    batches: list[list[int]] = []
+    current: list[int] = []
+    used = 0
+    for bucket, size in enumerate(sizes.tolist()):
+        if current and used + size > limit:
+            batches.append(current)
+            current, used = [], 0
+        current.append(bucket)
+        used += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _batch_quotes(spill: BucketSpill, batch: list[int], qmap: dict[str, str]) -> pd.DataFrame:
+    """A batch's quote rows in input order, deduplicated across input files like `combine_parts`."""
+    parts = [part for bucket in batch for part in spill.load(bucket)]
+    if not parts:
+        return pd.DataFrame({column: pd.Series(dtype=object) for column in dict.fromkeys(qmap.values())})
+    quotes = pd.concat([df for _, df in parts]).sort_index()
+    key_columns = [qmap[f] for f in ("quote_number", "rev") if f in qmap]
+    if len({source for source, _ in parts}) < 2:
+        return quotes
+    sources = pd.concat([pd.Series(source, index=df.index) for source, df in parts]).sort_index()
+    return quotes[latest_copies(quotes, sources, key_columns)]
+
+
+def match_spilled(
+    quotes: BucketSpill,
+    orders: BucketSpill,
+    qmap: dict[str, str],
+    omap: dict[str, str],
+    cfg: RunConfig,
+) -> MatchResult:
+    """Match the spilled inputs one batch of buckets at a time, like `matching.run_matching`.
+
+    Only unmatched quotes (every quote with `--debug`) are kept between batches. Cross-file
+    dedupe and `--latest-revision` work within a bucket, which is exact as long as a quote
+    number or order id keeps its customer across files.
+    """
+    check_spillable(cfg)
+    if cfg.one_to_one and cfg.debug and "order_id" not in omap:
+        raise FollowupError(
+            "--one-to-one --debug with --memory-budget-mb needs an order id column to name assigned orders."
+        )
+    keep_columns = list(
+        dict.fromkeys(
+            OUTPUT_COLUMNS
+            + ["AmountCents", "QuoteDate", "CustKey", "Matched"]
+            + (DEBUG_COLUMNS if cfg.debug else [])
+            + (["Assigned Order"] if cfg.one_to_one else [])
+        )
+    )
+
+    counts: dict[str, int] = {}
+    kept: list[pd.DataFrame] = []
+    batches = _batches(quotes.sizes + orders.sizes, plan_memory(cfg.memory_budget_mb).batch_bytes)
+    for batch in batches:
+        batch_counts: dict[str, int] = {}
+        q = _apply_date_range(_prep_quotes(_batch_quotes(quotes, batch, qmap), qmap, cfg, batch_counts), cfg)
+        batch_counts["quotes_in_date_range"] = len(q)
+        acc = order_accumulator_for_cfg(omap, cfg)
+        order_parts = [part for bucket in batch for part in orders.load(bucket)]
+        for source in sorted({source for source, _ in order_parts}):
+            acc.add(pd.concat([df for s, df in order_parts if s == source]), source=source)
+        del order_parts
+        scored = _score_for_cfg(q, _prep_orders_for_cfg(acc, omap, cfg, batch_counts), cfg)
+        batch_counts["quotes_matched"] = int(scored["Matched"].sum())
+        kept.append((scored if cfg.debug else scored[~scored["Matched"]])[keep_columns])
+        for key, n in batch_counts.items():
+            counts[key] = counts.get(key, 0) + n
+    counts["spill_batches"] = len(batches)
+
+    rows = pd.concat(kept).sort_index()
+    if cfg.since is not None or cfg.until is not None:
+        rows = _sort_by_quote_date(rows)
+    return _build_result(rows, qmap, omap, cfg, _run_meta(cfg), counts)
@@ -2,21 +2,98 @@ from __future__ import annotations
 
 from pathlib import Path
 import ctypes
+import multiprocessing
 import sys
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from pathlib import Path
 
-from followup_quotes.app import generate_followup_workbook, make_run_config, resolve_template_path
+import pandas as pd
+
+from followup_quotes.app import generate_followup_result, make_run_config, resolve_template_path
 from followup_quotes.config import FollowupError
+from followup_quotes.preview import ALL_REPS, PAGE_ROWS, PreviewModel
+
+
+class PreviewPane(ttk.Frame):
+    """Virtualized follow-up preview: the Treeview only holds rows the user has scrolled to.
+
+    The first page is inserted on `show`; another page is appended whenever the view nears
+    the bottom, so even 100k follow-ups cost a few hundred Tk items until scrolled through.
+    """
+
+    def __init__(self, parent) -> None:
+        super().__init__(parent, style="Card.TFrame", padding=12)
+        self.model: PreviewModel | None = None
+        self._loaded = 0
+        self.rep_value = tk.StringVar(value=ALL_REPS)
+        self.count_text = tk.StringVar(value="Run to preview follow-ups")
+
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+
+        bar = ttk.Frame(self, style="Card.TFrame")
+        bar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 8))
+        ttk.Label(bar, text="Preview", style="Label.TLabel").pack(side="left")
+        self.rep_box = ttk.Combobox(bar, textvariable=self.rep_value, state="readonly", width=28, values=[ALL_REPS])
+        self.rep_box.pack(side="left", padx=(12, 0))
+        self.rep_box.bind("<<ComboboxSelected>>", lambda _e: self._on_rep())
+        ttk.Label(bar, textvariable=self.count_text, style="Hint.TLabel").pack(side="left", padx=(12, 0))
+
+        self.tree = ttk.Treeview(self, show="headings", height=10)
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        scroll = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        scroll.grid(row=1, column=1, sticky="ns")
+        self._scroll = scroll
+        self.tree.configure(yscrollcommand=self._on_scroll)
+
+    def show(self, followups: pd.DataFrame) -> None:
+        self.model = PreviewModel(followups)
+        columns = self.model.columns
+        self.tree.configure(columns=columns)
+        for col in columns:
+            self.tree.heading(col, text=col, command=lambda c=col: self._on_sort(c))
+            self.tree.column(col, width=130, stretch=True)
+        self.rep_box.configure(values=self.model.reps())
+        self.rep_value.set(ALL_REPS)
+        self._reload()
+
+    def _reload(self) -> None:
+        self.tree.delete(*self.tree.get_children())
+        self._loaded = 0
+        self._load_page()
+        self.tree.yview_moveto(0)
+        total = len(self.model) if self.model is not None else 0
+        self.count_text.set(f"{total:,} follow-ups")
+
+    def _load_page(self) -> None:
+        if self.model is None or self._loaded >= len(self.model):
+            return
+        for values in self.model.rows(self._loaded, PAGE_ROWS):
+            self.tree.insert("", "end", values=values)
+        self._loaded = min(self._loaded + PAGE_ROWS, len(self.model))
+
+    def _on_scroll(self, first: str, last: str) -> None:
+        self._scroll.set(first, last)
+        if float(last) > 0.9:
+            self._load_page()
+
+    def _on_rep(self) -> None:
+        if self.model is not None:
+            self.model.set_rep(self.rep_value.get())
+            self._reload()
+
+    def _on_sort(self, column: str) -> None:
+        if self.model is not None:
+            self.model.sort_by(column)
+            self._reload()
 
 
 class FollowupUI(tk.Tk):
     def __init__(self) -> None:
         super().__init__()
         self.title("Follow-Up Quote Finder")
-        self.geometry("960x620")
-        self.minsize(920, 580)
+        self.geometry("960x860")
+        self.minsize(920, 720)
 
         self.quote_path = tk.StringVar()
         self.order_path = tk.StringVar()
@@ -145,6 +222,7 @@ class FollowupUI(tk.Tk):
         content = ttk.Frame(root, style="Root.TFrame")
         content.grid(row=0, column=1, sticky="nsew")
         content.columnconfigure(0, weight=1)
+        content.rowconfigure(5, weight=1)
 
         ttk.Label(content, text="Generate Follow-Up Workbook", style="Title.TLabel").grid(row=0, column=0, sticky="w")
         ttk.Label(content, text="Template-driven output with automatic app icon and rep-based sheets", style="Subtitle.TLabel").grid(row=1, column=0, sticky="w", pady=(0, 12))
@@ -175,6 +253,9 @@ class FollowupUI(tk.Tk):
         ttk.Button(content, text="Generate Workbook", style="Primary.TButton", command=self._run).grid(row=3, column=0, sticky="ew", pady=(14, 6))
         ttk.Label(content, textvariable=self.status_text, style="Status.TLabel").grid(row=4, column=0, sticky="w")
 
+        self.preview = PreviewPane(content)
+        self.preview.grid(row=5, column=0, sticky="nsew", pady=(10, 0))
+
     def _browse_quotes(self) -> None:
         path = filedialog.askopenfilename(title="Select Quote Summary", filetypes=[("Excel files", "*.xlsx")])
         if path:
@@ -224,7 +305,8 @@ class FollowupUI(tk.Tk):
                 relative_tolerance=float(self.relative_tolerance_value.get()),
                 template=template,
             )
-            result_path = generate_followup_workbook(cfg)
+            result_path, result = generate_followup_result(cfg)
+            self.preview.show(result.followups)
             self.status_text.set(f"Done: {result_path}")
             messagebox.showinfo("Done", f"Workbook created:\n{result_path}")
         except FollowupError as exc:
@@ -236,6 +318,8 @@ class FollowupUI(tk.Tk):
 
 
 def main() -> int:
+    # Required for --workers process pools inside the frozen Windows executable.
+    multiprocessing.freeze_support()
     app = FollowupUI()
     app.mainloop()
     return 0
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+"""Incremental refresh of an existing follow-up workbook.
+
+Rows are keyed by `Quote` (plus occurrence number for repeated quote numbers). Quotes still
+needing follow-up keep their position and every user-edited column (`Won by Follow Up?` and
+any columns reps added, e.g. notes); new follow-ups are appended; quotes that converted or no
+longer qualify are dropped. Rep tabs are keyed the same way within each tab, so columns only
+a rep tab has (the template's contact and follow-up date columns, notes) move and disappear
+with their quote, and a `Won by Follow Up?` ticked on either sheet stays ticked on both.
+"""
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+from .io_excel import parse_truthy
+from .matching import OUTPUT_COLUMNS
+
+WON_COLUMN = "Won by Follow Up?"
+USER_COLUMNS = [WON_COLUMN]
+
+
+@dataclass
+class UpdateSummary:
+    kept: int
+    added: int
+    removed: int
+
+
+def _row_keys(quotes: pd.Series, scope: pd.Series | None = None) -> pd.Series:
+    base = quotes.map(lambda v: "" if pd.isna(v) else str(v).strip())
+    if scope is not None:
+        base = scope.to_numpy(dtype=object) + "/" + base
+    return base + "#" + base.groupby(base).cumcount().astype(str)
+
+
+def _ticked(values: pd.Series) -> pd.Series:
+    return values.map(parse_truthy).astype(bool)
+
+
+def fold_rep_ticks(previous: pd.DataFrame | None, rep_tabs: dict[str, pd.DataFrame], tabs: pd.Series) -> pd.DataFrame | None:
+    """`previous` Follow-Up rows with `Won by Follow Up?` also set where it was ticked on a rep tab.
+
+    `tabs` names the rep tab of each `previous` row.
+    """
+    if previous is None or "Quote" not in previous.columns or not rep_tabs:
+        return previous
+    ticked: set[str] = set()
+    for tab, rows in rep_tabs.items():
+        if WON_COLUMN in rows.columns:
+            keys = _row_keys(rows["Quote"], pd.Series(tab, index=rows.index))
+            ticked.update(keys[_ticked(rows[WON_COLUMN])])
+    if not ticked:
+        return previous
+    on_tab = _row_keys(previous["Quote"], tabs).isin(ticked).to_numpy()
+    won = _ticked(previous[WON_COLUMN]) if WON_COLUMN in previous.columns else False
+    return previous.assign(**{WON_COLUMN: won | on_tab})
+
+
+def carry_rep_edits(previous: pd.DataFrame | None, current: pd.DataFrame) -> pd.DataFrame:
+    """A rep tab's new rows with the previous tab's own columns carried over by quote.
+
+    Rows whose quote is gone take their edits with them, and the carried columns are kept
+    (blank) on an emptied tab so the writer clears them.
+    """
+    rows = current.reset_index(drop=True)
+    if previous is None or "Quote" not in previous.columns:
+        return rows
+    prev = previous.set_axis(_row_keys(previous["Quote"]), axis=0)
+    carried = prev.reindex(_row_keys(rows["Quote"]))
+    for col in prev.columns:
+        if col not in OUTPUT_COLUMNS:
+            rows[col] = carried[col].to_numpy()
+    if WON_COLUMN in prev.columns and WON_COLUMN in rows.columns:
+        rows[WON_COLUMN] = (_ticked(rows[WON_COLUMN]) | _ticked(carried[WON_COLUMN]).to_numpy()).to_numpy()
+    return rows
+
+
+def merge_followups(previous: pd.DataFrame | None, current: pd.DataFrame) -> tuple[pd.DataFrame, UpdateSummary]:
+    if previous is None or previous.empty or "Quote" not in previous.columns:
+        return current.reset_index(drop=True), UpdateSummary(kept=0, added=len(current), removed=0)
+
+    extra = [c for c in previous.columns if c not in OUTPUT_COLUMNS]
+    user_cols = [c for c in USER_COLUMNS if c in previous.columns] + extra
+    generated = [c for c in OUTPUT_COLUMNS if c not in user_cols]
+
+    prev = previous.reset_index(drop=True)
+    prev_keys = _row_keys(prev["Quote"])
+    cur = current.reset_index(drop=True)
+    cur_keys = _row_keys(cur["Quote"])
+
+    keep_mask = prev_keys.isin(set(cur_keys))
+    kept = prev[keep_mask].reindex(columns=OUTPUT_COLUMNS + extra)
+    fresh = cur.set_axis(cur_keys, axis=0)
+    kept[generated] = fresh.loc[prev_keys[keep_mask], generated].to_numpy()
+    for col in USER_COLUMNS:
+        if col not in prev.columns:
+            kept[col] = fresh.loc[prev_keys[keep_mask], col].to_numpy()
+
+    added = cur[~cur_keys.isin(set(prev_keys))].reindex(columns=OUTPUT_COLUMNS + extra)
+    merged = pd.concat([kept, added], ignore_index=True)
+    summary = UpdateSummary(kept=len(kept), added=len(added), removed=int((~keep_mask).sum()))
+    return merged, summary
@@ -0,0 +1,589 @@
+from __future__ import annotations
+
+"""Write output sheets into a copy of an xlsx template by patching its zip parts.
+
+Loading a template with openpyxl parses and re-serializes every summary sheet, chart and style
+although only the output sheets change. Here only the output worksheets, their table parts, the
+workbook part with its rels and content types (for new sheets) and, when a date format is
+missing, styles.xml are regenerated; every other part is copied unchanged, except the calculation
+chain and external links, which the openpyxl writer drops too. Cell values and header/table
+placement follow the openpyxl writer in `io_excel`. Templates using features this writer does not
+handle raise `TemplateNotPatchable`, and the caller falls back to openpyxl.
+"""
+
+from dataclasses import dataclass, field
+import datetime as dt
+import html
+import os
+import posixpath
+import re
+import tempfile
+import zipfile
+from numbers import Number
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE, TIME_FORMATS
+from openpyxl.compat import safe_string
+from openpyxl.styles.numbers import BUILTIN_FORMATS, BUILTIN_FORMATS_REVERSE, is_date_format, is_timedelta_format
+from openpyxl.utils import column_index_from_string, get_column_letter, range_boundaries
+from openpyxl.utils.datetime import MAC_EPOCH, WINDOWS_EPOCH, from_excel, to_excel
+
+from .io_excel import normalize_header, safe_excel_value, same_cell_value
+
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+WORKSHEET_REL = f"{REL_NS}/worksheet"
+WORKSHEET_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+
+_ATTR_RE = re.compile(r'([\w:.-]+)="([^"]*)"')
+_REL_RE = re.compile(r"<Relationship\b[^>]*?/>")
+_SHEET_RE = re.compile(r"<sheet\b[^>]*?/>")
+_SHEETDATA_RE = re.compile(r"<sheetData\s*/>|<sheetData\b[^>]*>(.*?)</sheetData>", re.S)
+_ROW_RE = re.compile(r"<row\b([^>]*?)(?:/>|>(.*?)</row>)", re.S)
+_CELL_RE = re.compile(r"<c\b([^>]*?)(?:/>|>(.*?)</c>)", re.S)
+_REF_RE = re.compile(r"([A-Z]{1,3})(\d+)$")
+_TEXT_RE = re.compile(r"<t\b[^>]*?(?:/>|>(.*?)</t>)", re.S)
+_PHONETIC_RE = re.compile(r"<rPh\b.*?</rPh>", re.S)
+_XF_RE = re.compile(r"<xf\b[^>]*?(?:/>|>.*?</xf>)", re.S)
+
+
+class TemplateNotPatchable(Exception):
+    """The template uses something the zip-level writer does not handle; use openpyxl instead."""
+
+
+def _attrs(tag: str) -> dict[str, str]:
+    return {k: html.unescape(v) for k, v in _ATTR_RE.findall(tag)}
+
+
+def _text(fragment: str) -> str:
+    return html.unescape("".join(t or "" for t in _TEXT_RE.findall(_PHONETIC_RE.sub("", fragment))))
+
+
+def _resolve(source_part: str, target: str) -> str:
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source_part), target))
+
+
+def _rels_path(part: str) -> str:
+    return posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+
+
+def _set_attr(tag: str, name: str, value: str) -> str:
+    """`tag` (an opening or empty element tag) with attribute `name` set to `value`."""
+    pattern = re.compile(rf'(\s{re.escape(name)}=")[^"]*(")')
+    if pattern.search(tag):
+        return pattern.sub(lambda m: m.group(1) + value + m.group(2), tag, count=1)
+    end = -2 if tag.endswith("/>") else -1
+    return f'{tag[:end]} {name}="{value}"{tag[end:]}'
+
+
+class _Package:
+    """Parts of the template zip, with replaced, added and dropped parts tracked separately."""
+
+    def __init__(self, archive: zipfile.ZipFile):
+        self.archive = archive
+        self.names = set(archive.namelist())
+        self.replaced: dict[str, str] = {}
+        self.dropped: set[str] = set()
+
+    def read(self, name: str) -> str:
+        if name in self.replaced:
+            return self.replaced[name]
+        try:
+            return self.archive.read(name).decode("utf-8")
+        except (KeyError, UnicodeDecodeError) as exc:
+            raise TemplateNotPatchable(f"cannot read part {name}") from exc
+
+    def write(self, name: str, text: str) -> None:
+        self.replaced[name] = text
+        self.names.add(name)
+
+    def save(self, path: Path) -> str:
+        """Write the patched package next to `path` and return the temporary file's name."""
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}-", suffix=".xlsx")
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as out:
+                for info in self.archive.infolist():
+                    if info.filename in self.dropped:
+                        continue
+                    if info.filename in self.replaced:
+                        out.writestr(info, self.replaced.pop(info.filename).encode("utf-8"))
+                    else:
+                        out.writestr(info, self.archive.read(info))
+                for name, text in self.replaced.items():
+                    out.writestr(name, text.encode("utf-8"))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return tmp
+
+
+class _Styles:
+    """Date detection for existing cells, and date formats added on demand (like openpyxl)."""
+
+    def __init__(self, package: _Package, part: str | None):
+        self.package = package
+        self.part = part
+        self.xml = package.read(part) if part else ""
+        xfs = re.search(r"<cellXfs\b[^>]*>(.*?)</cellXfs>", self.xml, re.S)
+        self.xfs = _XF_RE.findall(xfs.group(1)) if xfs else []
+        self.custom = {
+            int(a["numFmtId"]): a["formatCode"]
+            for a in map(_attrs, re.findall(r"<numFmt\b[^>]*?/>", self.xml))
+        }
+        self.added_xfs: list[str] = []
+        self.added_formats: dict[int, str] = {}
+        self._date_styles: dict[tuple[int, str], int] = {}
+
+    def number_format(self, style: int) -> str:
+        if style >= len(self.xfs):
+            return "General"
+        fmt_id = int(_attrs(self.xfs[style]).get("numFmtId", 0))
+        return self.custom.get(fmt_id) or BUILTIN_FORMATS.get(fmt_id, "General")
+
+    def is_date(self, style: int) -> bool:
+        return bool(style) and is_date_format(self.number_format(style))
+
+    def is_timedelta(self, style: int) -> bool:
+        return bool(style) and is_timedelta_format(self.number_format(style))
+
+    def date_style(self, style: int, value: object) -> int:
+        """The style to write `value` with: `style` itself if it is already a date format."""
+        if is_date_format(self.number_format(style)):
+            return style
+        fmt = TIME_FORMATS.get(type(value)) or next(TIME_FORMATS[b] for b in type(value).mro() if b in TIME_FORMATS)
+        key = (style, fmt)
+        if key not in self._date_styles:
+            if not self.xfs:
+                raise TemplateNotPatchable("template has no cell styles")
+            fmt_id = BUILTIN_FORMATS_REVERSE.get(fmt)
+            if fmt_id is None:
+                fmt_id = next((i for i, code in self.custom.items() if code == fmt), None)
+            if fmt_id is None:
+                fmt_id = max([163, *self.custom]) + 1
+                self.custom[fmt_id] = fmt
+                self.added_formats[fmt_id] = fmt
+            base = self.xfs[style] if style < len(self.xfs) else self.xfs[0]
+            head = re.match(r"<xf\b[^>]*?/?>", base).group(0)
+            patched = _set_attr(_set_attr(head, "numFmtId", str(fmt_id)), "applyNumberFormat", "1")
+            self.xfs.append(patched + base[len(head):])
+            self.added_xfs.append(patched + base[len(head):])
+            self._date_styles[key] = len(self.xfs) - 1
+        return self._date_styles[key]
+
+    def save(self) -> None:
+        if not self.added_xfs:
+            return
+        xml = self.xml
+        if self.added_formats:
+            new = "".join(f'<numFmt numFmtId="{i}" formatCode="{html.escape(code)}"/>' for i, code in self.added_formats.items())
+            block = re.search(r"<numFmts\b[^>]*>(.*?)</numFmts>", xml, re.S)
+            if block:
+                count = len(re.findall(r"<numFmt\b", block.group(1))) + len(self.added_formats)
+                head = _set_attr(re.match(r"<numFmts\b[^>]*>", block.group(0)).group(0), "count", str(count))
+                xml = xml[: block.start()] + head + block.group(1) + new + "</numFmts>" + xml[block.end():]
+            else:
+                root = re.search(r"<styleSheet\b[^>]*>", xml)
+                xml = xml[: root.end()] + f'<numFmts count="{len(self.added_formats)}">{new}</numFmts>' + xml[root.end():]
+        block = re.search(r"<cellXfs\b[^>]*>(.*?)</cellXfs>", xml, re.S)
+        head = _set_attr(re.match(r"<cellXfs\b[^>]*>", block.group(0)).group(0), "count", str(len(self.xfs)))
+        xml = xml[: block.start()] + head + block.group(1) + "".join(self.added_xfs) + "</cellXfs>" + xml[block.end():]
+        self.package.write(self.part, xml)
+
+
+@dataclass
+class _Row:
+    attrs: str
+    cells: dict[int, str]
+    raw: str | None = None
+    touched: bool = False
+
+
+@dataclass
+class _Table:
+    part: str
+    xml: str
+    ref: str
+
+
+@dataclass
+class _Sheet:
+    """One worksheet's XML with its rows parsed into cell XML per column."""
+
+    xml: str
+    book: "_Book"
+    tables: list[_Table] = field(default_factory=list)
+    rows: dict[int, _Row] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        match = _SHEETDATA_RE.search(self.xml)
+        if match is None:
+            raise TemplateNotPatchable("worksheet has no sheetData")
+        self._data_span = match.span()
+        for row in _ROW_RE.finditer(match.group(1) or ""):
+            attrs = _attrs(row.group(1))
+            body = row.group(2) or ""
+            cells: dict[int, str] = {}
+            for cell in _CELL_RE.finditer(body):
+                ref = _REF_RE.match(_attrs(cell.group(1)).get("r", ""))
+                if ref is None:
+                    raise TemplateNotPatchable("cell without a reference")
+                cells[column_index_from_string(ref.group(1))] = cell.group(0)
+            if _CELL_RE.sub("", body).strip() or "r" not in attrs:
+                raise TemplateNotPatchable("unsupported row content")
+            self.rows[int(attrs["r"])] = _Row(row.group(1), cells, raw=row.group(0))
+
+    @property
+    def max_row(self) -> int:
+        return max((r for r, row in self.rows.items() if row.cells), default=1)
+
+    @property
+    def max_column(self) -> int:
+        return max((max(row.cells) for row in self.rows.values() if row.cells), default=1)
+
+    def row_values(self, row: int) -> dict[int, object]:
+        cells = self.rows[row].cells if row in self.rows else {}
+        return {c: self.book.decode(xml) for c, xml in sorted(cells.items())}
+
+    def set_value(self, row: int, column: int, value: object) -> bool:
+        """Like `io_excel._set_cell_value`: only rewrite the cell when its value differs."""
+        value = _python_value(value)
+        current = self.rows.get(row)
+        old = current.cells.get(column) if current else None
+        if old is None:
+            if value is None or value == "":
+                return False
+            style = 0
+        else:
+            old_value = self.book.decode(old)
+            if same_cell_value(old_value, value):
+                return False
+            if re.search(r'<f\b[^>]*\bt="shared"[^>]*\bref="', old):
+                raise TemplateNotPatchable("overwriting a shared formula")
+            style = int(_attrs(re.match(r"<c\b[^>]*", old).group(0)).get("s", 0))
+        if current is None:
+            current = self.rows[row] = _Row("", {})
+        current.cells[column] = self.book.encode(f"{get_column_letter(column)}{row}", style, value)
+        current.touched = True
+        return True
+
+    def to_xml(self) -> str:
+        parts = []
+        for r in sorted(self.rows):
+            row = self.rows[r]
+            if not row.touched:
+                parts.append(row.raw)
+                continue
+            attrs = "".join(f' {k}="{v}"' for k, v in _ATTR_RE.findall(row.attrs) if k not in ("r", "spans"))
+            cells = "".join(row.cells[c] for c in sorted(row.cells))
+            parts.append(f'<row r="{r}"{attrs}>{cells}</row>' if cells else f'<row r="{r}"{attrs}/>')
+        start, end = self._data_span
+        xml = self.xml[:start] + "<sheetData>" + "".join(parts) + "</sheetData>" + self.xml[end:]
+
+        used = [(r, c) for r, row in self.rows.items() for c in row.cells]
+        if used:
+            rows = [r for r, _ in used]
+            cols = [c for _, c in used]
+            ref = f"{get_column_letter(min(cols))}{min(rows)}:{get_column_letter(max(cols))}{max(rows)}"
+        else:
+            ref = "A1"
+        return re.sub(r'(<dimension\b[^>]*\bref=")[^"]*(")', lambda m: m.group(1) + ref + m.group(2), xml, count=1)
+
+
+def _python_value(value: object) -> object:
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, pd.Timestamp):
+        value = value.to_pydatetime()
+    return value
+
+
+class _Book:
+    """Workbook-level state: shared strings, styles and the date epoch used to code cells."""
+
+    def __init__(self, package: _Package, workbook_part: str, rels: dict[str, tuple[str, str]]):
+        self.package = package
+        xml = package.read(workbook_part)
+        pr = re.search(r"<workbookPr\b[^>]*>", xml)
+        self.epoch = MAC_EPOCH if pr and _attrs(pr.group(0)).get("date1904") in ("1", "true") else WINDOWS_EPOCH
+        by_type = {rel_type.rsplit("/", 1)[-1]: target for rel_type, target in rels.values()}
+        self._shared_part = by_type.get("sharedStrings")
+        self._shared: list[str] | None = None
+        self.styles = _Styles(package, by_type.get("styles"))
+
+    @property
+    def shared_strings(self) -> list[str]:
+        if self._shared is None:
+            xml = self.package.read(self._shared_part) if self._shared_part else ""
+            self._shared = [_text(si) for si in re.findall(r"<si>(.*?)</si>|<si/>", xml, re.S)]
+        return self._shared
+
+    def decode(self, cell: str) -> object:
+        """The value openpyxl would read for `cell` (formulas as "=..." text)."""
+        match = _CELL_RE.match(cell)
+        attrs, body = _attrs(match.group(1)), match.group(2) or ""
+        formula = re.search(r"<f\b[^>]*?(?:/>|>(.*?)</f>)", body, re.S)
+        if formula is not None:
+            return "=" + html.unescape(formula.group(1) or "")
+        kind = attrs.get("t", "n")
+        if kind == "inlineStr":
+            inline = re.search(r"<is>(.*?)</is>", body, re.S)
+            return _text(inline.group(1)) if inline else None
+        raw = re.search(r"<v>(.*?)</v>", body, re.S)
+        if raw is None:
+            return None
+        text = html.unescape(raw.group(1))
+        if kind == "s":
+            return self.shared_strings[int(text)]
+        if kind in ("str", "e"):
+            return text
+        if kind == "b":
+            return text == "1"
+        if kind == "d":
+            return dt.datetime.fromisoformat(text)
+        number = float(text) if ("." in text or "E" in text or "e" in text) else int(text)
+        style = int(attrs.get("s", 0))
+        if self.styles.is_date(style):
+            return from_excel(number, self.epoch, timedelta=self.styles.is_timedelta(style))
+        return number
+
+    def encode(self, ref: str, style: int, value: object) -> str:
+        """Cell XML for `value`, written the way openpyxl writes it."""
+        if value is None or value == "":
+            return f'<c r="{ref}" s="{style}"/>' if style else f'<c r="{ref}"/>'
+        if isinstance(value, (dt.datetime, dt.date, dt.time, dt.timedelta)):
+            if getattr(value, "tzinfo", None) is not None:
+                raise TemplateNotPatchable("timezone-aware datetime")
+            style = self.styles.date_style(style, value)
+            return f'<c r="{ref}" s="{style}" t="n"><v>{safe_string(to_excel(value, self.epoch))}</v></c>'
+        s = f' s="{style}"' if style else ""
+        if isinstance(value, bool):
+            return f'<c r="{ref}"{s} t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, Number):
+            return f'<c r="{ref}"{s} t="n"><v>{safe_string(value)}</v></c>'
+        if isinstance(value, str):
+            if ILLEGAL_CHARACTERS_RE.search(value) or len(value) > 32767:
+                raise TemplateNotPatchable("string openpyxl would reject")
+            space = ' xml:space="preserve"' if value != value.strip() else ""
+            return f'<c r="{ref}"{s} t="inlineStr"><is><t{space}>{html.escape(value, quote=False)}</t></is></c>'
+        raise TemplateNotPatchable(f"unsupported cell value {type(value).__name__}")
+
+
+def _relationships(package: _Package, part: str) -> dict[str, tuple[str, str]]:
+    """Relationship id -> (type, resolved target part) for `part`."""
+    path = _rels_path(part)
+    if path not in package.names:
+        return {}
+    rels = {}
+    for tag in _REL_RE.findall(package.read(path)):
+        a = _attrs(tag)
+        if a.get("TargetMode") == "External":
+            continue
+        rels[a["Id"]] = (a["Type"], _resolve(part, a["Target"]))
+    return rels
+
+
+def _load_tables(package: _Package, sheet_part: str, xml: str) -> list[_Table]:
+    rels = _relationships(package, sheet_part)
+    tables = []
+    for rid in re.findall(r'<tablePart\b[^>]*?r:id="([^"]+)"', xml):
+        part = rels[rid][1]
+        table_xml = package.read(part)
+        head = _attrs(re.search(r"<table\b[^>]*>", table_xml).group(0))
+        if head.get("headerRowCount", "1") == "0" or int(head.get("totalsRowCount", "0") or 0):
+            raise TemplateNotPatchable("table without a header row or with a totals row")
+        tables.append(_Table(part, table_xml, head["ref"]))
+    return tables
+
+
+def _find_header_row_and_columns(sheet: _Sheet, columns: list[str], scan_rows: int = 80) -> tuple[int, dict[str, int]]:
+    targets = {normalize_header(c): c for c in columns}
+    best_row = 1
+    best_map: dict[str, int] = {}
+    for r in range(1, min(scan_rows, sheet.max_row) + 1):
+        found: dict[str, int] = {}
+        for c, value in sheet.row_values(r).items():
+            n = normalize_header(value)
+            if n in targets and targets[n] not in found:
+                found[targets[n]] = c
+        if len(found) > len(best_map):
+            best_row = r
+            best_map = found
+        if len(found) == len(columns):
+            return r, found
+    return best_row, best_map
+
+
+def _find_matching_table(sheet: _Sheet, cols: list[str]):
+    wanted = {normalize_header(c): c for c in cols}
+    for table in sheet.tables:
+        min_col, min_row, max_col, _ = range_boundaries(table.ref)
+        headers: dict[str, int] = {}
+        values = sheet.row_values(min_row)
+        for cidx in range(min_col, max_col + 1):
+            n = normalize_header(values.get(cidx))
+            if n in wanted:
+                headers[wanted[n]] = cidx
+        if all(c in headers for c in cols):
+            return table, min_row, headers
+    return None
+
+
+def _sync_rows(sheet: _Sheet, df: pd.DataFrame, data_start: int, positions: dict[str, int], old_last_row: int) -> int:
+    changed = 0
+    columns = [positions[str(c)] for c in df.columns]
+    for ridx, row in enumerate(df.itertuples(index=False, name=None), start=data_start):
+        row_changed = False
+        for column, value in zip(columns, row):
+            row_changed |= sheet.set_value(ridx, column, safe_excel_value(value))
+        changed += row_changed
+    for r in range(data_start + len(df), old_last_row + 1):
+        row_changed = False
+        for column in positions.values():
+            row_changed |= sheet.set_value(r, column, None)
+        changed += row_changed
+    return changed
+
+
+def _write_dataframe(sheet: _Sheet, df: pd.DataFrame) -> int:
+    """Same placement as `io_excel._write_dataframe_to_sheet`, on the parsed worksheet."""
+    cols = [str(c) for c in df.columns]
+    df = df.set_axis(cols, axis=1)
+    table_match = _find_matching_table(sheet, cols)
+    if table_match is not None:
+        table, header_row, positions = table_match
+        min_col, _, max_col, max_row = range_boundaries(table.ref)
+        used = set(positions.values())
+        table_positions = {c: positions[c] for c in cols}
+        table_positions.update({f"__blank_{c}": c for c in range(min_col, max_col + 1) if c not in used})
+        changed = _sync_rows(sheet, df.reindex(columns=list(table_positions)), header_row + 1, table_positions, max_row)
+        new_last_row = header_row + max(len(df), 1)
+        table.ref = f"{get_column_letter(min_col)}{header_row}:{get_column_letter(max_col)}{new_last_row}"
+        head = re.search(r"<table\b[^>]*>", table.xml)
+        xml = table.xml[: head.start()] + _set_attr(head.group(0), "ref", table.ref) + table.xml[head.end():]
+        table.xml = re.sub(r'(<autoFilter\b[^>]*\bref=")[^"]*(")', lambda m: m.group(1) + table.ref + m.group(2), xml, count=1)
+        return changed
+
+    header_row, existing = _find_header_row_and_columns(sheet, cols)
+    positions = existing.copy()
+    # New columns go after the header row's last label so template-only columns keep theirs.
+    labelled = [c for c, v in sheet.row_values(header_row).items() if v is not None] if existing else []
+    next_col = max([*existing.values(), *labelled], default=0) + 1
+    for col in cols:
+        if col not in positions:
+            positions[col] = next_col
+            next_col += 1
+    old_last_row = sheet.max_row
+    for col in cols:
+        sheet.set_value(header_row, positions[col], col)
+    return _sync_rows(sheet, df, header_row + 1, positions, old_last_row)
+
+
+_NEW_SHEET_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    f'xmlns:r="{REL_NS}"><dimension ref="A1"/><sheetViews><sheetView workbookViewId="0"/></sheetViews>'
+    '<sheetFormatPr defaultRowHeight="15"/><sheetData/>'
+    '<pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/></worksheet>'
+)
+
+
+def _insert_before(xml: str, closing: str, fragment: str) -> str:
+    at = xml.rfind(closing)
+    if at < 0:
+        raise TemplateNotPatchable(f"missing {closing}")
+    return xml[:at] + fragment + xml[at:]
+
+
+def _patch_package(package: _Package, sheets: dict[str, pd.DataFrame]) -> dict[str, int]:
+    root_rels = _relationships(package, "")
+    workbook_part = next((t for kind, t in root_rels.values() if kind.endswith("/officeDocument")), None)
+    if workbook_part is None:
+        raise TemplateNotPatchable("no workbook part")
+    workbook_xml = package.read(workbook_part)
+    if not re.search(r"<workbook\b", workbook_xml):
+        raise TemplateNotPatchable("prefixed workbook XML")
+    rels = _relationships(package, workbook_part)
+    book = _Book(package, workbook_part, rels)
+    rels_part = _rels_path(workbook_part)
+    rels_xml = package.read(rels_part)
+    content_types = package.read("[Content_Types].xml")
+
+    existing = {a["name"]: a for a in map(_attrs, _SHEET_RE.findall(workbook_xml))}
+    sheet_ids = [int(a["sheetId"]) for a in existing.values()]
+
+    changed: dict[str, int] = {}
+    for name, df in sheets.items():
+        if name in existing:
+            kind, part = rels[existing[name]["r:id"]]
+            if kind != WORKSHEET_REL:
+                raise TemplateNotPatchable(f"{name} is not a worksheet")
+            xml = package.read(part)
+            sheet = _Sheet(xml, book, _load_tables(package, part, xml))
+        else:
+            number = 1
+            while f"xl/worksheets/sheet{number}.xml" in package.names:
+                number += 1
+            part = f"xl/worksheets/sheet{number}.xml"
+            rid = 1
+            while f"rId{rid}" in rels:
+                rid += 1
+            sheet_id = max(sheet_ids, default=0) + 1
+            sheet_ids.append(sheet_id)
+            rels[f"rId{rid}"] = (WORKSHEET_REL, part)
+            target = posixpath.relpath(part, posixpath.dirname(workbook_part))
+            rels_xml = _insert_before(
+                rels_xml, "</Relationships>", f'<Relationship Id="rId{rid}" Type="{WORKSHEET_REL}" Target="{target}"/>'
+            )
+            workbook_xml = _insert_before(
+                workbook_xml, "</sheets>", f'<sheet name="{html.escape(name)}" sheetId="{sheet_id}" r:id="rId{rid}"/>'
+            )
+            content_types = _insert_before(
+                content_types, "</Types>", f'<Override PartName="/{part}" ContentType="{WORKSHEET_CONTENT_TYPE}"/>'
+            )
+            sheet = _Sheet(_NEW_SHEET_XML, book)
+        changed[name] = _write_dataframe(sheet, df)
+        package.write(part, sheet.to_xml())
+        for table in sheet.tables:
+            package.write(table.part, table.xml)
+
+    # Excel rebuilds the calculation chain; a stale one (cells no longer formulas) needs repair.
+    # External links are dropped, as the openpyxl writer does (`keep_links=False`).
+    for rid, (kind, part) in list(rels.items()):
+        if kind.endswith(("/calcChain", "/externalLink")):
+            package.dropped.update({part, _rels_path(part)})
+            rels_xml = re.sub(rf'<Relationship\b[^>]*\bId="{rid}"[^>]*/>', "", rels_xml)
+            content_types = re.sub(rf'<Override\b[^>]*PartName="/{re.escape(part)}"[^>]*/>', "", content_types)
+    workbook_xml = re.sub(r"<externalReferences>.*?</externalReferences>", "", workbook_xml, flags=re.S)
+
+    book.styles.save()
+    package.write(workbook_part, workbook_xml)
+    package.write(rels_part, rels_xml)
+    package.write("[Content_Types].xml", content_types)
+    return changed
+
+
+def patch_template(path: Path, sheets: dict[str, pd.DataFrame], template_path: Path) -> dict[str, int]:
+    """Write `sheets` into a copy of `template_path` at `path`; see the module docstring.
+
+    Returns the number of data rows that changed per sheet, like `io_excel.write_output`.
+    """
+    try:
+        archive = zipfile.ZipFile(template_path)
+    except zipfile.BadZipFile as exc:
+        raise TemplateNotPatchable("template is not a zip package") from exc
+    with archive:
+        package = _Package(archive)
+        try:
+            changed = _patch_package(package, sheets)
+        except (KeyError, ValueError, AttributeError, IndexError) as exc:
+            # Markup this writer's patterns do not expect; openpyxl can still read it.
+            raise TemplateNotPatchable(f"unexpected template markup: {exc!r}") from exc
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = package.save(path)
+    # Replaced only after the template is closed: `--update` may patch the output in place.
+    os.replace(tmp, path)
+    return changed
@@ -0,0 +1,11 @@
+import pytest
+
+from followup_quotes.cache import CACHE_ENV_VAR
+from followup_quotes.history import HISTORY_ENV_VAR
+
+
+@pytest.fixture(autouse=True)
+def _isolated_run_history(tmp_path, monkeypatch):
+    # Keep workbook runs in tests from appending to the user's real run history.
+    monkeypatch.setenv(HISTORY_ENV_VAR, str(tmp_path / "history.jsonl"))
+    monkeypatch.setenv(CACHE_ENV_VAR, str(tmp_path / "run-cache"))
@@ -0,0 +1,127 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from followup_quotes.aliases import CustomerAliases
+from followup_quotes.app import generate_followup_result
+from followup_quotes.config import RunConfig
+from followup_quotes.matching import run_matching
+
+QMAP = {
+    "quote_number": "Quote #",
+    "customer": "Customer",
+    "quote_amount": "Amount",
+    "date_quoted": "Date Quoted",
+    "entry_person_name": "Entry Person Name",
+}
+OMAP = {"order_id": "Order Number", "customer": "Customer", "net": "Net Amount"}
+
+
+def _inputs(quote_customer: str, order_customer: str):
+    quotes = pd.DataFrame(
+        {
+            "Quote #": ["Q1"],
+            "Customer": [quote_customer],
+            "Amount": [4000],
+            "Date Quoted": ["2024-01-01"],
+            "Entry Person Name": ["Reid Kincaid"],
+        }
+    )
+    orders = pd.DataFrame({"Order Number": [1], "Customer": [order_customer], "Net Amount": [4000]})
+    return quotes, orders
+
+
+def _cfg(aliases: CustomerAliases | None, **kwargs) -> RunConfig:
+    return RunConfig(
+        quotes_path=Path("q.xlsx"),
+        orders_path=Path("o.xlsx"),
+        out_path=Path("x.xlsx"),
+        reps=["Reid Kincaid"],
+        aliases=aliases,
+        **kwargs,
+    )
+
+
+def test_alias_file_is_normalized_and_chains_are_followed(tmp_path: Path):
+    path = tmp_path / "customer_aliases.json"
+    path.write_text(json.dumps({"Acme Ind.": "ACME INDUSTRIES", "Acme Industries": "Acme Holdings"}), encoding="utf-8")
+
+    aliases = CustomerAliases.from_json(path)
+    keys = aliases.canonicalize(pd.Series(["ACME IND", "acme ind", None, "Beta"]))
+
+    assert list(keys) == ["ACMEHOLDINGS", "ACMEHOLDINGS", "", "BETA"]
+
+
+def test_aliases_are_applied_before_matching(tmp_path: Path):
+    quotes, orders = _inputs("ACME IND", "ACME INDUSTRIES")
+
+    plain = run_matching(quotes, orders, QMAP, OMAP, _cfg(None))
+    aliased = run_matching(quotes, orders, QMAP, OMAP, _cfg(CustomerAliases(entries={"ACME IND": "ACME INDUSTRIES"})))
+
+    assert list(plain.followups["Quote"]) == ["Q1"]
+    assert aliased.followups.empty
+
+
+def test_fuzzy_confirmed_match_is_learned_and_saved(tmp_path: Path):
+    pytest.importorskip("rapidfuzz")
+    path = tmp_path / "customer_aliases.json"
+    quotes, orders = _inputs("ACME INDUSTRIE", "ACME INDUSTRIES")
+    aliases = CustomerAliases.from_json(path)
+
+    out = run_matching(quotes, orders, QMAP, OMAP, _cfg(aliases, fuzzy=True, fuzzy_threshold=90))
+    aliases.save()
+
+    assert out.followups.empty
+    assert json.loads(path.read_text(encoding="utf-8")) == {"ACMEINDUSTRIE": "ACMEINDUSTRIES"}
+    again = run_matching(quotes, orders, QMAP, OMAP, _cfg(CustomerAliases.from_json(path)))
+    assert again.followups.empty
+
+
+def test_fuzzy_run_without_alias_file_creates_one(tmp_path: Path, monkeypatch):
+    pytest.importorskip("rapidfuzz")
+    monkeypatch.chdir(tmp_path)
+    quotes, orders = _inputs("ACME INDUSTRIE", "ACME INDUSTRIES")
+    quotes.to_excel(tmp_path / "quotes.xlsx", index=False)
+    orders.to_excel(tmp_path / "orders.xlsx", index=False)
+    cfg = RunConfig(
+        quotes_path=tmp_path / "quotes.xlsx",
+        orders_path=tmp_path / "orders.xlsx",
+        out_path=tmp_path / "out.xlsx",
+        reps=["Reid Kincaid"],
+        fuzzy=True,
+        use_cache=False,
+        record_history=False,
+    )
+
+    _, result = generate_followup_result(cfg)
+
+    assert result.followups.empty
+    alias_file = tmp_path / "assets" / "customer_aliases.json"
+    assert json.loads(alias_file.read_text(encoding="utf-8")) == {"ACMEINDUSTRIE": "ACMEINDUSTRIES"}
+    # The learned spelling is picked up by the next run without --fuzzy.
+    _, again = generate_followup_result(RunConfig(**{**cfg.__dict__, "fuzzy": False}))
+    assert again.followups.empty
+
+
+def test_learned_aliases_resolve_like_a_reloaded_table(monkeypatch):
+    aliases = CustomerAliases(entries={"Acme Ind": "Acme Industries"})
+    assert aliases.canonical("acme ind.") == "ACMEINDUSTRIES"  # memoized before the table changes
+
+    def no_rebuild():
+        raise AssertionError("learn should only update the affected entries")
+
+    monkeypatch.setattr(aliases, "_rebuild", no_rebuild)
+    aliases.learn("ACMECO", "ACMEIND")  # resolves through the existing chain
+    aliases.learn("ACMEINDUSTRIES", "ACMEHOLDINGS")  # re-points everything that ended at ACMEINDUSTRIES
+    aliases.learn("BETA", "BETALLC")
+    monkeypatch.undo()
+    aliases.learn("BETALLC", "BETA")  # closes a cycle
+
+    reloaded = CustomerAliases(entries=dict(aliases.entries))
+    assert aliases.resolved() == reloaded.resolved()
+    assert aliases.resolved()["ACMECO"] == "ACMEHOLDINGS"
+    names = ["acme ind.", "ACME CO", "Acme Industries", "Beta", "Beta LLC", "Gamma"]
+    assert [aliases.canonical(n) for n in names] == [reloaded.canonical(n) for n in names]
+    assert aliases.canonical("acme ind.") == "ACMEHOLDINGS"
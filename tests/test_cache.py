@@ -0,0 +1,107 @@
+from dataclasses import replace
+from pathlib import Path
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from followup_quotes import app
+from followup_quotes.app import generate_followup_result
+from followup_quotes.cache import RunCache, _package_fingerprint, run_cache_key
+from followup_quotes.config import RunConfig
+from followup_quotes.matching import MatchResult
+
+
+def _inputs(tmp_path: Path) -> RunConfig:
+    pd.DataFrame(
+        {
+            "Quote #": ["Q1", "Q2"],
+            "Customer": ["Acme", "Beta"],
+            "Amount": [4000, 4100],
+            "Date Quoted": ["2024-01-01", "2024-01-02"],
+            "Entry Person Name": ["Reid Kincaid", "Reid Kincaid"],
+        }
+    ).to_excel(tmp_path / "quotes.xlsx", index=False)
+    pd.DataFrame({"Order Number": [1], "Customer": ["ACME"], "Net Amount": [4000]}).to_excel(
+        tmp_path / "orders.xlsx", index=False
+    )
+    return RunConfig(
+        quotes_path=tmp_path / "quotes.xlsx",
+        orders_path=tmp_path / "orders.xlsx",
+        out_path=tmp_path / "out.xlsx",
+        reps=["Reid Kincaid"],
+        record_history=False,
+    )
+
+
+def test_identical_run_is_served_from_cache(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cfg = _inputs(tmp_path)
+    _, first = generate_followup_result(cfg)
+
+    def no_reading(cfg):
+        raise AssertionError("cache hit should not read the inputs")
+
+    monkeypatch.setattr(app, "_read_inputs", no_reading)
+    out, cached = generate_followup_result(replace(cfg, out_path=tmp_path / "again" / "out.xlsx"))
+    assert out.read_bytes() == (tmp_path / "out.xlsx").read_bytes()
+    pd.testing.assert_frame_equal(cached.followups, first.followups)
+
+    # Anything that changes the output misses: settings, input content, or the cache being disabled.
+    with pytest.raises(AssertionError, match="cache hit"):
+        generate_followup_result(replace(cfg, tolerance=5))
+    pd.DataFrame({"Order Number": [1], "Customer": ["ACME"], "Net Amount": [4100]}).to_excel(
+        tmp_path / "orders.xlsx", index=False
+    )
+    with pytest.raises(AssertionError, match="cache hit"):
+        generate_followup_result(cfg)
+    with pytest.raises(AssertionError, match="cache hit"):
+        generate_followup_result(replace(cfg, use_cache=False))
+
+
+def test_cache_key_ignores_output_only_settings(tmp_path: Path):
+    cfg = _inputs(tmp_path)
+    key = run_cache_key(cfg, None)
+    assert run_cache_key(replace(cfg, out_path=tmp_path / "x.xlsx", workers=4, record_history=True), None) == key
+    assert run_cache_key(replace(cfg, debug=True), None) != key
+    assert run_cache_key(cfg, tmp_path / "orders.xlsx") != key  # template content counts
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path: Path):
+    workbook = tmp_path / "book.xlsx"
+    workbook.write_bytes(b"x" * 1000)
+    result = MatchResult(followups=pd.DataFrame({"Quote": ["Q1"]}), meta=pd.DataFrame(), debug=None)
+    cache = RunCache(tmp_path / "cache", max_bytes=10**9)
+    cache.put("a", workbook, result)
+    entry_bytes = sum(p.stat().st_size for p in cache.directory.iterdir())
+    cache.put("b", workbook, result)
+    for age, key in enumerate(("b", "a"), start=1):
+        os.utime(cache.directory / f"{key}.pkl", (1_000_000 - age, 1_000_000 - age))
+    cache.max_bytes = 2 * entry_bytes
+
+    assert cache.get("a", tmp_path / "hit.xlsx") is not None  # "a" becomes the most recently used
+    cache.put("c", workbook, result)
+
+    assert cache.get("b", tmp_path / "miss.xlsx") is None
+    assert cache.get("a", tmp_path / "hit.xlsx") is not None
+    assert cache.get("c", tmp_path / "hit.xlsx") is not None
+
+
+def test_unloadable_cache_entry_is_discarded_and_rebuilt(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cfg = replace(_inputs(tmp_path), cache_dir=tmp_path / "cache")
+    _, first = generate_followup_result(cfg)
+    (entry,) = (tmp_path / "cache").glob("*.pkl")
+    # An entry pickled against a module layout that no longer exists.
+    entry.write_bytes(b"cfollowup_quotes_gone\nMatchResult\n.")
+
+    _, again = generate_followup_result(cfg)
+
+    pd.testing.assert_frame_equal(again.followups, first.followups)
+    assert isinstance(RunCache(tmp_path / "cache", 10**9).get(entry.stem, tmp_path / "hit.xlsx"), MatchResult)
+
+
+def test_cache_key_includes_pandas_and_numpy_versions():
+    assert f"pandas{pd.__version__}" in _package_fingerprint()
+    assert f"numpy{np.__version__}" in _package_fingerprint()
@@ -0,0 +1,234 @@
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from followup_quotes import app
+from followup_quotes.app import generate_followup_result
+from followup_quotes.config import RunConfig
+from followup_quotes.io_excel import normalize_customer, parse_money_cents
+from followup_quotes.matching import run_matching
+
+pytest.importorskip("duckdb")
+
+from followup_quotes.engine_duckdb import duckdb_inputs, run_matching_duckdb  # noqa: E402
+
+QMAP = {
+    "quote_number": "Quote #",
+    "customer": "Customer",
+    "quote_amount": "Amount",
+    "date_quoted": "Date Quoted",
+    "entry_person_name": "Entry Person Name",
+}
+OMAP = {"order_id": "Order Number", "customer": "Customer", "net": "Net Amount"}
+REPS = ["Reid Kincaid", "Eric Simpson"]
+
+
+def _synthetic_inputs(n_quotes: int = 400, n_orders: int = 900):
+    rng = np.random.default_rng(7)
+    names = np.array(["Acme, Inc.", "ACME INC", "Beta LLC", "Gamma Co", "Délta GmbH", None], dtype=object)
+    amounts = rng.integers(500, 8000, n_quotes).astype(object)
+    amounts[::17] = "$2,500.00"
+    amounts[::23] = "n/a"
+    quotes = pd.DataFrame(
+        {
+            "Quote #": [f"Q{i}" for i in range(n_quotes)],
+            "Customer": names[rng.integers(0, len(names), n_quotes)],
+            "Amount": amounts,
+            "Date Quoted": pd.date_range("2024-01-01", periods=n_quotes, freq="D").strftime("%Y-%m-%d"),
+            "Entry Person Name": np.array(REPS + ["Someone Else"], dtype=object)[rng.integers(0, 3, n_quotes)],
+        },
+        dtype=object,
+    )
+    nets = rng.integers(100, 4000, n_orders).astype(object)
+    nets[::31] = None
+    orders = pd.DataFrame(
+        {
+            "Order Number": rng.integers(0, 300, n_orders).astype(object),
+            "Customer": names[rng.integers(0, len(names), n_orders)],
+            "Net Amount": nets,
+        },
+        dtype=object,
+    )
+    return quotes, orders
+
+
+def _cfg(**kwargs) -> RunConfig:
+    return RunConfig(
+        quotes_path=Path("q.xlsx"),
+        orders_path=Path("o.xlsx"),
+        out_path=Path("x.xlsx"),
+        reps=REPS,
+        tolerance=25,
+        relative_tolerance=0.02,
+        debug=True,
+        **kwargs,
+    )
+
+
+def _run_duckdb(quotes, orders, qmap, omap, cfg, chunk_rows: int = 97):
+    """Feed both frames to the DuckDB engine in chunks, as the app streams an export."""
+    with duckdb_inputs(cfg) as (quotes_in, orders_in):
+        for start in range(0, max(len(quotes), 1), chunk_rows):
+            quotes_in.add(quotes.iloc[start:start + chunk_rows], qmap, 0)
+        for start in range(0, max(len(orders), 1), chunk_rows):
+            orders_in.add(orders.iloc[start:start + chunk_rows], omap, 0)
+        return run_matching_duckdb(quotes_in, orders_in, qmap, omap, cfg)
+
+
+def _assert_same(pandas_result, duckdb_result):
+    assert duckdb_result.counts == pandas_result.counts
+    pd.testing.assert_frame_equal(pandas_result.followups, duckdb_result.followups)
+    pd.testing.assert_frame_equal(pandas_result.debug, duckdb_result.debug)
+    strip_engine = lambda meta: meta[meta["Metric"] != "engine"].reset_index(drop=True)  # noqa: E731
+    pd.testing.assert_frame_equal(strip_engine(pandas_result.meta), strip_engine(duckdb_result.meta))
+
+
+def test_duckdb_engine_matches_pandas_engine_output():
+    quotes, orders = _synthetic_inputs()
+    cfg = _cfg()
+
+    expected = run_matching(quotes, orders, QMAP, OMAP, cfg)
+    actual = _run_duckdb(quotes, orders, QMAP, OMAP, replace(cfg, engine="duckdb"))
+
+    assert len(expected.followups) > 0
+    assert expected.debug["Matched"].any()
+    _assert_same(expected, actual)
+
+
+def test_duckdb_engine_matches_pandas_without_order_ids_and_with_date_range():
+    quotes, orders = _synthetic_inputs()
+    omap = {"customer": "Customer", "net": "Net Amount"}
+    cfg = _cfg(since=date(2024, 3, 1), until=date(2024, 6, 30))
+
+    expected = run_matching(quotes, orders, QMAP, omap, cfg)
+    actual = _run_duckdb(quotes, orders, QMAP, omap, replace(cfg, engine="duckdb"))
+
+    _assert_same(expected, actual)
+
+
+def test_duckdb_engine_matches_pandas_with_latest_revision():
+    quotes, orders = _synthetic_inputs()
+    quotes["Quote #"] = [f"Q{i // 3}" for i in range(len(quotes))]
+    quotes["Rev"] = [i % 3 for i in range(len(quotes))][::-1]
+    qmap = {**QMAP, "rev": "Rev"}
+    cfg = _cfg(latest_revision="rev")
+
+    expected = run_matching(quotes, orders, qmap, OMAP, cfg)
+    actual = _run_duckdb(quotes, orders, qmap, OMAP, replace(cfg, engine="duckdb"))
+
+    assert expected.debug["Quote"].is_unique
+    _assert_same(expected, actual)
+
+
+def test_duckdb_engine_normalizes_non_ascii_customers_like_pandas():
+    # Python upper-cases "ß" to "SS" and the "ﬁ" ligature to "FI"; SQL upper() does neither.
+    quotes = pd.DataFrame(
+        {
+            "Quote #": ["Q1", "Q2", "Q3", "Q4"],
+            "Customer": ["Straße GmbH", "ﬁrm Supply", "Ærø Ltd", None],
+            "Amount": [4000, 5000, 6000, 7000],
+            "Date Quoted": ["2024-01-01"] * 4,
+            "Entry Person Name": ["Reid Kincaid"] * 4,
+        },
+        dtype=object,
+    )
+    orders = pd.DataFrame(
+        {
+            "Order Number": [1, 2, 3, 4],
+            "Customer": ["STRASSE GMBH", "FIRM SUPPLY", "ærø ltd.", None],
+            "Net Amount": [4000, 5000, 6000, 7000],
+        },
+        dtype=object,
+    )
+    cfg = _cfg()
+
+    expected = run_matching(quotes, orders, QMAP, OMAP, cfg)
+    actual = _run_duckdb(quotes, orders, QMAP, OMAP, replace(cfg, engine="duckdb"))
+
+    assert expected.debug["Matched"].all()
+    _assert_same(expected, actual)
+
+
+def test_duckdb_macros_parse_text_like_the_pandas_helpers(tmp_path: Path):
+    customers = ["Straße", "ﬁrm", "Ærø Ltd.", "ŉ-Co", "Acme_Inc", "ΐ Corp", " Beta　", "Ab́c", "123", ""]
+    amounts = ["$1,234.50", "(75.00)", " 4100.57 ", "1_000", "1e3", "inf", "nan", "46116860184273879.04", "n/a", "2.675"]
+    texts = pd.Series(customers + amounts + [None], dtype="string")
+    with duckdb_inputs(_cfg(spill_dir=tmp_path)) as (quotes_in, _):
+        quotes_in.con.register("t", pd.DataFrame({"s": texts}))
+        keys, cents, stripped = zip(
+            *quotes_in.con.execute("SELECT customer_text_key(s), money_cents(s), py_strip(s) FROM t").fetchall()
+        )
+
+    values = texts.astype(object).where(texts.notna(), None)
+    assert list(keys) == [normalize_customer(v) for v in values]
+    assert [pd.NA if c is None else c for c in cents] == parse_money_cents(values).tolist()
+    assert list(stripped) == [None if v is None else v.strip() for v in values]
+
+
+def _excel_inputs(tmp_path: Path) -> RunConfig:
+    quotes, orders = _synthetic_inputs(n_quotes=120, n_orders=260)
+    quotes["Rev"] = [i % 3 for i in range(len(quotes))]
+    quotes.iloc[:70].to_excel(tmp_path / "quotes_a.xlsx", index=False)
+    later = quotes.iloc[60:].copy()  # Q60-Q69 are re-exported with new amounts
+    later.loc[later.index[:10], "Amount"] = 3000
+    later.to_excel(tmp_path / "quotes_b.xlsx", index=False)
+    orders.iloc[:150].to_excel(tmp_path / "orders_a.xlsx", index=False)
+    orders.iloc[120:].to_excel(tmp_path / "orders_b.xlsx", index=False)
+    return RunConfig(
+        quotes_path=tmp_path / "quotes_a.xlsx",
+        orders_path=tmp_path / "orders_a.xlsx",
+        extra_quotes_paths=[tmp_path / "quotes_b.xlsx"],
+        extra_orders_paths=[tmp_path / "orders_b.xlsx"],
+        out_path=tmp_path / "out.xlsx",
+        reps=REPS,
+        tolerance=25,
+        relative_tolerance=0.02,
+        use_cache=False,
+        record_history=False,
+    )
+
+
+def _values(df: pd.DataFrame) -> pd.DataFrame:
+    # The pandas engine's reader and the streamed chunks may infer different column dtypes.
+    df = df.reset_index(drop=True).astype(object)
+    return df.where(df.notna(), None)
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [
+        {},
+        {"debug": True, "since": date(2024, 2, 1), "until": date(2024, 3, 31)},
+        {"latest_revision": "rev", "max_per_rep": 3, "rank_by": "customer_total", "full_followup_sheet": True},
+    ],
+)
+def test_duckdb_engine_streams_exports_instead_of_loading_them(tmp_path: Path, monkeypatch, settings):
+    cfg = replace(_excel_inputs(tmp_path), **settings)
+    _, expected = generate_followup_result(cfg)
+
+    def no_full_read(cfg):
+        raise AssertionError("the duckdb engine must not load whole exports into pandas")
+
+    monkeypatch.setattr(app, "_read_inputs", no_full_read)
+    order_chunks = app._order_chunks
+    monkeypatch.setattr(app, "_order_chunks", lambda cfg: order_chunks(cfg, chunk_bytes=2000))
+    _, actual = generate_followup_result(
+        replace(cfg, engine="duckdb", out_path=tmp_path / "duckdb.xlsx", spill_dir=tmp_path / "db")
+    )
+
+    assert 0 < expected.counts["quotes_matched"] < expected.counts["quotes_in_date_range"]
+    assert actual.counts == expected.counts
+    for got, want in [
+        (actual.followups, expected.followups),
+        (actual.debug, expected.debug),
+        (actual.rep_followups, expected.rep_followups),
+    ]:
+        if want is None:
+            assert got is None
+        else:
+            pd.testing.assert_frame_equal(_values(got), _values(want))
+    assert list((tmp_path / "db").iterdir()) == []  # the database is removed after the run
@@ -0,0 +1,155 @@
+from dataclasses import replace
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from followup_quotes.app import generate_followup_workbook, generate_followup_workbooks, generate_sweep_workbook
+from followup_quotes.cli import main
+from followup_quotes.config import RunConfig
+from followup_quotes.history import load_history, peak_rss_bytes
+
+
+def _write_inputs(tmp_path: Path) -> tuple[Path, Path]:
+    quotes_path = tmp_path / "quotes.xlsx"
+    orders_path = tmp_path / "orders.xlsx"
+    pd.DataFrame(
+        {
+            "Quote #": ["Q1", "Q2", "Q3"],
+            "Customer": ["Acme", "Beta", "Beta"],
+            "Amount": [4000, 4100, 100],
+            "Date Quoted": ["2024-01-01", "2024-01-02", "2024-01-03"],
+            "Entry Person Name": ["Reid Kincaid", "Eric Simpson", "Eric Simpson"],
+        }
+    ).to_excel(quotes_path, index=False)
+    pd.DataFrame({"Order Number": [1], "Customer": ["ACME"], "Net Amount": [4000]}).to_excel(orders_path, index=False)
+    return quotes_path, orders_path
+
+
+def test_run_appends_history_record_and_prometheus_textfile(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    quotes_path, orders_path = _write_inputs(tmp_path)
+    history = tmp_path / "runs.jsonl"
+    prom = tmp_path / "followup.prom"
+    cfg = RunConfig(
+        quotes_path=quotes_path,
+        orders_path=orders_path,
+        out_path=tmp_path / "out.xlsx",
+        reps=["Reid Kincaid", "Eric Simpson"],
+        history_path=history,
+        prometheus_textfile=prom,
+    )
+
+    generate_followup_workbook(cfg)
+    generate_followup_workbook(cfg)
+
+    records = load_history(history)
+    assert len(records) == 2
+    rec = records[-1]
+    assert rec["counts"]["quotes_read"] == 3
+    assert rec["counts"]["quotes_over_floor"] == 2
+    assert rec["counts"]["followups"] == 1
+    assert rec["followups_per_rep"] == {"Eric Simpson": 1}
+    assert set(records[0]["stage_seconds"]) == {"cache", "read", "match", "write", "total"}
+    assert set(rec["stage_seconds"]) == {"cache", "total"}  # the identical second run is served from the run cache
+    assert rec["input_bytes"]["quotes"] == quotes_path.stat().st_size
+    assert rec["config"]["floor"] == 1500.0
+    assert 'followup_quotes_followups{rep="Eric Simpson"} 1' in prom.read_text(encoding="utf-8")
+
+
+def test_stats_command_summarizes_last_runs(tmp_path: Path, capsys):
+    history = tmp_path / "runs.jsonl"
+    history.write_text(
+        "\n".join(
+            json.dumps({"timestamp": f"2024-01-0{i}T00:00:00+00:00", "counts": {"followups": i}, "stage_seconds": {"total": i}})
+            for i in range(1, 5)
+        ),
+        encoding="utf-8",
+    )
+
+    assert main(["stats", "--history", str(history), "--last", "2"]) == 0
+
+    out = capsys.readouterr().out
+    assert "2024-01-04" in out and "2024-01-03" in out
+    assert "2024-01-02" not in out
+
+    assert load_history(history, 0) == []
+    assert len(load_history(history, 10)) == 4
+    assert main(["stats", "--history", str(history), "--last", "0"]) == 0
+    assert "No runs recorded" in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        main(["stats", "--history", str(history), "--last", "-1"])
+
+
+def test_peak_rss_is_not_inherited_from_the_parent_process():
+    if not Path("/proc/self/status").exists():
+        pytest.skip("VmHWM is Linux-only")
+    ballast = bytearray(300 * 2**20)
+    for page in range(0, len(ballast), 4096):
+        ballast[page] = 1  # make every page resident
+    child = subprocess.run(
+        [sys.executable, "-c", "from followup_quotes.history import peak_rss_bytes; print(peak_rss_bytes())"],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    # ru_maxrss would report at least the parent's 300 MB here, across fork and exec.
+    assert int(child.stdout) < 200 * 2**20 < peak_rss_bytes()
+
+
+def test_history_records_rows_changed_by_an_update(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    quotes_path, orders_path = _write_inputs(tmp_path)
+    history = tmp_path / "runs.jsonl"
+    out_path = tmp_path / "out.xlsx"
+    cfg = RunConfig(
+        quotes_path=quotes_path,
+        orders_path=orders_path,
+        out_path=out_path,
+        reps=["Reid Kincaid", "Eric Simpson"],
+        history_path=history,
+        use_cache=False,
+    )
+    generate_followup_workbook(cfg)
+    meta_rows = len(pd.read_excel(out_path, sheet_name="_Meta"))
+
+    # Same inputs: the follow-up and rep-tab rows are already correct, only _Meta gains update_* rows.
+    generate_followup_workbook(replace(cfg, update_path=out_path))
+
+    fresh, update = load_history(history)
+    assert fresh["counts"]["rows_changed"] == meta_rows + 2  # Follow-Up and Eric Simpson's tab, one row each
+    assert update["counts"]["rows_changed"] == 3
+
+
+def test_windowed_and_sweep_runs_record_input_counts(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    quotes_path, orders_path = _write_inputs(tmp_path)
+    history = tmp_path / "runs.jsonl"
+    cfg = RunConfig(
+        quotes_path=quotes_path,
+        orders_path=orders_path,
+        out_path=tmp_path / "out.xlsx",
+        reps=["Reid Kincaid", "Eric Simpson"],
+        history_path=history,
+    )
+
+    assert len(generate_followup_workbooks(replace(cfg, window="daily"))) == 2
+    generate_sweep_workbook(replace(cfg, out_path=tmp_path / "sweep.xlsx", sweep_floors=[0, 1500]))
+
+    windowed, sweep = load_history(history)
+    # Shared input counts are recorded once, not once per window.
+    assert windowed["counts"]["quotes_read"] == 3
+    assert windowed["counts"]["orders_read"] == 1
+    assert windowed["counts"]["quotes_over_floor"] == 2
+    assert windowed["counts"]["quotes_in_date_range"] == 2
+    assert windowed["counts"]["quotes_matched"] == 1
+    assert windowed["counts"]["followups"] == 1
+    assert windowed["followups_per_rep"] == {"Eric Simpson": 1}
+    assert sweep["counts"]["quotes_read"] == 3
+    assert sweep["counts"]["quotes_over_floor"] == 3
+    assert sweep["counts"]["orders_read"] == 1
+    assert sweep["counts"]["grid_points"] == 2
+    assert set(sweep["stage_seconds"]) == {"read", "match", "write", "total"}
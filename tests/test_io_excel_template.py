@@ -1,12 +1,27 @@
+from dataclasses import replace
 from pathlib import Path
 
+from datetime import date, datetime
+import zipfile
+
 from openpyxl import Workbook, load_workbook
+from openpyxl.chart import BarChart, Reference
 from openpyxl.worksheet.table import Table, TableStyleInfo
 import pandas as pd
-
-from followup_quotes.app import generate_followup_workbook, resolve_template_path
-from followup_quotes.config import RunConfig
-from followup_quotes.io_excel import write_output
+import pytest
+
+from followup_quotes.app import _read_inputs, generate_followup_workbook, make_run_config, resolve_template_path
+from followup_quotes.config import ORDER_SYNONYMS, FollowupError, RunConfig
+from followup_quotes import io_excel, xlsx_patch
+from followup_quotes.io_excel import (
+    HeaderSpec,
+    combine_parts,
+    expand_input_paths,
+    locate_header,
+    read_excel,
+    read_excel_parts,
+    write_output,
+)
 
 
 def test_write_output_preserves_template_formula_sheet_and_checkbox_column(tmp_path: Path):
@@ -89,6 +104,120 @@ def test_generate_followup_workbook_creates_per_rep_tabs(tmp_path: Path, monkeyp
     assert wb["Eric Simpson"]["A2"].value == "Q2"
 
 
+def _chart_template(tmp_path: Path) -> Path:
+    wb = Workbook()
+    summary = wb.active
+    summary.title = "Summary"
+    summary.append(["Count", "=COUNTA('Follow-Up'!A:A)-3"])
+    for i in range(4):
+        summary.append([f"row {i}", i])
+    chart = BarChart()
+    chart.add_data(Reference(summary, min_col=2, min_row=2, max_row=5))
+    summary.add_chart(chart, "D2")
+
+    ws = wb.create_sheet("Follow-Up")
+    ws.append(["Open quotes"])
+    ws.append([])
+    ws.append(["Quote", "Customer", "Quote Amount", "Date Quoted", "Entry Person Name", "Won by Follow Up?", "Notes"])
+    for i in range(6):
+        ws.append([f"old{i}", "X", i, datetime(2023, 1, 1), "Reid Kincaid", False, f'=A{4 + i}&"!"'])
+    table = Table(displayName="FollowUps", ref="A3:G9")
+    table.tableStyleInfo = TableStyleInfo(name="TableStyleMedium2", showRowStripes=True)
+    ws.add_table(table)
+    meta = wb.create_sheet("_Meta")
+    meta.append(["Metric", "Value"])
+    meta.append(["stale", 1])
+    meta.append(["stale too", 2])
+    path = tmp_path / "chart_template.xlsx"
+    wb.save(path)
+    return path
+
+
+def _cell_values(path: Path) -> dict[str, object]:
+    wb = load_workbook(path)
+    return {
+        ws.title: (
+            {
+                c.coordinate: (getattr(c.value, "text", c.value), c.number_format)
+                for row in ws.iter_rows()
+                for c in row
+                if c.value is not None
+            },
+            {name: ws.tables[name].ref for name in ws.tables},
+        )
+        for ws in wb.worksheets
+    }
+
+
+@pytest.mark.parametrize("template", ["chart", "assets"])
+def test_write_output_patches_template_like_openpyxl(tmp_path: Path, monkeypatch, template: str):
+    template_path = (
+        _chart_template(tmp_path)
+        if template == "chart"
+        else Path(__file__).resolve().parents[1] / "assets" / "Parts Follow Up Template.xlsx"
+    )
+    followups = pd.DataFrame(
+        {
+            "Quote": ["Q1", "Q2", "=SUM(1)"],
+            "Customer": ["A & B <Co>", " padded", None],
+            "Quote Amount": [1600.5, 2000, float("nan")],
+            "Date Quoted": [pd.Timestamp("2024-01-02 03:04"), "2024-01-03", date(2024, 1, 4)],
+            "Entry Person Name": ["Reid Kincaid", "Eric Simpson", "Eric Simpson"],
+            "Won by Follow Up?": [False, True, False],
+        }
+    )
+    sheets = {
+        "Follow-Up": followups,
+        "Reid Kincaid": followups.iloc[:1],
+        "Eric Simpson": followups.iloc[1:],
+        "_Meta": pd.DataFrame({"Metric": ["followups", "floor"], "Value": [3, 1500.0]}),
+    }
+
+    patched = xlsx_patch.patch_template(tmp_path / "patched.xlsx", sheets, template_path)
+
+    def not_patchable(*args):
+        raise xlsx_patch.TemplateNotPatchable("forced")
+
+    monkeypatch.setattr(xlsx_patch, "patch_template", not_patchable)
+    reloaded = io_excel.write_output(tmp_path / "openpyxl.xlsx", sheets, template_path)
+
+    assert patched == reloaded
+    assert _cell_values(tmp_path / "patched.xlsx") == _cell_values(tmp_path / "openpyxl.xlsx")
+    with zipfile.ZipFile(template_path) as before, zipfile.ZipFile(tmp_path / "patched.xlsx") as after:
+        names = set(after.namelist())
+        # Charts, drawings, themes and non-output sheets are carried over byte for byte.
+        untouched = [n for n in before.namelist() if n.startswith(("xl/charts/", "xl/drawings/", "xl/theme/"))]
+        assert all(before.read(n) == after.read(n) for n in untouched)
+        assert "xl/calcChain.xml" not in names and not any(n.startswith("xl/externalLinks/") for n in names)
+
+
+def test_write_output_without_template_streams_the_same_cells(tmp_path: Path, monkeypatch):
+    sheets = {
+        "Follow-Up": pd.DataFrame(
+            {
+                "Quote": ["Q1", "=HYPERLINK(1)", None],
+                "Quote Amount": [4000.5, None, 12],
+                "Date Quoted": [datetime(2024, 1, 2), None, date(2024, 1, 3)],
+                "Won by Follow Up?": [False, True, False],
+            }
+        ),
+        "_Meta": pd.DataFrame({"Metric": ["followups"], "Value": [3]}),
+    }
+    wb = Workbook()
+    wb.remove(wb.active)
+    expected_changed = {name: io_excel._write_dataframe_to_sheet(wb.create_sheet(name), df) for name, df in sheets.items()}
+    wb.save(tmp_path / "cells.xlsx")
+
+    def no_cell_writes(*args):
+        raise AssertionError("a new workbook is streamed, not built cell by cell")
+
+    monkeypatch.setattr(io_excel, "_write_dataframe_to_sheet", no_cell_writes)
+    changed = write_output(tmp_path / "streamed.xlsx", sheets)
+
+    assert changed == expected_changed
+    assert _cell_values(tmp_path / "streamed.xlsx") == _cell_values(tmp_path / "cells.xlsx")
+
+
 def test_resolve_template_path_prefers_explicit(tmp_path: Path):
     explicit = tmp_path / "x.xlsx"
     explicit.write_bytes(b"dummy")
@@ -149,3 +278,287 @@ def test_resolve_template_path_prefers_parts_followup_template_in_assets(tmp_pat
     preferred.write_bytes(b"dummy")
 
     assert resolve_template_path(None) == preferred
+
+
+def test_update_mode_carries_rep_edits_and_applies_diff(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    quotes_path = tmp_path / "quotes.xlsx"
+    orders_path = tmp_path / "orders.xlsx"
+    out_path = tmp_path / "output.xlsx"
+    reps = ["Reid Kincaid", "Eric Simpson"]
+
+    quotes = pd.DataFrame(
+        {
+            "Quote #": ["Q1", "Q2"],
+            "Customer": ["Acme", "Beta"],
+            "Amount": [4000, 4100],
+            "Date Quoted": ["2024-01-01", "2024-01-02"],
+            "Entry Person Name": ["Reid Kincaid", "Eric Simpson"],
+        }
+    )
+    quotes.to_excel(quotes_path, index=False)
+    pd.DataFrame({"Order Number": [1], "Customer": ["Nobody"], "Net Amount": [1]}).to_excel(orders_path, index=False)
+    generate_followup_workbook(RunConfig(quotes_path=quotes_path, orders_path=orders_path, out_path=out_path, reps=reps))
+
+    # A rep ticks Q2 and adds a notes column.
+    wb = load_workbook(out_path)
+    ws = wb["Follow-Up"]
+    assert [ws["A2"].value, ws["A3"].value] == ["Q2", "Q1"]
+    ws["G1"] = "Notes"
+    ws["F2"] = True
+    ws["G2"] = "called 1/5"
+    wb.save(out_path)
+
+    # Q1 converts; Q3 is new.
+    pd.concat(
+        [quotes, pd.DataFrame([{"Quote #": "Q3", "Customer": "Gamma", "Amount": 5000, "Date Quoted": "2024-01-03", "Entry Person Name": "Eric Simpson"}])]
+    ).to_excel(quotes_path, index=False)
+    pd.DataFrame({"Order Number": [1], "Customer": ["ACME"], "Net Amount": [4000]}).to_excel(orders_path, index=False)
+    generate_followup_workbook(
+        RunConfig(quotes_path=quotes_path, orders_path=orders_path, out_path=out_path, reps=reps, update_path=out_path)
+    )
+
+    wb = load_workbook(out_path)
+    ws = wb["Follow-Up"]
+    rows = [[c.value for c in row] for row in ws.iter_rows(min_row=2, max_row=ws.max_row) if row[0].value is not None]
+    assert rows == [
+        ["Q2", "Beta", 4100, "2024-01-02", "Eric Simpson", True, "called 1/5"],
+        ["Q3", "Gamma", 5000, "2024-01-03", "Eric Simpson", False, None],
+    ]
+    assert wb["Reid Kincaid"]["A2"].value is None
+    assert wb["Eric Simpson"]["G2"].value == "called 1/5"
+    meta = {r[0].value: r[1].value for r in wb["_Meta"].iter_rows(min_row=2)}
+    assert (meta["update_kept"], meta["update_added"], meta["update_removed"]) == (1, 1, 1)
+
+
+BUNDLED_TEMPLATE = Path(__file__).resolve().parents[1] / "assets" / "Parts Follow Up Template.xlsx"
+
+
+def _sheet_rows(ws) -> list[dict[str, object]]:
+    header = [c.value for c in ws[1]]
+    return [
+        dict(zip(header, (c.value for c in row)))
+        for row in ws.iter_rows(min_row=2, max_row=ws.max_row)
+        if row[header.index("Quote")].value is not None
+    ]
+
+
+def test_update_mode_moves_rep_tab_edits_with_their_quote(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    quotes_path = tmp_path / "quotes.xlsx"
+    orders_path = tmp_path / "orders.xlsx"
+    out_path = tmp_path / "output.xlsx"
+    cfg = RunConfig(
+        quotes_path=quotes_path,
+        orders_path=orders_path,
+        out_path=out_path,
+        reps=["Reid Kincaid"],
+        template_path=BUNDLED_TEMPLATE,
+    )
+    quotes = pd.DataFrame(
+        {
+            "Quote #": ["Q1", "Q2", "Q3"],
+            "Customer": ["Acme", "Beta", "Gamma"],
+            "Amount": [4000, 4100, 4200],
+            "Date Quoted": ["2024-01-01", "2024-01-02", "2024-01-03"],
+            "Entry Person Name": ["Reid Kincaid"] * 3,
+        }
+    )
+    quotes.to_excel(quotes_path, index=False)
+    pd.DataFrame({"Order Number": [1], "Customer": ["Nobody"], "Net Amount": [1]}).to_excel(orders_path, index=False)
+    generate_followup_workbook(cfg)
+
+    # The rep fills in the template's own columns and ticks Q3 on their tab only.
+    wb = load_workbook(out_path)
+    ws = wb["Reid Kincaid"]
+    header = {c.value: c.column for c in ws[1]}
+    assert header["Notes"] == 12 and header["Previous Follow Up Date"] == 13
+    row_of = {ws.cell(row=r, column=header["Quote"]).value: r for r in range(2, 5)}
+    ws.cell(row=row_of["Q1"], column=header["Notes"], value="left voicemail")
+    ws.cell(row=row_of["Q2"], column=header["Contact Name"], value="Dana")
+    ws.cell(row=row_of["Q2"], column=header["Notes"], value="call back Friday")
+    ws.cell(row=row_of["Q3"], column=header["Won by Follow Up?"], value=True)
+    wb.save(out_path)
+
+    # Q1 converts, so every later row moves up; Q4 is new.
+    pd.concat(
+        [quotes, pd.DataFrame([{"Quote #": "Q4", "Customer": "Delta", "Amount": 4300, "Date Quoted": "2024-01-04", "Entry Person Name": "Reid Kincaid"}])]
+    ).to_excel(quotes_path, index=False)
+    pd.DataFrame({"Order Number": [1], "Customer": ["ACME"], "Net Amount": [4000]}).to_excel(orders_path, index=False)
+    generate_followup_workbook(replace(cfg, update_path=out_path))
+
+    wb = load_workbook(out_path)
+    tab = {row["Quote"]: row for row in _sheet_rows(wb["Reid Kincaid"])}
+    assert sorted(tab) == ["Q2", "Q3", "Q4"]
+    assert (tab["Q2"]["Contact Name"], tab["Q2"]["Notes"]) == ("Dana", "call back Friday")
+    assert [tab[q]["Won by Follow Up?"] for q in ("Q2", "Q3", "Q4")] == [False, True, False]
+    assert tab["Q3"]["Notes"] is None and tab["Q4"]["Notes"] is None
+    assert tab["Q4"]["Contact Name"] is None
+    # Q1's note left with Q1 instead of staying on the row Q2 or Q3 moved into.
+    notes = [c.value for c in wb["Reid Kincaid"]["L"] if c.value is not None]
+    assert notes == ["Notes", "call back Friday"]
+    followup = {row["Quote"]: row["Won by Follow Up?"] for row in _sheet_rows(wb["Follow-Up"])}
+    assert followup == {"Q2": False, "Q3": True, "Q4": False}
+
+
+def test_multiple_order_files_are_globbed_aligned_and_deduped(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    pd.DataFrame(
+        {
+            "Quote #": ["Q1", "Q2", "Q3"],
+            "Customer": ["Acme", "Beta", "Gamma"],
+            "Amount": [4000, 4100, 5000],
+            "Date Quoted": ["2024-01-01", "2024-01-02", "2024-01-03"],
+            "Entry Person Name": ["Reid Kincaid"] * 3,
+        }
+    ).to_excel(tmp_path / "quotes.xlsx", index=False)
+    # January export; order 7 is re-exported in February with its corrected total.
+    pd.DataFrame(
+        {"Order Number": [1, 7], "Customer": ["ACME", "Gamma"], "Net Amount": [4000, 100]}
+    ).to_excel(tmp_path / "Order Log 2024-01.xlsx", index=False)
+    with pd.ExcelWriter(tmp_path / "Order Log 2024-02.xlsx") as writer:
+        pd.DataFrame({"SO": [7], "Customer Name": ["Gamma"], "Net": [5000]}).to_excel(writer, sheet_name="Feb", index=False)
+        pd.DataFrame({"SO": [8], "Customer Name": ["Beta"], "Net": [9999]}).to_excel(writer, sheet_name="Feb late", index=False)
+
+    cfg = make_run_config(
+        "quotes.xlsx", [str(tmp_path / "Order Log 2024-*.xlsx")], "out.xlsx", sheet_orders="*", reps=["Reid Kincaid"]
+    )
+    assert cfg.orders_paths == [tmp_path / "Order Log 2024-01.xlsx", tmp_path / "Order Log 2024-02.xlsx"]
+
+    quotes_df, orders_df, _, odetect = _read_inputs(cfg)
+    assert len(orders_df) == 3  # order 7 kept once, from the later file
+    assert orders_df.set_index(odetect.mapping["order_id"]).loc[7, odetect.mapping["net"]] == 5000
+
+    generate_followup_workbook(cfg)
+    followups = pd.read_excel(tmp_path / "out.xlsx", sheet_name="Follow-Up")
+    assert followups["Quote"].tolist() == ["Q2"]
+
+    # Streaming the order files one row at a time folds to the same totals and output.
+    monkeypatch.setattr(io_excel, "DEFAULT_CHUNK_ROWS", 1)
+    generate_followup_workbook(replace(cfg, stream_orders=True, out_path=tmp_path / "streamed.xlsx"))
+    streamed = pd.read_excel(tmp_path / "streamed.xlsx", sheet_name="Follow-Up")
+    pd.testing.assert_frame_equal(streamed, followups)
+
+
+def test_stream_orders_with_an_empty_order_log_reports_every_quote(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame(
+        {
+            "Quote #": ["Q1", "Q2"],
+            "Customer": ["Acme", "Beta"],
+            "Amount": [4000, 4100],
+            "Date Quoted": ["2024-01-01", "2024-01-02"],
+            "Entry Person Name": ["Reid Kincaid"] * 2,
+        }
+    ).to_excel(tmp_path / "quotes.xlsx", index=False)
+    # "No orders this period": the header row only.
+    pd.DataFrame(columns=["Order Number", "Customer", "Net Amount"]).to_excel(tmp_path / "orders.xlsx", index=False)
+    cfg = make_run_config("quotes.xlsx", "orders.xlsx", "out.xlsx", reps=["Reid Kincaid"])
+
+    generate_followup_workbook(cfg)
+    generate_followup_workbook(replace(cfg, stream_orders=True, out_path=tmp_path / "streamed.xlsx"))
+
+    followups = pd.read_excel(tmp_path / "out.xlsx", sheet_name="Follow-Up")
+    assert sorted(followups["Quote"]) == ["Q1", "Q2"]
+    pd.testing.assert_frame_equal(pd.read_excel(tmp_path / "streamed.xlsx", sheet_name="Follow-Up"), followups)
+
+
+def test_inconsistent_columns_across_files_raise(tmp_path: Path):
+    pd.DataFrame({"Customer": ["A"], "Net": [1], "Order Number": [1]}).to_excel(tmp_path / "a.xlsx", index=False)
+    pd.DataFrame({"Customer": ["A"], "Net": [1]}).to_excel(tmp_path / "b.xlsx", index=False)
+    parts = read_excel_parts([tmp_path / "a.xlsx", tmp_path / "b.xlsx"])
+    with pytest.raises(FollowupError, match="Inconsistent columns"):
+        combine_parts(parts, ORDER_SYNONYMS, required_fields={"customer", "net"}, dedupe_fields=["order_id"])
+
+    with pytest.raises(FollowupError, match="No files match"):
+        expand_input_paths([str(tmp_path / "missing-*.xlsx")])
+
+
+def test_header_row_and_sheet_are_detected_below_banner_rows(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    wb = Workbook()
+    wb.active.title = "Report Info"
+    wb.active.append(["Quote Summary", "Printed 2024-02-01"])
+    ws = wb.create_sheet("Quotes")
+    ws.append(["ACME Corp - Quote Summary"])
+    ws.append([])
+    ws.append(["Quote #", "Customer", "Amount", "Date Quoted", "Entry Person Name"])
+    ws.append(["Q1", "Acme", 4000, "2024-01-01", "Reid Kincaid"])
+    ws.append(["Q2", "Beta", 4100, "2024-01-02", "Reid Kincaid"])
+    wb.save(tmp_path / "quotes.xlsx")
+
+    wb = Workbook()
+    wb.active.append(["Order Log", None, None])
+    wb.active.append(["Customer filter: all", None, None])
+    wb.active.append(["Order Number", "Customer", "Net Amount"])
+    wb.active.append([1, "ACME", 4000])
+    wb.save(tmp_path / "orders.xlsx")
+
+    spec = HeaderSpec(ORDER_SYNONYMS, frozenset({"customer", "net"}))
+    [layout] = locate_header(tmp_path / "orders.xlsx", spec)
+    assert (layout.sheet_name, layout.header_row) == ("Sheet", 2)
+    assert read_excel_parts([tmp_path / "orders.xlsx"], header=spec)[0][0] == "orders.xlsx (Sheet, header row 3)"
+
+    cfg = make_run_config("quotes.xlsx", "orders.xlsx", "out.xlsx", reps=["Reid Kincaid"], reader="openpyxl")
+    quotes_df, orders_df, _, _ = _read_inputs(cfg)
+    assert quotes_df["Quote #"].tolist() == ["Q1", "Q2"]
+    assert orders_df["Net Amount"].tolist() == [4000]
+
+    generate_followup_workbook(cfg)
+    followups = pd.read_excel(tmp_path / "out.xlsx", sheet_name="Follow-Up")
+    assert followups["Quote"].tolist() == ["Q2"]
+    generate_followup_workbook(replace(cfg, stream_orders=True, out_path=tmp_path / "streamed.xlsx"))
+    pd.testing.assert_frame_equal(pd.read_excel(tmp_path / "streamed.xlsx", sheet_name="Follow-Up"), followups)
+
+
+def _reader_fixture(tmp_path: Path) -> Path:
+    path = tmp_path / "mixed.xlsx"
+    pd.DataFrame(
+        {
+            "Quote #": ["Q1", "Q2", None, "Q4"],
+            "Customer": ["Acme", "Beta, Inc.", "Gamma", ""],
+            "Amount": [4000, 4100.5, None, "$1,200"],
+            "Date Quoted": [pd.Timestamp("2024-01-01"), "2024-01-02", None, pd.Timestamp("2024-03-01 13:05")],
+            "Won": [True, False, None, True],
+        }
+    ).to_excel(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("fixture", ["mixed", "template"])
+def test_calamine_and_openpyxl_readers_produce_identical_frames(tmp_path: Path, fixture: str):
+    pytest.importorskip("python_calamine")
+    path = _reader_fixture(tmp_path) if fixture == "mixed" else Path(__file__).resolve().parents[1] / "Parts Follow Up Template.xlsx"
+
+    calamine = read_excel_parts([path], "*", reader="calamine")
+    openpyxl = read_excel_parts([path], "*", reader="openpyxl")
+
+    assert [label for label, _ in calamine] == [label for label, _ in openpyxl]
+    for (_, fast), (_, slow) in zip(calamine, openpyxl):
+        pd.testing.assert_frame_equal(fast, slow)
+
+
+def test_auto_reader_falls_back_to_openpyxl(tmp_path: Path, monkeypatch):
+    path = _reader_fixture(tmp_path)
+    expected = read_excel(path, reader="openpyxl")
+    real_read_excel = pd.read_excel
+
+    def flaky_read_excel(*args, engine=None, **kwargs):
+        if engine == "calamine":
+            raise ValueError("unsupported workbook")
+        return real_read_excel(*args, engine=engine, **kwargs)
+
+    monkeypatch.setattr(io_excel, "resolve_reader", lambda reader="auto": "calamine" if reader != "openpyxl" else reader)
+    monkeypatch.setattr(io_excel.pd, "read_excel", flaky_read_excel)
+    pd.testing.assert_frame_equal(read_excel(path, reader="auto"), expected)
+    with pytest.raises(ValueError):
+        read_excel(path, reader="calamine")
+
+
+def test_calamine_reader_requires_package(monkeypatch):
+    monkeypatch.setattr(io_excel.importlib.util, "find_spec", lambda name: None)
+    assert io_excel.resolve_reader("auto") == "openpyxl"
+    with pytest.raises(FollowupError, match="python-calamine"):
+        io_excel.resolve_reader("calamine")
@@ -1,9 +1,17 @@
+from dataclasses import replace
+from datetime import date
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pytest
 
-from followup_quotes.config import RunConfig
-from followup_quotes.matching import run_matching
+from followup_quotes.io_excel import parse_money_cents
+
+from followup_quotes import matching
+from followup_quotes.cli import main
+from followup_quotes.config import REVISION_ORDERS, FollowupError, RunConfig
+from followup_quotes.matching import run_matching, run_matching_windows, run_sweep
 
 
 def test_option_b_only_followups_with_grouped_order_totals():
@@ -103,3 +111,550 @@ def test_relative_tolerance_matches_customer_order_totals_without_id_link():
 
     assert set(strict.followups["Quote"]) == {"Q-WON", "Q-UNCONVERTED"}
     assert set(relaxed.followups["Quote"]) == {"Q-UNCONVERTED"}
+
+
+def _dated_inputs():
+    quotes = pd.DataFrame(
+        {
+            "Quote #": ["Q1", "Q2", "Q3", "Q4", "Q5"],
+            "Customer": ["Acme", "Acme", "Beta", "Beta", "Gamma"],
+            "Amount": [2000, 3000, 4000, 5000, 6000],
+            "Date Quoted": ["2024-01-10", "2024-01-02", "2024-02-15", "not a date", "2024-03-01"],
+            "Entry Person Name": ["Reid Kincaid"] * 5,
+        }
+    )
+    orders = pd.DataFrame({"Order Number": [1], "Customer": ["ACME"], "Net Amount": [2000]})
+    qmap = {
+        "quote_number": "Quote #",
+        "customer": "Customer",
+        "quote_amount": "Amount",
+        "date_quoted": "Date Quoted",
+        "entry_person_name": "Entry Person Name",
+    }
+    omap = {"order_id": "Order Number", "customer": "Customer", "net": "Net Amount"}
+    return quotes, orders, qmap, omap
+
+
+def test_since_until_slices_quotes_by_date_inclusive():
+    quotes, orders, qmap, omap = _dated_inputs()
+    cfg = RunConfig(
+        quotes_path=Path("q.xlsx"),
+        orders_path=Path("o.xlsx"),
+        out_path=Path("x.xlsx"),
+        reps=["Reid Kincaid"],
+        since=date(2024, 1, 2),
+        until=date(2024, 2, 15),
+    )
+
+    out = run_matching(quotes, orders, qmap, omap, cfg)
+
+    assert set(out.followups["Quote"]) == {"Q2", "Q3"}
+
+
+def test_monthly_windows_match_each_period_from_one_prep():
+    quotes, orders, qmap, omap = _dated_inputs()
+    cfg = RunConfig(
+        quotes_path=Path("q.xlsx"),
+        orders_path=Path("o.xlsx"),
+        out_path=Path("x.xlsx"),
+        reps=["Reid Kincaid"],
+        window="monthly",
+    )
+
+    windows = run_matching_windows(quotes, orders, qmap, omap, cfg)
+
+    assert [label for label, _ in windows] == ["2024-01-01", "2024-02-01", "2024-03-01"]
+    jan = dict(windows)["2024-01-01"]
+    assert list(jan.followups["Quote"]) == ["Q2"]
+    meta = dict(zip(jan.meta["Metric"], jan.meta["Value"]))
+    assert meta["window_end"] == "2024-01-31"
+
+
+def test_order_window_days_only_considers_orders_after_quote_date():
+    quotes = pd.DataFrame(
+        {
+            "Quote #": ["Q-IN", "Q-BEFORE", "Q-LATE", "Q-UNDATED"],
+            "Customer": ["Acme", "Acme", "Acme", "Acme"],
+            "Amount": [2000, 3000, 4000, 3000],
+            "Date Quoted": ["2024-03-01", "2024-03-01", "2024-01-01", None],
+            "Entry Person Name": ["Reid Kincaid"] * 4,
+        }
+    )
+    orders = pd.DataFrame(
+        {
+            "Order Number": [1, 2, 3, 3],
+            "Customer": ["ACME"] * 4,
+            "Net Amount": [2000, 3000, 2000, 2000],
+            "Order Date": ["2024-03-20", "2024-02-01", "2024-03-05", "2024-03-06"],
+        }
+    )
+    qmap = {
+        "quote_number": "Quote #",
+        "customer": "Customer",
+        "quote_amount": "Amount",
+        "date_quoted": "Date Quoted",
+        "entry_person_name": "Entry Person Name",
+    }
+    omap = {"order_id": "Order Number", "customer": "Customer", "net": "Net Amount", "order_date": "Order Date"}
+    cfg = RunConfig(
+        quotes_path=Path("q.xlsx"),
+        orders_path=Path("o.xlsx"),
+        out_path=Path("x.xlsx"),
+        reps=["Reid Kincaid"],
+        tolerance=1,
+        relative_tolerance=0.0,
+        order_window_days=30,
+    )
+
+    out = run_matching(quotes, orders, qmap, omap, cfg)
+
+    # Q-BEFORE's only match was ordered before it was quoted; order 3 (4000) is 2 months late for Q-LATE.
+    # An undated quote has no window, so order 2 still converts Q-UNDATED.
+    assert set(out.followups["Quote"]) == {"Q-BEFORE", "Q-LATE"}
+
+    with pytest.raises(FollowupError, match="--order-window-days"):
+        run_matching(quotes, orders, qmap, omap, replace(cfg, order_window_days=-1))
+    with pytest.raises(SystemExit):
+        main(["--quotes", "q.xlsx", "--orders", "o.xlsx", "--out", "x.xlsx", "--order-window-days", "-1"])
+
+
+def test_order_window_kernel_matches_a_per_quote_scan(monkeypatch):
+    monkeypatch.setattr(matching, "_WINDOW_BATCH_PAIRS", 5)  # many small batches
+    rng = np.random.default_rng(7)
+    start = np.datetime64("2024-01-01", "ns")
+    for _ in range(50):
+        n, m = rng.integers(0, 40, size=2)
+        quote_dates = start + rng.integers(0, 30, n).astype("timedelta64[D]")
+        quote_dates[rng.random(n) < 0.2] = np.datetime64("NaT")
+        shard = matching._Shard(
+            quote_pos=np.arange(n),
+            quote_codes=rng.integers(0, 4, n),
+            quote_amounts=rng.integers(0, 20, n),
+            quote_dates=quote_dates,
+            order_codes=rng.integers(0, 4, m),
+            order_totals=rng.integers(0, 20, m),
+            order_dates=start + rng.integers(0, 30, m).astype("timedelta64[D]"),
+            window_days=int(rng.integers(0, 10)),
+        )
+        nearest, found = matching._nearest_windowed_kernel(shard)
+
+        span = np.timedelta64(shard.window_days, "D")
+        by_date = np.argsort(shard.order_dates, kind="stable")
+        for i in range(n):
+            ok = shard.order_codes[by_date] == shard.quote_codes[i]
+            if not np.isnat(shard.quote_dates[i]):
+                dates = shard.order_dates[by_date]
+                ok &= (dates >= shard.quote_dates[i]) & (dates <= shard.quote_dates[i] + span)
+            candidates = shard.order_totals[by_date][ok]
+            assert found[i] == bool(len(candidates))
+            if len(candidates):
+                assert nearest[i] == candidates[np.abs(candidates - shard.quote_amounts[i]).argmin()]
+
+
+def test_debug_reports_closest_order_total_and_effective_tolerance():
+    quotes = pd.DataFrame(
+        {
+            "Quote #": ["Q1", "Q2", "Q3"],
+            "Customer": ["Acme", "Acme", "Nobody"],
+            "Amount": [2000, 5000, 3000],
+            "Date Quoted": ["2024-01-01"] * 3,
+            "Entry Person Name": ["Reid Kincaid"] * 3,
+        }
+    )
+    orders = pd.DataFrame(
+        {
+            "Order Number": [1, 2, 3],
+            "Customer": ["ACME", "ACME", "ACME"],
+            "Net Amount": [1990, 4000, 7000],
+        }
+    )
+    qmap = {
+        "quote_number": "Quote #",
+        "customer": "Customer",
+        "quote_amount": "Amount",
+        "date_quoted": "Date Quoted",
+        "entry_person_name": "Entry Person Name",
+    }
+    omap = {"order_id": "Order Number", "customer": "Customer", "net": "Net Amount"}
+    cfg = RunConfig(
+        quotes_path=Path("q.xlsx"),
+        orders_path=Path("o.xlsx"),
+        out_path=Path("x.xlsx"),
+        reps=["Reid Kincaid"],
+        tolerance=25,
+        relative_tolerance=0.01,
+        debug=True,
+    )
+
+    out = run_matching(quotes, orders, qmap, omap, cfg)
+    debug = out.debug.set_index("Quote")
+
+    assert debug.loc["Q1", "Closest Order Total"] == 1990
+    assert debug.loc["Q1", "Abs Difference"] == 10
+    assert debug.loc["Q1", "Effective Tolerance"] == 25
+    assert bool(debug.loc["Q1", "Matched"]) is True
+    assert debug.loc["Q2", "Closest Order Total"] == 4000
+    assert debug.loc["Q2", "Rel Difference"] == 0.2
+    assert debug.loc["Q2", "Effective Tolerance"] == 50
+    assert bool(debug.loc["Q2", "Matched"]) is False
+    assert pd.isna(debug.loc["Q3", "Closest Order Total"])
+    assert set(out.followups["Quote"]) == {"Q2", "Q3"}
+
+
+def test_sweep_counts_equal_full_runs_for_each_grid_point():
+    quotes = pd.DataFrame(
+        {
+            "Quote #": ["Q1", "Q2", "Q3", "Q4", "Q4"],
+            "Customer": ["Acme", "Acme", "Beta", "Beta", "Beta"],
+            "Amount": [1800, 5000, 2600, 9000, 9000],
+            "Date Quoted": ["2024-01-01"] * 5,
+            "Entry Person Name": ["Reid Kincaid", "Eric Simpson", "Eric Simpson", "Reid Kincaid", "Reid Kincaid"],
+        }
+    )
+    orders = pd.DataFrame(
+        {
+            "Order Number": [1, 2, 3],
+            "Customer": ["ACME", "BETA", "BETA"],
+            "Net Amount": [1790, 2500, 8800],
+        }
+    )
+    qmap = {
+        "quote_number": "Quote #",
+        "customer": "Customer",
+        "quote_amount": "Amount",
+        "date_quoted": "Date Quoted",
+        "entry_person_name": "Entry Person Name",
+    }
+    omap = {"order_id": "Order Number", "customer": "Customer", "net": "Net Amount"}
+    cfg = RunConfig(
+        quotes_path=Path("q.xlsx"),
+        orders_path=Path("o.xlsx"),
+        out_path=Path("x.xlsx"),
+        reps=["Reid Kincaid", "Eric Simpson"],
+        sweep_floors=[1500, 2000],
+        sweep_tolerances=[1, 25],
+        sweep_relative_tolerances=[0.0, 0.05],
+    )
+
+    sweep = run_sweep(quotes, orders, qmap, omap, cfg)
+
+    assert len(sweep) == 8
+    for row in sweep.itertuples(index=False):
+        point = RunConfig(
+            quotes_path=cfg.quotes_path,
+            orders_path=cfg.orders_path,
+            out_path=cfg.out_path,
+            reps=cfg.reps,
+            floor=row[0],
+            tolerance=row[1],
+            relative_tolerance=row[2],
+        )
+        full = run_matching(quotes, orders, qmap, omap, point).followups
+        assert row[3] == len(full)
+        assert row[4] == (full["Entry Person Name"] == "Eric Simpson").sum()
+        assert row[5] == (full["Entry Person Name"] == "Reid Kincaid").sum()
+
+
+def test_sharded_workers_produce_identical_output():
+    names = ["Acme", "Beta", "Gamma", "Delta", "Epsilon", "Zeta"]
+    quotes = pd.DataFrame(
+        {
+            "Quote #": [f"Q{i}" for i in range(60)],
+            "Customer": [names[i % len(names)] for i in range(60)],
+            "Amount": [1600 + (i * 137) % 5000 for i in range(60)],
+            "Date Quoted": [f"2024-01-{1 + i % 28:02d}" for i in range(60)],
+            "Entry Person Name": ["Reid Kincaid"] * 60,
+        }
+    )
+    orders = pd.DataFrame(
+        {
+            "Order Number": list(range(40)),
+            "Customer": [names[(i * 5) % len(names)].upper() for i in range(40)],
+            "Net Amount": [1600 + (i * 311) % 5000 for i in range(40)],
+            "Order Date": [f"2024-01-{1 + (i * 3) % 28:02d}" for i in range(40)],
+        }
+    )
+    qmap = {
+        "quote_number": "Quote #",
+        "customer": "Customer",
+        "quote_amount": "Amount",
+        "date_quoted": "Date Quoted",
+        "entry_person_name": "Entry Person Name",
+    }
+    omap = {"order_id": "Order Number", "customer": "Customer", "net": "Net Amount", "order_date": "Order Date"}
+
+    for window_days in (None, 10):
+        base = RunConfig(
+            quotes_path=Path("q.xlsx"),
+            orders_path=Path("o.xlsx"),
+            out_path=Path("x.xlsx"),
+            reps=["Reid Kincaid"],
+            debug=True,
+            order_window_days=window_days,
+        )
+        single = run_matching(quotes, orders, qmap, omap, base)
+        sharded = run_matching(quotes, orders, qmap, omap, replace(base, workers=3))
+
+        assert 0 < len(single.followups) < len(quotes)
+        pd.testing.assert_frame_equal(single.followups, sharded.followups)
+        pd.testing.assert_frame_equal(single.debug, sharded.debug)
+
+
+def test_money_is_matched_in_exact_integer_cents():
+    assert parse_money_cents(
+        pd.Series(["$1,234.50", "(75.00)", " 4100.57 ", 4000, 4100.5, None, "abc", "inf"], dtype=object)
+    ).tolist() == [123450, -7500, 410057, 400000, 410050, pd.NA, pd.NA, pd.NA]
+
+    quotes = pd.DataFrame(
+        {
+            "Quote #": ["Q-EXACT", "Q-CENT-OFF", "Q-CREDIT"],
+            "Customer": ["Acme", "Beta", "Gamma"],
+            "Amount": ["$1,600.30", "1600.31", "2,000.00"],
+            "Date Quoted": ["2024-01-01"] * 3,
+            "Entry Person Name": ["Reid Kincaid"] * 3,
+        }
+    )
+    # 1600.10 + 0.20 is 1600.3000000000002 in floats; a credit line in parentheses offsets Gamma.
+    orders = pd.DataFrame(
+        {
+            "Order Number": [1, 1, 2, 3, 3],
+            "Customer": ["ACME", "ACME", "BETA", "GAMMA", "GAMMA"],
+            "Net Amount": [1600.10, 0.20, "1,600.30", "2,500.00", "(500.00)"],
+        }
+    )
+    qmap = {
+        "quote_number": "Quote #",
+        "customer": "Customer",
+        "quote_amount": "Amount",
+        "date_quoted": "Date Quoted",
+        "entry_person_name": "Entry Person Name",
+    }
+    omap = {"order_id": "Order Number", "customer": "Customer", "net": "Net Amount"}
+    cfg = RunConfig(
+        quotes_path=Path("q.xlsx"),
+        orders_path=Path("o.xlsx"),
+        out_path=Path("x.xlsx"),
+        reps=["Reid Kincaid"],
+        tolerance=0,
+        relative_tolerance=0,
+        debug=True,
+    )
+
+    out = run_matching(quotes, orders, qmap, omap, cfg)
+    debug = out.debug.set_index("Quote")
+
+    assert out.followups["Quote"].tolist() == ["Q-CENT-OFF"]
+    assert debug.loc["Q-CENT-OFF", "Abs Difference"] == 0.01
+    assert debug.loc["Q-EXACT", "Quote Amount"] == 1600.30
+
+
+def test_order_totals_accumulator_folds_chunks_like_a_single_frame(monkeypatch):
+    monkeypatch.setattr(matching, "_COMPACT_MIN_ROWS", 1)  # compact after every chunk
+    orders = pd.DataFrame(
+        {
+            "Order Number": [1, 1, 2, None, 3, 3, 2, 4],
+            "Customer": ["Acme", "ACME", "Beta", "Beta", "Gamma", "Gamma", "Beta", "Acme"],
+            "Net Amount": ["100", "$50", 70, 5, "(20)", 200, 30, "n/a"],
+            "Order Date": ["2024-01-05", "2024-01-03", "2024-02-01", "2024-02-02", None, "2024-03-01", "2024-02-03", "2024-01-01"],
+        }
+    )
+    omap = {"order_id": "Order Number", "customer": "Customer", "net": "Net Amount", "order_date": "Order Date"}
+    for window_days in (None, 30):
+        cfg = RunConfig(
+            quotes_path=Path("q.xlsx"), orders_path=Path("o.xlsx"), out_path=Path("x.xlsx"), order_window_days=window_days
+        )
+        expected_counts: dict[str, int] = {}
+        expected = matching._prep_orders_for_cfg(orders, omap, cfg, expected_counts)
+
+        acc = matching.order_accumulator_for_cfg(omap, cfg)
+        for start in range(0, len(orders), 3):
+            acc.add(orders.iloc[start:start + 3])
+        counts: dict[str, int] = {}
+        pd.testing.assert_frame_equal(matching._prep_orders_for_cfg(acc, omap, cfg, counts), expected)
+        assert counts == expected_counts
+
+    # An order id repeated in a later source keeps only that source's lines.
+    cfg = RunConfig(quotes_path=Path("q.xlsx"), orders_path=Path("o.xlsx"), out_path=Path("x.xlsx"))
+    acc = matching.order_accumulator_for_cfg(omap, cfg)
+    acc.add(orders.iloc[:3], source=0)
+    acc.add(orders.iloc[[0, 3]], source=1)
+    totals = acc.totals()
+    assert list(zip(totals["CustKey"], totals["OrderTotalCents"])) == [("ACME", 10000), ("BETA", 7000), ("BETA", 500)]
+
+
+def _one_to_one_reference(quotes: pd.DataFrame, orders: pd.DataFrame, cfg: RunConfig) -> dict[str, object]:
+    """Brute force: take every in-tolerance (quote, order) pair closest first."""
+    pairs = []
+    for qi, q in quotes.iterrows():
+        amount = round(q["Amount"] * 100)
+        limit = max(round(cfg.tolerance * 100), int(abs(amount) * cfg.relative_tolerance))
+        for _, o in orders[orders["Customer"] == q["Customer"]].iterrows():
+            total = round(o["Net Amount"] * 100)
+            if abs(total - amount) <= limit:
+                pairs.append((abs(total - amount), qi, total, o["Order Number"]))
+    assigned: dict[str, object] = {}
+    used: set[object] = set()
+    for _, qi, _, order_id in sorted(pairs):
+        quote = quotes.loc[qi, "Quote #"]
+        if quote not in assigned and order_id not in used:
+            assigned[quote] = order_id
+            used.add(order_id)
+    return assigned
+
+
+def test_one_to_one_lets_each_order_convert_one_quote_closest_first():
+    rng = np.random.default_rng(7)
+    n_quotes, n_orders = 300, 200
+    quotes = pd.DataFrame(
+        {
+            "Quote #": [f"Q{i}" for i in range(n_quotes)],
+            "Customer": rng.choice(["A", "B", "C"], n_quotes),
+            "Amount": rng.integers(1600, 1700, n_quotes).astype(float),
+            "Date Quoted": ["2024-01-01"] * n_quotes,
+            "Entry Person Name": ["Reid Kincaid"] * n_quotes,
+        }
+    )
+    orders = pd.DataFrame(
+        {
+            "Order Number": [f"O{i}" for i in range(n_orders)],
+            "Customer": rng.choice(["A", "B", "C", "D"], n_orders),
+            "Net Amount": rng.integers(1590, 1710, n_orders).astype(float),
+        }
+    )
+    qmap = {
+        "quote_number": "Quote #",
+        "customer": "Customer",
+        "quote_amount": "Amount",
+        "date_quoted": "Date Quoted",
+        "entry_person_name": "Entry Person Name",
+    }
+    omap = {"order_id": "Order Number", "customer": "Customer", "net": "Net Amount"}
+    cfg = RunConfig(
+        quotes_path=Path("q.xlsx"),
+        orders_path=Path("o.xlsx"),
+        out_path=Path("x.xlsx"),
+        reps=["Reid Kincaid"],
+        tolerance=3,
+        relative_tolerance=0,
+        debug=True,
+        one_to_one=True,
+    )
+
+    out = run_matching(quotes, orders, qmap, omap, cfg)
+    debug = out.debug.set_index("Quote")
+    assigned = debug.loc[debug["Matched"], "Assigned Order"].to_dict()
+
+    assert assigned == _one_to_one_reference(quotes, orders, cfg)
+    assert len(set(assigned.values())) == len(assigned)
+    assert set(out.followups["Quote"]) == set(quotes["Quote #"]) - set(assigned)
+    many_to_one = run_matching(quotes, orders, qmap, omap, replace(cfg, one_to_one=False))
+    assert len(out.followups) > len(many_to_one.followups)
+
+    sharded = run_matching(quotes, orders, qmap, omap, replace(cfg, workers=3))
+    pd.testing.assert_frame_equal(sharded.debug, out.debug)
+
+
+def test_max_per_rep_selects_each_reps_most_urgent_followups():
+    rng = np.random.default_rng(7)
+    n = 300
+    reps = ["Reid Kincaid", "Tami Knoell", "Eric Simpson"]
+    quotes = pd.DataFrame(
+        {
+            "Quote #": [f"Q{i}" for i in range(n)],
+            "Customer": [f"Cust {i % 23}" for i in range(n)],
+            "Amount": rng.permutation(np.arange(n)) * 10 + 1600,
+            "Date Quoted": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.permutation(n), unit="D"),
+            "Entry Person Name": [reps[i % 3] for i in range(n)],
+        }
+    )
+    orders = pd.DataFrame({"Order Number": [1], "Customer": ["Cust 0"], "Net Amount": [999_999]})
+    qmap = {
+        "quote_number": "Quote #",
+        "customer": "Customer",
+        "quote_amount": "Amount",
+        "date_quoted": "Date Quoted",
+        "entry_person_name": "Entry Person Name",
+    }
+    omap = {"order_id": "Order Number", "customer": "Customer", "net": "Net Amount"}
+    base = RunConfig(quotes_path=Path("q.xlsx"), orders_path=Path("o.xlsx"), out_path=Path("x.xlsx"), reps=reps)
+    full = run_matching(quotes, orders, qmap, omap, base).followups
+    customer_total = full.groupby("Customer")["Quote Amount"].transform("sum")
+    urgency = {
+        "amount": full["Quote Amount"],
+        "age": -pd.to_datetime(full["Date Quoted"]).astype("int64"),
+        "customer_total": customer_total * 1e6 + full["Quote Amount"],
+    }
+
+    for rank_by, key in urgency.items():
+        cfg = replace(base, max_per_rep=5, rank_by=rank_by)
+        top = run_matching(quotes, orders, qmap, omap, cfg)
+        expected = (
+            full.assign(_key=key)
+            .sort_values(["Entry Person Name", "_key"], ascending=[True, False])
+            .groupby("Entry Person Name")
+            .head(5)
+        )
+        assert top.followups["Quote"].tolist() == expected["Quote"].tolist()
+        assert top.counts["followups"] == len(full) and top.counts["followups_selected"] == 15
+        assert top.rep_followups is None
+
+    kept = run_matching(quotes, orders, qmap, omap, replace(base, max_per_rep=5, full_followup_sheet=True))
+    pd.testing.assert_frame_equal(kept.followups, full)
+    by_amount = run_matching(quotes, orders, qmap, omap, replace(base, max_per_rep=5)).followups
+    pd.testing.assert_frame_equal(kept.rep_followups, by_amount)
+
+
+def test_latest_revision_keeps_one_row_per_quote_number():
+    quotes = pd.DataFrame(
+        {
+            "Quote #": ["Q1", "Q1", "Q1", "Q2", "Q2", None, None, "Q3", "Q3"],
+            "Rev": [1, 3, 2, "A", "B", 1, 1, "B", "AA"],
+            "Customer": ["Acme"] * 9,
+            "Amount": [2000, 2300, 2200, 3000, 3100, 4000, 4100, 5000, 5100],
+            "Date Quoted": [
+                "2024-01-01", "2024-01-02", "2024-01-05", "2024-02-01", "2024-01-20",
+                "2024-01-01", "2024-01-01", "2024-03-01", "2024-03-02",
+            ],
+            "Entry Person Name": ["Reid Kincaid"] * 9,
+        }
+    )
+    orders = pd.DataFrame({"Order Number": [1], "Customer": ["ACME"], "Net Amount": [99_999]})
+    qmap = {
+        "quote_number": "Quote #",
+        "rev": "Rev",
+        "customer": "Customer",
+        "quote_amount": "Amount",
+        "date_quoted": "Date Quoted",
+        "entry_person_name": "Entry Person Name",
+    }
+    omap = {"order_id": "Order Number", "customer": "Customer", "net": "Net Amount"}
+    base = RunConfig(quotes_path=Path("q.xlsx"), orders_path=Path("o.xlsx"), out_path=Path("x.xlsx"), reps=["Reid Kincaid"])
+
+    by_rev = run_matching(quotes, orders, qmap, omap, replace(base, latest_revision="rev"))
+    assert sorted(by_rev.followups["Quote Amount"]) == [2300, 3100, 4000, 4100, 5100]
+    assert by_rev.counts["quotes_read"] == 9 and by_rev.counts["quotes_latest_revision"] == 5
+
+    by_date = run_matching(quotes, orders, qmap, omap, replace(base, latest_revision="date"))
+    assert sorted(by_date.followups["Quote Amount"]) == [2200, 3000, 4000, 4100, 5100]
+
+    assert len(run_matching(quotes, orders, qmap, omap, base).followups) == 9
+
+
+def test_latest_revision_handles_an_empty_quote_export():
+    quotes = pd.DataFrame(columns=["Quote #", "Rev", "Customer", "Amount", "Date Quoted", "Entry Person Name"])
+    orders = pd.DataFrame({"Order Number": [1], "Customer": ["ACME"], "Net Amount": [100]})
+    qmap = {
+        "quote_number": "Quote #",
+        "rev": "Rev",
+        "customer": "Customer",
+        "quote_amount": "Amount",
+        "date_quoted": "Date Quoted",
+        "entry_person_name": "Entry Person Name",
+    }
+    omap = {"order_id": "Order Number", "customer": "Customer", "net": "Net Amount"}
+    base = RunConfig(quotes_path=Path("q.xlsx"), orders_path=Path("o.xlsx"), out_path=Path("x.xlsx"), reps=["Reid Kincaid"])
+
+    for by in REVISION_ORDERS:
+        result = run_matching(quotes, orders, qmap, omap, replace(base, latest_revision=by))
+        assert result.followups.empty
+        assert result.counts["quotes_read"] == 0 and result.counts["quotes_latest_revision"] == 0
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from followup_quotes.preview import ALL_REPS, PreviewModel
+
+
+def _followups(n: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Quote": [f"Q{i}" for i in range(n)],
+            "Customer": ["Acme", "Beta"] * (n // 2),
+            "Quote Amount": [float(1600 + (i * 37) % 1000) for i in range(n)],
+            "Date Quoted": ["2024-01-01", pd.Timestamp("2024-01-02")] * (n // 2),
+            "Entry Person Name": ["Reid Kincaid", None] * (n // 2),
+            "Won by Follow Up?": False,
+        }
+    )
+
+
+def test_preview_pages_filters_and_sorts_without_materializing_rows():
+    model = PreviewModel(_followups(100_000))
+
+    assert len(model) == 100_000
+    assert model.reps() == [ALL_REPS, "Reid Kincaid", "Unassigned"]
+    first = model.rows(0, 3)
+    assert first[0] == ("Q0", "Acme", "1,600.00", "2024-01-01", "Reid Kincaid", "False")
+    assert first[1][4] == ""
+    assert model.rows(99_999, 200) == [model.rows(99_999, 1)[0]]
+
+    model.set_rep("Unassigned")
+    assert len(model) == 50_000
+    assert all(row[0] in {"Q1", "Q3", "Q5"} for row in model.rows(0, 3))
+
+    model.sort_by("Quote Amount")
+    amounts = [float(row[2].replace(",", "")) for row in model.rows(0, 500)]
+    assert amounts == sorted(amounts)
+    model.sort_by("Quote Amount")
+    assert float(model.rows(0, 1)[0][2].replace(",", "")) == max(
+        _followups(100_000).iloc[1::2]["Quote Amount"]
+    )
+
+    model.sort_by("Date Quoted")  # mixed text/date cells still sort
+    assert len(model.rows(0, 10)) == 10
@@ -0,0 +1,178 @@
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+import json
+import subprocess
+import sys
+
+from openpyxl import Workbook
+import pandas as pd
+import pytest
+
+from followup_quotes import app, spill
+from followup_quotes.app import generate_followup_result
+from followup_quotes.config import RunConfig
+from followup_quotes.spill import MemoryPlan
+
+REPS = ["Reid Kincaid", "Tami Knoell"]
+
+
+def _inputs(tmp_path: Path) -> RunConfig:
+    customers = ["Acme", "ACME Inc", "Beta", "Gamma", "Delta", "Epsilon", "Zeta"]
+    quotes = pd.DataFrame(
+        {
+            "Quote #": [f"Q{i}" for i in range(40)],
+            "Rev": [i % 2 for i in range(40)],
+            "Customer": [customers[i % len(customers)] for i in range(40)],
+            "Amount": [1600 + 150 * (i % 9) for i in range(40)],
+            "Date Quoted": [f"2024-0{1 + i % 6}-1{i % 10}" for i in range(40)],
+            "Entry Person Name": [REPS[i % 3 % 2] if i % 3 else "Someone Else" for i in range(40)],
+        }
+    )
+    quotes.iloc[:25].to_excel(tmp_path / "quotes_a.xlsx", index=False)
+    # Overlaps the first file: Q20-Q24 are re-exported with new amounts.
+    later = quotes.iloc[20:].copy()
+    later.loc[later.index[:5], "Amount"] += 300
+    later.to_excel(tmp_path / "quotes_b.xlsx", index=False)
+
+    # Every third quote converted: its order total (split over two lines) is within tolerance.
+    won = quotes.iloc[::3]
+    orders = pd.DataFrame(
+        {
+            "Order Number": [n // 2 for n in range(2 * len(won))],
+            "Customer": [c.upper() for c in won["Customer"] for _ in range(2)],
+            "Net Amount": [a / 2 + 10 for a in won["Amount"] for _ in range(2)],
+        }
+    )
+    orders.iloc[:20].to_excel(tmp_path / "orders_a.xlsx", index=False)
+    orders.iloc[14:].to_excel(tmp_path / "orders_b.xlsx", index=False)
+    return RunConfig(
+        quotes_path=tmp_path / "quotes_a.xlsx",
+        orders_path=tmp_path / "orders_a.xlsx",
+        extra_quotes_paths=[tmp_path / "quotes_b.xlsx"],
+        extra_orders_paths=[tmp_path / "orders_b.xlsx"],
+        out_path=tmp_path / "out.xlsx",
+        reps=REPS,
+        tolerance=50,
+        relative_tolerance=0,
+        use_cache=False,
+        record_history=False,
+    )
+
+
+def _values(df: pd.DataFrame) -> pd.DataFrame:
+    # Whether an all-string column is inferred as `str` depends on how rows were batched.
+    df = df.reset_index(drop=True).astype(object)
+    return df.where(df.notna(), None)
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [
+        {},
+        {"debug": True, "since": date(2024, 2, 1), "until": date(2024, 5, 31)},
+        {"max_per_rep": 2, "rank_by": "customer_total", "full_followup_sheet": True},
+        {"one_to_one": True, "debug": True},
+        {"latest_revision": "rev"},
+    ],
+)
+def test_memory_budget_run_matches_in_memory_run(tmp_path: Path, monkeypatch, settings):
+    cfg = replace(_inputs(tmp_path), **settings)
+    _, expected = generate_followup_result(cfg)
+    # Tiny read chunks, and every bucket matched on its own.
+    tiny = MemoryPlan(chunk_bytes=2000, batch_bytes=1)
+    monkeypatch.setattr(app, "plan_memory", lambda budget_mb: tiny)
+    monkeypatch.setattr(spill, "plan_memory", lambda budget_mb: tiny)
+    _, spilled = generate_followup_result(
+        replace(cfg, out_path=tmp_path / "spilled.xlsx", memory_budget_mb=1, spill_dir=tmp_path / "spill")
+    )
+
+    assert spilled.counts.pop("spill_batches") > 1
+    assert 0 < expected.counts["quotes_matched"] < expected.counts["quotes_allowed_reps"]
+    # Like --stream-orders, order lines are counted before overlapping files are deduplicated.
+    for key in ("orders_read", "orders_with_net"):
+        spilled.counts.pop(key), expected.counts.pop(key)
+    assert spilled.counts == expected.counts
+    for got, want in [
+        (spilled.followups, expected.followups),
+        (spilled.meta, expected.meta),
+        (spilled.debug, expected.debug),
+        (spilled.rep_followups, expected.rep_followups),
+    ]:
+        if want is None:
+            assert got is None
+        else:
+            pd.testing.assert_frame_equal(_values(got), _values(want))
+    assert list((tmp_path / "spill").iterdir()) == []  # buckets are removed after the run
+
+
+@pytest.mark.parametrize("empty", ["orders", "quotes"])
+def test_memory_budget_run_handles_header_only_exports(tmp_path: Path, empty):
+    cfg = _inputs(tmp_path)
+    header_only = {
+        "orders": (cfg.orders_path, ["Order Number", "Customer", "Net Amount"]),
+        "quotes": (cfg.quotes_path, ["Quote #", "Rev", "Customer", "Amount", "Date Quoted", "Entry Person Name"]),
+    }[empty]
+    pd.DataFrame(columns=header_only[1]).to_excel(header_only[0], index=False)
+    cfg = replace(cfg, extra_quotes_paths=[], extra_orders_paths=[])
+    _, expected = generate_followup_result(cfg)
+
+    _, spilled = generate_followup_result(replace(cfg, out_path=tmp_path / "spilled.xlsx", memory_budget_mb=1))
+
+    assert expected.counts["quotes_matched"] == 0
+    assert expected.followups.empty == (empty == "quotes")
+    pd.testing.assert_frame_equal(_values(spilled.followups), _values(expected.followups))
+
+
+def _write_rows(path: Path, header: list[str], rows) -> None:
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Sheet1")
+    ws.append(header)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def _peak_rss_mb(tmp_path: Path, name: str, *args: str) -> float:
+    history = tmp_path / f"{name}.jsonl"
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; from followup_quotes.cli import main; sys.exit(main())",
+            "--quotes", str(tmp_path / "quotes.xlsx"),
+            "--orders", str(tmp_path / "orders.xlsx"),
+            "--out", str(tmp_path / f"{name}.xlsx"),
+            "--reps", "Reid Kincaid",
+            "--no-cache",
+            "--history", str(history),
+            *args,
+        ],
+        check=True,
+        capture_output=True,
+    )
+    peak = json.loads(history.read_text(encoding="utf-8"))["peak_rss_bytes"]
+    if peak is None:
+        pytest.skip("peak RSS is not available on this platform")
+    return peak / 2**20
+
+
+def test_memory_budget_bounds_peak_rss_on_large_input(tmp_path: Path):
+    # ~80 MB of order notes: wide, unmapped text that a full load keeps in memory.
+    _write_rows(
+        tmp_path / "orders.xlsx",
+        ["Order Number", "Customer", "Net Amount", "Notes"],
+        ((i // 2, f"Customer {i // 2 % 5000}", 1000, f"{i} " + "x" * 8000) for i in range(10_000)),
+    )
+    _write_rows(
+        tmp_path / "quotes.xlsx",
+        ["Quote #", "Customer", "Amount", "Date Quoted", "Entry Person Name"],
+        ((f"Q{i}", f"Customer {i % 5000}", 2000 if i % 2 else 5000, "2024-01-02", "Reid Kincaid") for i in range(1_000)),
+    )
+    budget_mb = 150
+
+    assert _peak_rss_mb(tmp_path, "in_memory") > budget_mb
+    assert _peak_rss_mb(tmp_path, "spilled", "--memory-budget-mb", str(budget_mb)) < budget_mb
+    in_memory = pd.read_excel(tmp_path / "in_memory.xlsx", sheet_name=None)
+    spilled = pd.read_excel(tmp_path / "spilled.xlsx", sheet_name=None)
+    pd.testing.assert_frame_equal(spilled["Follow-Up"], in_memory["Follow-Up"])